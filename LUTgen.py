@@ -1,3 +1,16 @@
+#writes the function as one LUT gate, output bit yi is row i of the table (input 0 is the lowest select bit)
+def writeLUT(f, inC, outC):
+    table=0
+    i=0
+    while (i<len(outC)):
+        if (outC[i]=="1"):
+            table=table+2**i
+        i=i+1
+
+    f.write("\nOUTPUT("+str(inC)+")\n")
+    f.write(str(inC)+"=LUT("+hex(table)+", "+", ".join([str(x) for x in range(inC)])+")\n")
+
+
 def main():
 
 
@@ -5,13 +18,20 @@ def main():
     print("Number of inputs: ")
     inC=int(input())
     print("Circuit Output (y0 y1...yn)")
-    outC=input()
+    outC=input().replace(" ","")
+    print("Write a MUX tree (M) or a single LUT gate (L): ")
+    mode=input().strip().upper()
 
     var=0
     while (var<inC):
         f.write("INPUT("+str(var)+")\n")
         var=var+1
 
+    if (mode=="L"):
+        writeLUT(f, inC, outC)
+        f.close()
+        return
+
     muxC=(2**inC)-1
     f.write("\nOUTPUT("+str((muxC+inC))+")\n")
 
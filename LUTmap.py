@@ -0,0 +1,268 @@
+from __future__ import print_function
+import argparse
+import sys
+
+import p3sim
+
+# k-LUT technology mapping of .bench netlists
+# The netlist is read and compiled with p3sim, then mapped in three steps:
+#   1. cut enumeration: every combinational gate gets its k-feasible cuts (sets of at most k lines that cut it off from
+#      the inputs) by merging the cuts of its fan-ins in level order; only the cutLimit best cuts of every gate are
+#      kept (priority cuts), so the work stays linear in the netlist size
+#   2. covering: starting from the outputs and DFF inputs, every needed gate is implemented by its best cut, whose
+#      lines are needed in turn; "depth" mode picks the cuts with the fewest LUT levels and "area" mode the cuts with
+#      the smallest area flow (LUTs shared between the fan-outs of a line)
+#   3. truth tables: the cone of every chosen cut is simulated once with p3sim.gateCalcPacked over all 2^n rows of its
+#      n cut lines (one row per lane), and the result is memoized per (gate, cut)
+# Inputs, outputs and DFFs keep their names; gates with more than k inputs are written out unchanged.
+#
+# Function List:
+# 1. enumerateCuts: priority cuts of every gate, with the depth and area flow of the best one
+# 2. cutTable: truth table of a cut by bit-parallel simulation of its cone
+# 3. shrinkCut: drops the cut lines a truth table does not depend on
+# 4. coverNet / mapNet: the cover of the needed gates, and the full mapping of a compiled netlist
+# 5. writeMapped: writes the mapped netlist as a .bench file of LUT gates
+# 6. main: command line entry point
+
+# Default LUT size and number of cuts kept per gate
+LUT_SIZE = 4
+CUT_LIMIT = 8
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Enumerates the k-feasible cuts of every combinational gate of a compiled netlist
+# Returns [cuts, depth, flow]: cuts[node] is the list of kept cuts (frozensets of wire IDs, best first, the trivial cut
+# {node} not included; empty for gates with more than k inputs), depth[node] / flow[node] the LUT depth and area flow
+# of the best cut (0 for inputs and DFF outputs)
+# references[node] is how many LUTs are expected to read a line, for the area flow; by default its fan-out
+def enumerateCuts(net, k=LUT_SIZE, mode="depth", cutLimit=CUT_LIMIT, references=None):
+    fanin = net["FANIN"]
+    faninStart = net["FANIN_START"]
+    fanout = net["FANOUT"]
+    outputSet = net["OUTPUT_SET"]
+
+    numWires = len(net["NAMES"])
+    depth = [0] * numWires
+    flow = [0.0] * numWires
+    cuts = [[] for x in range(numWires)]
+    cutSets = [[frozenset([node])] for node in range(numWires)]     # kept cuts plus the trivial one
+
+    for node in net["ORDER"]:
+        terms = sorted(set(fanin[faninStart[node]:faninStart[node + 1]]))
+        if references is None:
+            shared = max(1, len(fanout[node]) + (1 if node in outputSet else 0))
+        else:
+            shared = max(1, references[node])
+        if len(terms) > k:
+            # Too wide for a LUT: the gate is kept, and its inputs are cut points
+            depth[node] = 1 + max([depth[term] for term in terms])
+            flow[node] = (1 + sum([flow[term] for term in terms])) / shared
+            continue
+
+        # Every way of picking one cut per fan-in, as long as the union stays within k lines
+        merged = set([frozenset()])
+        for term in terms:
+            merged = set([cut | termCut for cut in merged for termCut in cutSets[term] if len(cut | termCut) <= k])
+
+        # Dropping the cuts that contain a smaller cut, then keeping the best ones
+        candidates = sorted(merged, key=len)
+        kept = []
+        for cut in candidates:
+            if not any([other <= cut for other in kept]):
+                kept.append(cut)
+        scored = []
+        for cut in kept:
+            cutDepth = 1 + max([depth[leaf] for leaf in cut])
+            cutFlow = (1 + sum([flow[leaf] for leaf in cut])) / shared
+            if mode == "area":
+                scored.append([(cutFlow, cutDepth, len(cut)), cut, cutDepth, cutFlow])
+            else:
+                scored.append([(cutDepth, cutFlow, len(cut)), cut, cutDepth, cutFlow])
+        scored.sort(key=lambda item: (item[0], sorted(item[1])))
+        scored = scored[:cutLimit]
+
+        cuts[node] = [item[1] for item in scored]
+        depth[node] = scored[0][2]
+        flow[node] = scored[0][3]
+        cutSets[node] = [frozenset([node])] + cuts[node]
+
+    return [cuts, depth, flow]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Truth table of the function of root over the cut lines leaves (leaves[0] is the lowest select bit)
+# Every row of the table is one lane: leaf i is 1 in the lanes whose row number has bit i set. ones / zeros are scratch
+# rail lists as long as the netlist, memo maps (root, leaves) to tables already computed.
+def cutTable(net, root, leaves, ones, zeros, memo):
+    key = (root, leaves)
+    if key in memo:
+        return memo[key]
+    fanin = net["FANIN"]
+    faninStart = net["FANIN_START"]
+    levels = net["LEVELS"]
+
+    # The cone: every gate between the cut and root
+    cone = []
+    seen = set(leaves)
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        cone.append(node)
+        stack.extend(fanin[faninStart[node]:faninStart[node + 1]])
+    cone.sort(key=lambda node: levels[node])
+
+    rows = 1 << len(leaves)
+    mask = (1 << rows) - 1
+    for i in range(len(leaves)):
+        pattern = int("".join(["1" if (row >> i) & 1 else "0" for row in reversed(range(rows))]), 2)
+        ones[leaves[i]] = pattern
+        zeros[leaves[i]] = mask & ~pattern
+    for node in cone:
+        ones[node], zeros[node] = p3sim.gateCalcPacked(net, node, ones, zeros, mask)
+
+    memo[key] = ones[root]
+    return memo[key]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Removes the cut lines a truth table does not depend on, returns [leaves, table]
+# A LUT keeps at least one input, so a constant function keeps its first line
+def shrinkCut(leaves, table):
+    i = 0
+    while i < len(leaves) and len(leaves) > 1:
+        rows = 1 << len(leaves)
+        low = [(table >> row) & 1 for row in range(rows) if not (row >> i) & 1]
+        high = [(table >> row) & 1 for row in range(rows) if (row >> i) & 1]
+        if low != high:
+            i += 1
+            continue
+        leaves = leaves[:i] + leaves[i + 1:]
+        table = sum([bit << row for row, bit in enumerate(low)])
+    return [leaves, table]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Covers a netlist with the best cut of every needed gate, from the outputs and DFF inputs back to the inputs
+# Returns the mapping of mapNet
+def coverNet(net, cuts, ones, zeros, memo):
+    types = net["TYPES"]
+    fanin = net["FANIN"]
+    faninStart = net["FANIN_START"]
+    mapping = {}
+    needed = list(net["OUTPUTS"]) + [fanin[faninStart[node]] for node in net["DFFS"]]
+    while needed:
+        node = needed.pop()
+        if node in mapping or types[node] == p3sim.INPUT_CODE or types[node] == p3sim.DFF_CODE:
+            continue
+        if not cuts[node]:
+            terms = list(fanin[faninStart[node]:faninStart[node + 1]])
+            mapping[node] = [terms, None]
+            needed.extend(terms)
+            continue
+        leaves = tuple(sorted(cuts[node][0]))
+        leaves, table = shrinkCut(leaves, cutTable(net, node, leaves, ones, zeros, memo))
+        mapping[node] = [list(leaves), table]
+        needed.extend(leaves)
+    return mapping
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Maps a compiled netlist onto k-input LUTs
+# Returns [mapping, depth]: mapping[node] is [leaves, table] for every needed gate implemented as a LUT, or [terms,
+# None] for a gate kept as it is (wider than k); depth is the number of LUT levels of the mapped netlist
+# In "area" mode the cuts are picked a second time with the fan-out of every line in the first cover as its area flow
+# references, and the smaller of the two covers is kept.
+def mapNet(net, k=LUT_SIZE, mode="depth", cutLimit=CUT_LIMIT):
+    numWires = len(net["NAMES"])
+    ones = [0] * numWires
+    zeros = [0] * numWires
+    memo = {}
+    mapping = coverNet(net, enumerateCuts(net, k, mode, cutLimit)[0], ones, zeros, memo)
+
+    if mode == "area":
+        references = [0] * numWires
+        for node in mapping:
+            for leaf in mapping[node][0]:
+                references[leaf] += 1
+        for node in net["OUTPUTS"]:
+            references[node] += 1
+        second = coverNet(net, enumerateCuts(net, k, mode, cutLimit, references)[0], ones, zeros, memo)
+        if len(second) < len(mapping):
+            mapping = second
+
+    # LUT levels of the result
+    level = {}
+    for node in net["ORDER"]:
+        if node in mapping:
+            level[node] = 1 + max([level.get(leaf, 0) for leaf in mapping[node][0]])
+    return [mapping, max(level.values()) if level else 0]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Writes a mapped netlist to outName, the gates in level order
+def writeMapped(outName, net, mapping, comment=""):
+    names = net["NAMES"]
+    fanin = net["FANIN"]
+    faninStart = net["FANIN_START"]
+
+    outFile = open(outName, "w")
+    if comment:
+        outFile.write("# " + comment + "\n")
+    for node in net["INPUTS"]:
+        outFile.write("INPUT(" + names[node] + ")\n")
+    outFile.write("\n")
+    for node in net["OUTPUTS"]:
+        outFile.write("OUTPUT(" + names[node] + ")\n")
+    outFile.write("\n")
+    for node in net["DFFS"]:
+        outFile.write(names[node] + " = DFF(" + names[fanin[faninStart[node]]] + ")\n")
+    for node in net["ORDER"]:
+        if node not in mapping:
+            continue
+        leaves, table = mapping[node]
+        if table is None:
+            logic = p3sim.GATE_TYPES[net["TYPES"][node]]
+            terms = [names[term] for term in leaves]
+            if logic == "LUT":
+                terms = [hex(net["TABLES"][node])] + terms
+            outFile.write(names[node] + " = " + logic + "(" + ", ".join(terms) + ")\n")
+        else:
+            outFile.write(names[node] + " = LUT(" + hex(table) + ", " + ", ".join([names[leaf] for leaf in leaves]) +
+                          ")\n")
+    outFile.close()
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maps a .bench netlist onto k-input LUT gates")
+    parser.add_argument("bench", help="netlist to map")
+    parser.add_argument("out", help="LUT netlist to write")
+    parser.add_argument("-k", type=int, default=LUT_SIZE, help="LUT inputs (default %d)" % LUT_SIZE)
+    parser.add_argument("--mode", choices=["depth", "area"], default="depth",
+                        help="fewest LUT levels (default) or fewest LUTs")
+    parser.add_argument("--cuts", type=int, default=CUT_LIMIT,
+                        help="cuts kept per gate (default %d)" % CUT_LIMIT)
+    args = parser.parse_args(argv)
+    if args.k < 2:
+        parser.error("-k must be at least 2")
+
+    loaded = p3sim.loadCircuit(args.bench)
+    if isinstance(loaded, str):
+        print(loaded)
+        return 1
+    net = loaded[1]
+
+    mapping, depth = mapNet(net, args.k, args.mode, args.cuts)
+    numLuts = len([node for node in mapping if mapping[node][1] is not None])
+    writeMapped(args.out, net, mapping, "%s mapped to %d-LUTs (%s)" % (args.bench, args.k, args.mode))
+    print("%s: %d gates, depth %d -> %d LUTs, %d kept gates, depth %d" % (
+        args.out, len(net["ORDER"]), net["DEPTH"], numLuts, len(mapping) - numLuts, depth))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
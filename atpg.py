@@ -0,0 +1,695 @@
+from __future__ import print_function
+import argparse
+import heapq
+import itertools
+import logging
+import random
+import sys
+
+import p3sim
+
+# Deterministic test vector generation (ATPG) for the single stuck-at faults of a .bench netlist
+# The netlist is read and compiled with p3sim. Random vectors are fault simulated first, which finds the easy faults
+# far faster than a search would, and every fault of the list that no vector detects yet is then targeted with
+# PODEM: only the circuit inputs are ever decided on, and after each decision the good and the faulty circuit are
+# simulated (event-driven, with p3sim.gateCalc, so the values are exactly those of the fault simulator). Each step
+#   1. activates the fault (the faulty line gets the opposite of its stuck value), or else
+#   2. drives the fault effect through the D-frontier gate (a gate with a good/faulty difference on an input but not yet
+#      on its output) that is easiest to observe and still has an X-path (a path of unknown lines) to an output,
+# by backtracing the objective to an input through unknown lines. A decision that leads nowhere is flipped, and the
+# fault is untestable once both values of every decision have failed (or aborted after BACKTRACK_LIMIT flips).
+# SCOAP testability (controllability CC0 / CC1 and observability CO) picks the frontier gate and the backtrace path,
+# and a line that can never be set to a value (CC = SCOAP_INF) ends a branch right away.
+# The inputs a test leaves unknown are filled in (randomly by default), the vector is fault simulated against every
+# fault still undetected, and the faults it detects by chance are dropped before the next target.
+# A test has to make an output known and different in the good and the faulty circuit.
+# Only combinational netlists are handled: a test for a netlist with DFFs would have to load their state first, which
+# a vector file cannot do, so generateTests refuses them (their vectors are graded with --sequential and --init-state).
+#
+# Function List:
+# 1. scoap: SCOAP controllability and observability of every line
+# 2. podem: a test cube (input values, U where free) for one fault, or None
+#     simFault / propagate: the good and faulty line values, kept up to date after each decision
+#     dFrontier / objective / backtrace: the next decision of PODEM
+# 3. generateTests: tests for a whole fault list, random vectors first, with fault dropping by simulation
+#     randomTests: the random vector phase
+# 4. writeVectors / runAtpg: writes the tests as a vector file p3sim reads, and the whole run from file names
+# 5. main: command line entry point
+
+# Flips allowed per fault before it is given up as aborted; the faults found by the vectors hardly depend on it, but
+# proving a fault untestable takes about as many flips as there are input combinations in its cone
+BACKTRACK_LIMIT = 100
+
+# Controllability / observability of a line that can never be set / observed
+SCOAP_INF = 1 << 30
+
+# Largest LUT whose controllability is worked out exactly (over all 3^n 0/1/U input combinations)
+LUT_EXACT = 6
+
+# Random vectors tried before PODEM, RANDOM_BLOCK at a time; the random phase ends after RANDOM_LIMIT vectors, or after
+# a block that detects fewer than RANDOM_YIELD of the faults it was simulated against
+RANDOM_LIMIT = 4096
+RANDOM_BLOCK = 256
+RANDOM_YIELD = 0.01
+
+# Fault status of generateTests
+DETECTED = "detected"
+UNTESTABLE = "untestable"
+ABORTED = "aborted"
+INVALID = "invalid"
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Sum of SCOAP costs, SCOAP_INF if any of them is
+# Large finite costs stay below SCOAP_INF, so a sum is only impossible when one of its parts is
+def costSum(costs):
+    total = 0
+    for cost in costs:
+        if cost >= SCOAP_INF:
+            return SCOAP_INF
+        total += cost
+    return min(total, SCOAP_INF - 1)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Cheapest way [to 0, to 1] to set the inputs of a LUT gate, from the controllabilities of its inputs
+# Up to LUT_EXACT inputs every 0/1/U input combination is tried (a U input costs nothing), so an output that does not
+# depend on a line nobody can set is still controllable. Wider LUTs only try the 0/1 rows and never report SCOAP_INF,
+# so nothing is ever wrongly taken as impossible.
+def lutControl(table, terms, cc0, cc1):
+    best = [SCOAP_INF, SCOAP_INF]
+    numTerms = len(terms)
+    if numTerms <= LUT_EXACT:
+        for combo in itertools.product("01U", repeat=numTerms):
+            rows = [0]
+            cost = []
+            for i in range(numTerms):
+                if combo[i] == "1":
+                    rows = [row | (1 << i) for row in rows]
+                    cost.append(cc1[terms[i]])
+                elif combo[i] == "0":
+                    cost.append(cc0[terms[i]])
+                else:
+                    rows = rows + [row | (1 << i) for row in rows]
+            bits = set([(table >> row) & 1 for row in rows])
+            if len(bits) == 1:
+                bit = bits.pop()
+                best[bit] = min(best[bit], costSum(cost))
+        return best
+    for row in range(1 << numTerms):
+        cost = costSum([cc1[terms[i]] if (row >> i) & 1 else cc0[terms[i]] for i in range(numTerms)])
+        bit = (table >> row) & 1
+        best[bit] = min(best[bit], cost, SCOAP_INF - 1)
+    return best
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Observability of input pin k of gate node: CO of the gate plus the cost of letting the pin through
+def pinObservability(net, node, k, cc0, cc1, co):
+    logic = net["TYPES"][node]
+    terms = net["FANIN"][net["FANIN_START"][node]:net["FANIN_START"][node + 1]]
+    others = [terms[i] for i in range(len(terms)) if i != k]
+    if logic == p3sim.DFF_CODE:
+        return SCOAP_INF
+    if logic == p3sim.AND_CODE or logic == p3sim.NAND_CODE:
+        cost = costSum([cc1[term] for term in others])
+    elif logic == p3sim.OR_CODE or logic == p3sim.NOR_CODE:
+        cost = costSum([cc0[term] for term in others])
+    elif logic == p3sim.XOR_CODE or logic == p3sim.XNOR_CODE:
+        cost = costSum([min(cc0[term], cc1[term]) for term in others])
+    elif logic == p3sim.MUX_CODE:
+        if k == 0:
+            cost = cc0[terms[2]]
+        elif k == 1:
+            cost = cc1[terms[2]]
+        else:
+            cost = min(costSum([cc0[terms[0]], cc1[terms[1]]]), costSum([cc1[terms[0]], cc0[terms[1]]]))
+    elif logic == p3sim.LUT_CODE:
+        # Whether a LUT input can be seen depends on the table; never taken as impossible
+        cost = min(costSum([min(cc0[term], cc1[term]) for term in others]), SCOAP_INF - 1)
+    else:
+        cost = 0
+    return costSum([co[node], cost, 1])
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: SCOAP testability of a compiled netlist, returns [cc0, cc1, co] (lists indexed by wire ID)
+# Inputs cost 1 to set, DFF outputs can never be set (they are U in combinational simulation), outputs cost 0 to
+# observe and DFF inputs can never be observed.
+def scoap(net):
+    types = net["TYPES"]
+    fanin = net["FANIN"]
+    faninStart = net["FANIN_START"]
+    numWires = len(net["NAMES"])
+    cc0 = [SCOAP_INF] * numWires
+    cc1 = [SCOAP_INF] * numWires
+    co = [SCOAP_INF] * numWires
+    for node in net["INPUTS"]:
+        cc0[node] = 1
+        cc1[node] = 1
+
+    for node in net["ORDER"]:
+        logic = types[node]
+        terms = fanin[faninStart[node]:faninStart[node + 1]]
+        if logic == p3sim.BUFF_CODE or logic == p3sim.NOT_CODE:
+            zero, one = cc0[terms[0]], cc1[terms[0]]
+        elif logic == p3sim.AND_CODE or logic == p3sim.NAND_CODE:
+            zero = min([cc0[term] for term in terms])
+            one = costSum([cc1[term] for term in terms])
+        elif logic == p3sim.OR_CODE or logic == p3sim.NOR_CODE:
+            zero = costSum([cc0[term] for term in terms])
+            one = min([cc1[term] for term in terms])
+        elif logic == p3sim.XOR_CODE or logic == p3sim.XNOR_CODE:
+            # Cheapest way to an even / odd number of 1's with every input known
+            zero, one = 0, SCOAP_INF
+            for term in terms:
+                zero, one = (min(costSum([zero, cc0[term]]), costSum([one, cc1[term]])),
+                             min(costSum([zero, cc1[term]]), costSum([one, cc0[term]])))
+        elif logic == p3sim.MUX_CODE:
+            a, b, s = terms[0], terms[1], terms[2]
+            zero = min(costSum([cc0[s], cc0[a]]), costSum([cc1[s], cc0[b]]))
+            one = min(costSum([cc0[s], cc1[a]]), costSum([cc1[s], cc1[b]]))
+        elif logic == p3sim.LUT_CODE:
+            zero, one = lutControl(net["TABLES"][node], terms, cc0, cc1)
+        else:
+            continue
+        if logic == p3sim.NAND_CODE or logic == p3sim.NOR_CODE or logic == p3sim.NOT_CODE or \
+                logic == p3sim.XNOR_CODE:
+            zero, one = one, zero
+        cc0[node] = costSum([zero, 1])
+        cc1[node] = costSum([one, 1])
+
+    for node in net["OUTPUTS"]:
+        co[node] = 0
+    for node in reversed(net["ORDER"]):
+        if co[node] >= SCOAP_INF:
+            continue
+        terms = fanin[faninStart[node]:faninStart[node + 1]]
+        for k in range(len(terms)):
+            co[terms[k]] = min(co[terms[k]], pinObservability(net, node, k, cc0, cc1, co))
+    return [cc0, cc1, co]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: The faulty value of node from the faulty line values bad, with the fault [site, gate, value] injected the
+# same way p3sim.basic_sim does it
+def faultyValue(net, node, bad, fault):
+    site, gate, value = fault
+    if gate == -1 and node == site:
+        return value
+    if node == gate:
+        keep = bad[site]
+        bad[site] = value
+        out = p3sim.gateCalc(net, node, bad)
+        bad[site] = keep
+        return out
+    return p3sim.gateCalc(net, node, bad)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Good and faulty line values with every input unknown, returns [good, bad, cone]
+# good is the all-U good simulation (shared, not changed here), cone the set of gates the fault can reach
+def simFault(net, good, fault):
+    types = net["TYPES"]
+    fanout = net["FANOUT"]
+    levels = net["LEVELS"]
+    site, gate, value = fault
+
+    start = site if gate == -1 else gate
+    cone = set([start])
+    stack = [start]
+    while stack:
+        node = stack.pop()
+        for nextNode in fanout[node]:
+            if nextNode not in cone and types[nextNode] != p3sim.DFF_CODE:
+                cone.add(nextNode)
+                stack.append(nextNode)
+
+    bad = list(good)
+    if types[start] == p3sim.DFF_CODE and gate != -1:
+        # A branch fault on a DFF input only changes the next state, which is never observed here
+        return [bad, set()]
+    for node in sorted(cone, key=lambda node: levels[node]):
+        if types[node] == p3sim.INPUT_CODE or types[node] == p3sim.DFF_CODE:
+            bad[node] = value
+        else:
+            bad[node] = faultyValue(net, node, bad, fault)
+    return [bad, cone]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Sets input node to value and simulates the gates it changes (good and faulty), in level order
+def propagate(net, node, value, good, bad, fault, cone):
+    types = net["TYPES"]
+    fanout = net["FANOUT"]
+    levels = net["LEVELS"]
+    site, gate, stuck = fault
+
+    good[node] = value
+    bad[node] = stuck if (gate == -1 and node == site) else value
+    queue = []
+    queued = set()
+    for nextNode in fanout[node]:
+        if nextNode not in queued and types[nextNode] != p3sim.DFF_CODE:
+            queued.add(nextNode)
+            heapq.heappush(queue, (levels[nextNode], nextNode))
+    while queue:
+        node = heapq.heappop(queue)[1]
+        newGood = p3sim.gateCalc(net, node, good)
+        newBad = faultyValue(net, node, bad, fault) if node in cone else newGood
+        if newGood == good[node] and newBad == bad[node]:
+            continue
+        good[node] = newGood
+        bad[node] = newBad
+        for nextNode in fanout[node]:
+            if nextNode not in queued and types[nextNode] != p3sim.DFF_CODE:
+                queued.add(nextNode)
+                heapq.heappush(queue, (levels[nextNode], nextNode))
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: The terms of gate node that carry the fault effect (known and different in the good and faulty circuit)
+def effectTerms(net, node, good, bad, fault):
+    site, gate, stuck = fault
+    terms = net["FANIN"][net["FANIN_START"][node]:net["FANIN_START"][node + 1]]
+    effects = []
+    for term in terms:
+        badValue = stuck if (node == gate and term == site) else bad[term]
+        if good[term] != "U" and badValue != "U" and good[term] != badValue:
+            effects.append(term)
+    return effects
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Checks for a path of lines that are still unknown (in the good or faulty circuit) from node to an output
+def xPath(net, node, good, bad):
+    types = net["TYPES"]
+    fanout = net["FANOUT"]
+    outputSet = net["OUTPUT_SET"]
+    seen = set([node])
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node in outputSet:
+            return True
+        for nextNode in fanout[node]:
+            if nextNode in seen or types[nextNode] == p3sim.DFF_CODE:
+                continue
+            if good[nextNode] == "U" or bad[nextNode] == "U":
+                seen.add(nextNode)
+                stack.append(nextNode)
+    return False
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: The D-frontier gates that still have an X-path to an output, easiest to observe first
+def dFrontier(net, good, bad, fault, cone, co):
+    frontier = []
+    for node in cone:
+        if good[node] != "U" and bad[node] != "U":
+            continue
+        if effectTerms(net, node, good, bad, fault) and xPath(net, node, good, bad):
+            frontier.append(node)
+    frontier.sort(key=lambda node: (co[node], node))
+    return frontier
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: The [line, value] that moves the fault effect through the D-frontier gate node, or None if it has none
+def gateObjective(net, node, good, bad, fault, cc0, cc1):
+    logic = net["TYPES"][node]
+    terms = net["FANIN"][net["FANIN_START"][node]:net["FANIN_START"][node + 1]]
+    effects = effectTerms(net, node, good, bad, fault)
+    free = [term for term in terms if good[term] == "U" and term not in effects]
+    if not free:
+        return None
+
+    if logic == p3sim.AND_CODE or logic == p3sim.NAND_CODE:
+        return [min(free, key=lambda term: cc1[term]), "1"]
+    if logic == p3sim.OR_CODE or logic == p3sim.NOR_CODE:
+        return [min(free, key=lambda term: cc0[term]), "0"]
+    if logic == p3sim.MUX_CODE:
+        a, b, s = terms[0], terms[1], terms[2]
+        if s in effects:
+            # Both data inputs have to differ
+            term = min(free, key=lambda term: min(cc0[term], cc1[term]))
+            other = b if term == a else a
+            if good[other] != "U":
+                return [term, p3sim.INVERT[good[other]]]
+            return [term, "0" if cc0[term] <= cc1[term] else "1"]
+        if good[s] != "U":
+            return None
+        if a in effects and (b not in effects or cc0[s] <= cc1[s]):
+            return [s, "0"]
+        return [s, "1"]
+    # XOR, XNOR and LUT gates: any value of another input may let the effect through, the cheaper one first
+    term = min(free, key=lambda term: min(cc0[term], cc1[term]))
+    return [term, "0" if cc0[term] <= cc1[term] else "1"]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Picks the unknown term to backtrace through: the hardest one when all of them have to be set, otherwise
+# the easiest; lines that can never be set are only taken when nothing else is left
+def pickTerm(free, cost, hardest):
+    possible = [term for term in free if cost[term] < SCOAP_INF]
+    if not possible:
+        possible = free
+    if hardest:
+        return max(possible, key=lambda term: (cost[term], -term))
+    return min(possible, key=lambda term: (cost[term], term))
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Follows the objective "line = value" back through unknown lines to an input
+# Returns [input, value], or None if the way back ends at a DFF output or has no unknown line to follow
+def backtrace(net, line, value, good, cc0, cc1):
+    types = net["TYPES"]
+    fanin = net["FANIN"]
+    faninStart = net["FANIN_START"]
+    while True:
+        logic = types[line]
+        if logic == p3sim.INPUT_CODE:
+            return [line, value]
+        if logic == p3sim.DFF_CODE:
+            return None
+        terms = fanin[faninStart[line]:faninStart[line + 1]]
+        free = [term for term in terms if good[term] == "U"]
+        if not free:
+            return None
+        if logic == p3sim.NAND_CODE or logic == p3sim.NOR_CODE or logic == p3sim.NOT_CODE or \
+                logic == p3sim.XNOR_CODE:
+            value = p3sim.INVERT[value]
+
+        if logic == p3sim.BUFF_CODE or logic == p3sim.NOT_CODE:
+            line = terms[0]
+        elif logic == p3sim.AND_CODE or logic == p3sim.NAND_CODE:
+            line = pickTerm(free, cc1, True) if value == "1" else pickTerm(free, cc0, False)
+        elif logic == p3sim.OR_CODE or logic == p3sim.NOR_CODE:
+            line = pickTerm(free, cc0, True) if value == "0" else pickTerm(free, cc1, False)
+        elif logic == p3sim.XOR_CODE or logic == p3sim.XNOR_CODE:
+            parity = len([term for term in terms if good[term] == "1"]) % 2
+            cheapest = dict((term, min(cc0[term], cc1[term])) for term in free)
+            line = pickTerm(free, cheapest, False)
+            if len(free) == 1:
+                value = "1" if (value == "1") != (parity == 1) else "0"
+            else:
+                value = "0" if cc0[line] <= cc1[line] else "1"
+        elif logic == p3sim.MUX_CODE:
+            a, b, s = terms[0], terms[1], terms[2]
+            if good[s] != "U":
+                line = a if good[s] == "0" else b
+            elif good[a] == value:
+                line, value = s, "0"
+            elif good[b] == value:
+                line, value = s, "1"
+            else:
+                cost = cc1 if value == "1" else cc0
+                if costSum([cc0[s], cost[a]]) <= costSum([cc1[s], cost[b]]):
+                    line, value = s, "0"
+                else:
+                    line, value = s, "1"
+        elif logic == p3sim.LUT_CODE:
+            # The cheapest row that gives value and fits the known inputs, then its easiest unknown input
+            table = net["TABLES"][line]
+            best = None
+            for row in range(1 << len(terms)):
+                if (table >> row) & 1 != (value == "1"):
+                    continue
+                bits = [(row >> i) & 1 for i in range(len(terms))]
+                if any([good[terms[i]] != "U" and good[terms[i]] != str(bits[i]) for i in range(len(terms))]):
+                    continue
+                cost = costSum([cc1[terms[i]] if bits[i] else cc0[terms[i]] for i in range(len(terms))
+                                if good[terms[i]] == "U"])
+                if best is None or cost < best[0]:
+                    best = [cost, bits]
+            if best is None:
+                return None
+            bits = best[1]
+            choices = [i for i in range(len(terms)) if good[terms[i]] == "U"]
+            k = min(choices, key=lambda i: ((cc1 if bits[i] else cc0)[terms[i]], i))
+            line, value = terms[k], str(bits[k])
+        else:
+            return None
+        if good[line] != "U":
+            return None
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: The next objective [line, value] of PODEM, True once an output shows the fault, or None for a dead end
+# With justifyOnly it is True as soon as the fault is activated
+def objective(net, good, bad, fault, cone, testability, justifyOnly=False):
+    cc0, cc1, co = testability
+    site, gate, stuck = fault
+    for node in net["OUTPUTS"]:
+        if good[node] != "U" and bad[node] != "U" and good[node] != bad[node]:
+            return True
+
+    # Activating the fault first
+    if good[site] == stuck:
+        return None
+    if good[site] == "U":
+        value = p3sim.INVERT[stuck]
+        return [site, value] if (cc0 if value == "0" else cc1)[site] < SCOAP_INF else None
+    if justifyOnly:
+        return True
+
+    for node in dFrontier(net, good, bad, fault, cone, co):
+        goal = gateObjective(net, node, good, bad, fault, cc0, cc1)
+        if goal is not None and (cc0 if goal[1] == "0" else cc1)[goal[0]] < SCOAP_INF:
+            return goal
+    return None
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: PODEM test generation for one fault [site, gate, value] (see p3sim.faultSite)
+# good is the all-U good simulation of the netlist and testability comes from scoap.
+# Returns [status, cube, backtracks]: cube maps every input to '0', '1' or 'U' (None unless status is DETECTED)
+# With justifyOnly the search stops once the fault is activated, so DETECTED means the faulty line can be set to the
+# opposite of its stuck value, and UNTESTABLE that it never can.
+def podem(net, fault, good, testability, backtrackLimit=BACKTRACK_LIMIT, justifyOnly=False):
+    cc0, cc1, co = testability
+    site, gate, stuck = fault
+    if justifyOnly:
+        observable = 0
+    elif gate == -1:
+        observable = co[site]
+    else:
+        terms = net["FANIN"][net["FANIN_START"][gate]:net["FANIN_START"][gate + 1]]
+        observable = min([pinObservability(net, gate, k, cc0, cc1, co) for k in range(len(terms))
+                          if terms[k] == site])
+    if observable >= SCOAP_INF:
+        return [UNTESTABLE, None, 0]
+
+    good = list(good)
+    bad, cone = simFault(net, good, fault)
+    decisions = []      # [input, value, flipped]
+    backtracks = 0
+    while True:
+        goal = objective(net, good, bad, fault, cone, testability, justifyOnly)
+        if goal is True:
+            cube = dict((node, good[node]) for node in net["INPUTS"])
+            return [DETECTED, cube, backtracks]
+
+        if goal is not None:
+            decision = backtrace(net, goal[0], goal[1], good, cc0, cc1)
+            if decision is None:
+                # Nothing to follow back from the objective; any unknown input still narrows the search down
+                free = [node for node in net["INPUTS"] if good[node] == "U"]
+                decision = [free[0], "0"] if free else None
+            if decision is not None:
+                decisions.append([decision[0], decision[1], False])
+                propagate(net, decision[0], decision[1], good, bad, fault, cone)
+                continue
+
+        # Dead end: undoing the decisions tried both ways, then flipping the last one
+        while decisions and decisions[-1][2]:
+            propagate(net, decisions.pop()[0], "U", good, bad, fault, cone)
+        if not decisions:
+            return [UNTESTABLE, None, backtracks]
+        backtracks += 1
+        if backtracks > backtrackLimit:
+            return [ABORTED, None, backtracks]
+        decisions[-1][1] = p3sim.INVERT[decisions[-1][1]]
+        decisions[-1][2] = True
+        propagate(net, decisions[-1][0], decisions[-1][1], good, bad, fault, cone)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Turns a test cube into an input line (the last INPUT first, like the vector files), filling its unknown
+# inputs with fill ("0", "1", or "random" for rand)
+def cubeLine(net, cube, fill, rand):
+    bits = []
+    for node in reversed(net["INPUTS"]):
+        value = cube[node]
+        if value == "U":
+            value = rand.choice("01") if fill == "random" else fill
+        bits.append(value)
+    return "".join(bits)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Fault simulates up to limit random input lines against the faults of targets (indices into sites), with
+# every fault dropped at its first detection, and keeps only the lines that detect a fault no earlier line did
+# Returns [lines, detected]: the lines kept and the faults of targets they detect
+def randomTests(net, targets, sites, rand, limit=RANDOM_LIMIT, engine="event"):
+    width = len(net["INPUTS"])
+    lines = []
+    detected = []
+    tried = 0
+    while targets and width > 0 and tried < limit:
+        block = [format(rand.getrandbits(width), "0" + str(width) + "b") for x in range(min(RANDOM_BLOCK,
+                                                                                          limit - tried))]
+        tried += len(block)
+        detections = p3sim.faultSimLines(net, block, targets, sites, engine, nDetect=1)[1]
+        found = set()
+        for k in range(len(block)):
+            if detections[k]:
+                lines.append(block[k])
+                found.update([faultIndex for faultIndex, faultOutput in detections[k]])
+        detected.extend(sorted(found))
+        numTargets = len(targets)
+        targets = [faultIndex for faultIndex in targets if faultIndex not in found]
+        if len(found) < RANDOM_YIELD * numTargets:
+            break
+    if tried > 0:
+        p3sim.logger.info("%d of %d random vectors kept, %d faults detected", len(lines), tried, len(detected))
+    return [lines, detected]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Generates tests for the faults (from p3sim.getFaults) of a compiled netlist
+# Only one fault of each equivalence class (p3sim.collapseFaults) is targeted, and whatever is found for it holds for
+# its whole class. Up to randomLimit random vectors go first (see randomTests), then PODEM targets the faults they
+# leave undetected, in fault list order. Before PODEM looks for a test, the faulty line is set to the opposite of its
+# stuck value on its own; the answer is kept for every fault on that line and value, so a line that can never take a
+# value (a redundant line) is searched once, not once per fault. Each new vector is fault simulated with engine against
+# every fault still undetected (untestable and aborted ones too), and all the faults it detects are dropped, so
+# DETECTED always agrees with a fault simulation of the lines.
+# Returns [lines, status]: the test input lines, and status[faultIndex] = DETECTED, UNTESTABLE, ABORTED or INVALID
+# (the fault names a line that is not in the netlist); or an error message string for a netlist with DFFs
+def generateTests(net, faults, backtrackLimit=BACKTRACK_LIMIT, fill="random", seed=1, engine="event",
+                  randomLimit=RANDOM_LIMIT):
+    if net["DFFS"]:
+        msg = "ATPG ERROR: THE NETLIST HAS " + str(len(net["DFFS"])) + " DFFS, TEST GENERATION ONLY HANDLES " + \
+              "COMBINATIONAL NETLISTS"
+        p3sim.logger.error(msg)
+        return msg
+    rand = random.Random(seed)
+    sites = [p3sim.faultSite(net, faultLine) for faultLine in faults]
+    testability = scoap(net)
+    good = ["U"] * len(net["NAMES"])
+    for node in net["ORDER"]:
+        good[node] = p3sim.gateCalc(net, node, good)
+
+    reps, classes = p3sim.collapseFaults(net, faults, sites)[0:2]
+    status = [None if site is not None else INVALID for site in sites]
+    justified = {}      # (line, value) -> podem status of setting the line to the value
+
+    lines, detected = randomTests(net, [faultIndex for faultIndex in reps if status[faultIndex] is None], sites, rand,
+                                  randomLimit, engine)
+    for faultIndex in detected:
+        for member in classes[faultIndex]:
+            status[member] = DETECTED
+
+    for faultIndex in reps:
+        if status[faultIndex] is not None:
+            continue
+        site = sites[faultIndex]
+        key = (site[0], p3sim.INVERT[site[2]])
+        if key not in justified:
+            justified[key] = podem(net, site, good, testability, backtrackLimit, True)[0]
+        if justified[key] != DETECTED:
+            result = [justified[key], None, 0]
+        else:
+            result = podem(net, site, good, testability, backtrackLimit)
+        if result[0] != DETECTED:
+            for member in classes[faultIndex]:
+                status[member] = result[0]
+            p3sim.logger.debug("%s: %s after %d backtracks", p3sim.faultName(faults[faultIndex]), result[0],
+                               result[2])
+            continue
+
+        line = cubeLine(net, result[1], fill, rand)
+        lines.append(line)
+        remaining = [index for index in reps if status[index] != DETECTED and status[index] != INVALID]
+        detections = p3sim.faultSimLines(net, [line], remaining, sites, engine)[1][0]
+        for index, faultOutput in detections:
+            for member in classes[index]:
+                status[member] = DETECTED
+        if status[faultIndex] is None:
+            # Cannot happen, PODEM and the fault simulator share gateCalc; kept so a fault is never targeted twice
+            p3sim.logger.warning("%s: the test %s does not detect it", p3sim.faultName(faults[faultIndex]), line)
+            for member in classes[faultIndex]:
+                status[member] = ABORTED
+        p3sim.logger.debug("tv%d = %s for %s, %d faults detected", len(lines), line,
+                           p3sim.faultName(faults[faultIndex]), len(detections))
+    return [lines, status]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Writes test input lines as a vector file, with a comment header
+def writeVectors(vectorFile, lines, comment=""):
+    outFile = open(vectorFile, "w")
+    if comment:
+        outFile.write("# " + comment + "\n")
+    for line in lines:
+        outFile.write(line + "\n")
+    outFile.close()
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Reads a netlist and a fault list, generates the tests and writes them to vectorFile
+# faultFile None uses the full SSA fault list of the netlist. Returns [lines, status] of generateTests, or the netlist
+# error message string (also for a netlist with DFFs, which gets no vector file)
+def runAtpg(bench, faultFile, vectorFile, loaded=None, backtrackLimit=BACKTRACK_LIMIT, fill="random", seed=1,
+            engine="event", randomLimit=RANDOM_LIMIT):
+    if loaded is None:
+        loaded = p3sim.loadCircuit(bench)
+        if isinstance(loaded, str):
+            return loaded
+    circuit, net = loaded
+    if faultFile is None:
+        faults = [[False, faultLine] for faultLine in p3sim.buildFaultList(circuit)]
+    else:
+        faults = p3sim.getFaults(faultFile)
+
+    result = generateTests(net, faults, backtrackLimit, fill, seed, engine, randomLimit)
+    if isinstance(result, str):
+        return result
+    lines, status = result
+    counts = dict((name, status.count(name)) for name in [DETECTED, UNTESTABLE, ABORTED, INVALID])
+    writeVectors(vectorFile, lines, "%s: %d test vectors for %d faults (%d detected, %d untestable, %d aborted)" % (
+        bench, len(lines), len(faults), counts[DETECTED], counts[UNTESTABLE], counts[ABORTED]))
+    p3sim.logger.info("%d test vectors written to %s: %d/%d faults detected, %d untestable, %d aborted%s",
+                      len(lines), vectorFile, counts[DETECTED], len(faults), counts[UNTESTABLE], counts[ABORTED],
+                      ", %d not in the netlist" % counts[INVALID] if counts[INVALID] else "")
+    if not lines:
+        p3sim.logger.warning("No test vector detects any of the faults, %s has no vectors", vectorFile)
+    return [lines, status]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PODEM test vector generation for the stuck-at faults of a netlist")
+    parser.add_argument("bench", help="circuit benchmark file")
+    parser.add_argument("out", help="vector file to write")
+    parser.add_argument("-f", "--faults", help="fault list to target (default: the full SSA fault list)")
+    parser.add_argument("--backtracks", type=int, default=BACKTRACK_LIMIT,
+                        help="flips per fault before it is aborted (default %d)" % BACKTRACK_LIMIT)
+    parser.add_argument("--fill", choices=["random", "0", "1"], default="random",
+                        help="value of the inputs a test leaves free (default random)")
+    parser.add_argument("--random", type=int, default=RANDOM_LIMIT, metavar="N",
+                        help="most random vectors tried before PODEM (default %d, 0 for none)" % RANDOM_LIMIT)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--debug", action="store_true", help="log every fault and test vector")
+    args = parser.parse_args(argv)
+    logging.basicConfig(format="%(message)s", level=logging.DEBUG if args.debug else logging.INFO)
+
+    result = runAtpg(args.bench, args.faults, args.out, backtrackLimit=args.backtracks, fill=args.fill,
+                     seed=args.seed, randomLimit=args.random)
+    return 1 if isinstance(result, str) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
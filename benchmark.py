@@ -0,0 +1,214 @@
+from __future__ import print_function
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import generators
+import p3sim
+
+# Benchmark suite for p3sim
+# Every circuit goes through three phases, each timed on its own (best of --repeat runs):
+#   parse  reading, validating and compiling the benchmark file (loadCircuit without the netlist cache)
+#   good   good circuit simulation of --vectors random input lines (simVectors)
+#   fault  fault simulation of the full SSA fault list over --fault-vectors random input lines (faultSimLines)
+# and the peak Python memory of every phase is measured in a separate traced run (tracemalloc).
+# Results can be saved as a baseline (JSON) and later runs checked against it for timing regressions.
+#
+# Function List:
+# 1. randomLines: random input lines for a netlist
+# 2. timePhase / peakMemory: best-of-N timing and peak memory of one phase
+# 3. benchCircuit: runs the three phases on one benchmark file
+# 4. checkBaseline: compares the results with a stored baseline
+# 5. main: command line entry point
+# Synthetic netlists (--synth) come from generators.randomBench.
+
+# The circuits that ship with the simulator, relative to this file
+BUNDLED = ["c17/c17.bench", "c17(circuit1_circuit2)/c17p1.bench", "c17(circuit1_circuit2)/c17p2.bench",
+           "In Class Circuit/c1.bench", "MUX test/mux.bench", "vending.bench"]
+
+# A phase is only a regression if it got this much slower in seconds as well as in percent (timer noise)
+MIN_REGRESSION = 0.005
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Random 0/1 input lines for a compiled netlist
+def randomLines(net, count, seed=1):
+    rand = random.Random(seed)
+    width = net["INPUT_WIDTH"]
+    return [format(rand.getrandbits(width), "0" + str(width) + "b") if width else "" for x in range(count)]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Runs phase() repeat times, returns [best time in seconds, result of the last run]
+def timePhase(phase, repeat):
+    best = None
+    result = None
+    for x in range(repeat):
+        start = time.perf_counter()
+        result = phase()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return [best, result]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Peak Python memory (bytes) allocated while running phase() once
+def peakMemory(phase):
+    tracemalloc.start()
+    try:
+        phase()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Runs the parse, good and fault phases on one benchmark file
+# Returns a dictionary with the circuit size and, for every phase, its seconds, rate and peak memory
+def benchCircuit(benchFile, options, workDir):
+    p3sim.NETLIST_CACHE = False
+    loaded = p3sim.loadCircuit(benchFile)
+    if isinstance(loaded, str):
+        return {"error": loaded}
+    circuit, net = loaded
+
+    faultFile = os.path.join(workDir, "faults.txt")
+    p3sim.genFaultList(circuit, faultFile, benchFile)
+    faults = p3sim.getFaults(faultFile)
+    sites = [p3sim.faultSite(net, faultLine) for faultLine in faults]
+    goodLines = randomLines(net, options.vectors)
+    faultLines = randomLines(net, options.fault_vectors, seed=2)
+    goodEngine = options.engine if options.engine in ("parallel", "codegen", "numpy") else "parallel"
+
+    phases = [["parse", lambda: p3sim.loadCircuit(benchFile), 1],
+              ["good", lambda: p3sim.simVectors(net, goodLines, engine=goodEngine), len(goodLines)],
+              ["fault", lambda: p3sim.faultSimLines(net, faultLines, range(len(faults)), sites, options.engine),
+               len(faults) * len(faultLines)]]
+
+    results = {"inputs": net["INPUT_WIDTH"], "outputs": len(net["OUTPUTS"]), "gates": len(net["GATES"]),
+               "depth": net["DEPTH"], "faults": len(faults)}
+    for name, phase, work in phases:
+        # An untimed first run builds the generated code / NumPy plan caches of those engines
+        if options.engine in ("codegen", "numpy"):
+            phase()
+        seconds = timePhase(phase, options.repeat)[0]
+        results[name] = {"seconds": seconds, "rate": work / seconds if seconds > 0 else 0}
+        if options.memory:
+            results[name]["peak"] = peakMemory(phase)
+    return results
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Compares results with a baseline, returns the list of regression messages
+# A phase regresses if it is more than tolerance (a fraction) and MIN_REGRESSION seconds slower than the baseline
+def checkBaseline(results, baseline, tolerance):
+    regressions = []
+    for name in sorted(results):
+        if name not in baseline or "error" in results[name] or "error" in baseline[name]:
+            continue
+        for phase in ["parse", "good", "fault"]:
+            if phase not in baseline[name]:
+                continue
+            old = baseline[name][phase]["seconds"]
+            new = results[name][phase]["seconds"]
+            if new > old * (1 + tolerance) and new - old > MIN_REGRESSION:
+                regressions.append("%s %s: %.4f s -> %.4f s (%+.0f%%)" % (name, phase, old, new,
+                                                                          100.0 * (new - old) / old))
+    return regressions
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Command line entry point, returns the exit status (1 on regressions or netlist errors)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="p3sim benchmark suite")
+    parser.add_argument("benches", nargs="*", help="extra benchmark files to run")
+    parser.add_argument("--no-bundled", action="store_true", help="skip the circuits that ship with p3sim")
+    parser.add_argument("--synth", action="append", default=[], metavar="GATESxDEPTH",
+                        help="also run a synthetic netlist of this size, e.g. 2000x30 (can be repeated)")
+    parser.add_argument("--synth-inputs", type=int, default=32, help="inputs of the synthetic netlists")
+    parser.add_argument("--engine", default="event", choices=["event", "parallel", "codegen", "numpy", "serial"],
+                        help="fault simulation engine (and good simulation engine where it has one)")
+    parser.add_argument("--vectors", type=int, default=4096, help="input lines for the good simulation phase")
+    parser.add_argument("--fault-vectors", type=int, default=64, help="input lines for the fault simulation phase")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per phase, the best one counts")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the peak memory runs")
+    parser.add_argument("--baseline", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           "benchmark_baseline.json"),
+                        help="baseline file (default benchmark_baseline.json next to this file)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="fail if any phase regressed against the baseline")
+    parser.add_argument("--tolerance", type=float, default=20.0, metavar="PERCENT",
+                        help="slowdown allowed by --check (default 20)")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to this file")
+    options = parser.parse_args(argv)
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    benches = [] if options.no_bundled else [[name, os.path.join(here, name)] for name in BUNDLED]
+    benches.extend([[name, name] for name in options.benches])
+
+    workDir = tempfile.mkdtemp(prefix="p3bench")
+    try:
+        for size in options.synth:
+            numGates, depth = [int(x) for x in size.lower().split("x")]
+            benchFile = os.path.join(workDir, "synth_" + size + ".bench")
+            generators.randomBench(benchFile, options.synth_inputs, numGates, depth)
+            benches.append(["synth " + size, benchFile])
+
+        results = {}
+        print("%-36s %6s %5s %7s %9s %9s %9s %11s %13s %9s" % ("circuit", "gates", "depth", "faults", "parse s",
+                                                               "good s", "fault s", "vectors/s", "fault-sims/s",
+                                                               "peak KiB"))
+        for name, benchFile in benches:
+            results[name] = benchCircuit(benchFile, options, workDir)
+            result = results[name]
+            if "error" in result:
+                print("%-36s %s" % (name, result["error"].split("\n")[0]))
+                continue
+            peak = max([result[phase].get("peak", 0) for phase in ["parse", "good", "fault"]]) // 1024
+            print("%-36s %6d %5d %7d %9.4f %9.4f %9.4f %11.0f %13.0f %9s" % (
+                name, result["gates"], result["depth"], result["faults"], result["parse"]["seconds"],
+                result["good"]["seconds"], result["fault"]["seconds"], result["good"]["rate"],
+                result["fault"]["rate"], peak if options.memory else "-"))
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+
+    # Timings only compare with a baseline taken with the same settings
+    settings = {"engine": options.engine, "vectors": options.vectors, "fault_vectors": options.fault_vectors}
+    report = {"settings": settings, "circuits": results}
+    if options.json is not None:
+        with open(options.json, "w") as jsonFile:
+            json.dump(report, jsonFile, indent=2, sort_keys=True)
+
+    status = 1 if any(["error" in result for result in results.values()]) else 0
+    if options.check:
+        if not os.path.isfile(options.baseline):
+            print("no baseline at " + options.baseline + ", run with --save-baseline first")
+            return 1
+        with open(options.baseline, "r") as baselineFile:
+            baseline = json.load(baselineFile)
+        if baseline.get("settings") != settings:
+            print("warning: the baseline was taken with different settings: " + json.dumps(baseline.get("settings")))
+        regressions = checkBaseline(results, baseline.get("circuits", {}), options.tolerance / 100.0)
+        for message in regressions:
+            print("REGRESSION: " + message)
+        if regressions:
+            status = 1
+        else:
+            print("no regressions against " + options.baseline)
+
+    if options.save_baseline:
+        with open(options.baseline, "w") as baselineFile:
+            json.dump(report, baselineFile, indent=2, sort_keys=True)
+        print("baseline saved to " + options.baseline)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,784 @@
+from __future__ import print_function
+import argparse
+import heapq
+import random
+import sys
+
+import p3sim
+
+# Combinational equivalence checking of two .bench netlists (e.g. a circuit and its LUT version)
+# Both netlists are read with p3sim and joined into a miter: the inputs are shared, every pair of outputs goes into an
+# XOR and the XORs into one OR, so the two netlists are equivalent exactly when the miter output is 0 for every input
+# line. The check then goes as far as it needs to:
+#   1. exhaustive bit-parallel simulation of the miter when it has at most EXHAUSTIVE_LIMIT inputs (every line, up to
+#      SIM_LANES at once), which decides the question on its own
+#   2. otherwise random bit-parallel simulation, which finds most differences quickly
+#   3. and then a proof on an and-inverter graph (AIG) of the miter: structural hashing merges identical logic, every
+#      new AIG node whose simulation signature matches an earlier node is checked against it with SAT and merged when
+#      they are equal (SAT sweeping), and a last SAT call on the miter output proves it is 0 or gives a counterexample
+# The SAT solver is a small CDCL solver (two watched literals, first UIP learning, VSIDS, restarts, assumptions).
+# Only 0/1 input lines are considered, since equivalence is a question about the logic functions.
+#
+# Function List:
+# 1. matchPorts / buildMiter: pairs up the inputs and outputs of the two netlists and builds the miter circuit
+# 2. simMiter: exhaustive or random simulation of the miter, returns the first failing lane
+# 3. satNew / satAddClause / satSolve: the SAT solver
+# 4. aigNew / aigAnd / aigFromNet: the and-inverter graph with structural hashing and SAT sweeping
+# 5. checkEquivalence: the whole check of two benchmark files, with the counterexample lines
+# 6. main: command line entry point
+
+# Largest number of miter inputs that is simulated exhaustively
+EXHAUSTIVE_LIMIT = 20
+
+# Input lines per simulation pass, and random lines simulated before the SAT proof
+SIM_LANES = 1 << 16
+RANDOM_LINES = 1 << 16
+
+# Random patterns of the AIG signatures, and the SAT conflict limits of a sweeping check / of the final proof
+SIGNATURE_BITS = 256
+SWEEP_CONFLICTS = 100
+PROOF_CONFLICTS = 1000000
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Reads "NAME=V" tie options into a {wire: '0' / '1'} dictionary, or returns an error message
+def parseTies(ties):
+    tied = {}
+    for tie in ties:
+        name, equals, value = tie.partition("=")
+        if equals == "" or value not in ("0", "1"):
+            return "BAD TIE \"" + tie + "\", IT SHOULD BE NAME=0 OR NAME=1"
+        tied["wire_" + name] = value
+    return tied
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Pairs up the ports of two circuit dictionaries
+# Inputs in tiesA / tiesB ({wire: value}) are held at a constant instead; the other inputs (and the outputs) are paired
+# by name when both netlists use the same names, otherwise (or with byOrder) by position.
+# Returns [inputPairs, outputPairs] as lists of [wireA, wireB], or an error message string
+def matchPorts(circuitA, circuitB, tiesA, tiesB, byOrder=False):
+    pairs = []
+    for kind in ["INPUTS", "OUTPUTS"]:
+        wiresA = circuitA[kind][1]
+        wiresB = circuitB[kind][1]
+        if kind == "INPUTS":
+            for ties, wires in [[tiesA, wiresA], [tiesB, wiresB]]:
+                for wire in ties:
+                    if wire not in wires:
+                        return "TIED LINE \"" + wire + "\" IS NOT AN INPUT"
+            wiresA = [wire for wire in wiresA if wire not in tiesA]
+            wiresB = [wire for wire in wiresB if wire not in tiesB]
+
+        if not byOrder and len(set(wiresA)) == len(wiresA) and set(wiresA) == set(wiresB):
+            pairs.append([[wire, wire] for wire in wiresA])
+            continue
+        if len(wiresA) != len(wiresB):
+            return "THE NETLISTS HAVE %d AND %d %s" % (len(wiresA), len(wiresB), kind)
+        pairs.append([[wiresA[i], wiresB[i]] for i in range(len(wiresA))])
+    return pairs
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Builds the miter of two combinational circuit dictionaries as a new circuit dictionary
+# The gates of the two netlists are renamed A.<name> / B.<name>, the paired inputs keep the names of netlist A, tied
+# inputs read the constant lines MITER.0 / MITER.1, and MITER.out<k> = XOR of output pair k; the only output is
+# MITER = OR of those.
+def buildMiter(circuitA, circuitB, inputPairs, outputPairs, tiesA, tiesB):
+    circuit = {}
+    inputs = [pair[0] for pair in inputPairs]
+    if not inputs:
+        inputs = ["wire_MITER.free"]
+    for wire in inputs:
+        circuit[wire] = ["INPUT", wire, False, 'U']
+
+    # Constant lines as LUTs of any input (a table of all 0s or all 1s does not depend on it)
+    circuit["wire_MITER.0"] = ["LUT", [inputs[0]], False, 'U', 0]
+    circuit["wire_MITER.1"] = ["LUT", [inputs[0]], False, 'U', 3]
+    gates = ["wire_MITER.0", "wire_MITER.1"]
+
+    renames = []
+    for side, source, ties, column in [["A.", circuitA, tiesA, 0], ["B.", circuitB, tiesB, 1]]:
+        rename = {}
+        for wire in source["INPUTS"][1]:
+            rename[wire] = "wire_MITER." + ties[wire] if wire in ties else None
+        for pair in inputPairs:
+            rename[pair[column]] = pair[0]
+        for wire in source["GATES"][1]:
+            rename[wire] = "wire_" + side + wire[5:]
+        for wire in source["GATES"][1]:
+            gate = source[wire]
+            circuit[rename[wire]] = [gate[0], [rename[term] for term in gate[1]], False, 'U'] + gate[4:]
+            gates.append(rename[wire])
+        renames.append(rename)
+
+    diffs = []
+    for k in range(len(outputPairs)):
+        diffs.append("wire_MITER.out" + str(k))
+        circuit[diffs[-1]] = ["XOR", [renames[0][outputPairs[k][0]], renames[1][outputPairs[k][1]]], False, 'U']
+    circuit["wire_MITER"] = ["OR", diffs if diffs else ["wire_MITER.0"], False, 'U']
+    gates.extend(diffs + ["wire_MITER"])
+
+    circuit["INPUT_WIDTH"] = ["input width:", len(inputs)]
+    circuit["INPUTS"] = ["Input list", inputs]
+    circuit["OUTPUTS"] = ["Output list", ["wire_MITER"]]
+    circuit["GATES"] = ["Gate list", gates]
+    return circuit
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Simulates the compiled miter on every input line (exhaustive) or on count random lines
+# Returns the {input wire ID: '0' / '1'} values of the first line that sets the miter output, or None
+def simMiter(net, exhaustive, count=RANDOM_LINES, seed=1):
+    rand = random.Random(seed)
+    inputs = net["INPUTS"]
+    miter = net["OUTPUTS"][0]
+    numWires = len(net["NAMES"])
+    total = (1 << len(inputs)) if exhaustive else count
+
+    for start in range(0, total, SIM_LANES):
+        lanes = min(SIM_LANES, total - start)
+        mask = (1 << lanes) - 1
+        ones = [0] * numWires
+        zeros = [0] * numWires
+        for i in range(len(inputs)):
+            if not exhaustive:
+                pattern = rand.getrandbits(lanes)
+            elif (1 << i) < lanes:
+                # Lane r is line start + r, so input i follows bit i of r: 2^i lanes of 0, then 2^i lanes of 1, ...
+                period = 1 << (i + 1)
+                pattern = (((1 << (1 << i)) - 1) << (1 << i)) * (((1 << lanes) - 1) // ((1 << period) - 1))
+            else:
+                pattern = mask if (start >> i) & 1 else 0
+            ones[inputs[i]] = pattern
+            zeros[inputs[i]] = mask & ~pattern
+
+        ones, zeros = p3sim.parallelSim(net, ones, zeros, mask, {})[0:2]
+        if ones[miter]:
+            lane = (ones[miter] & -ones[miter]).bit_length() - 1
+            return dict((node, str((ones[node] >> lane) & 1)) for node in inputs)
+    return None
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# SAT solver
+# Variables are numbered from 0 and literal 2v is variable v, 2v + 1 its negation (the same literals the AIG uses).
+# The solver state is a dictionary; satSolve can be called again and again with more clauses added in between, and
+# the learnt clauses are kept, so the many small checks of SAT sweeping share their work.
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Makes an empty solver
+def satNew():
+    return {"clauses": [], "watches": [], "assigns": [], "level": [], "reason": [], "activity": [], "polarity": [],
+            "decision": [], "trail": [], "trailLim": [], "qhead": 0, "heap": [], "inc": 1.0, "ok": True, "model": None}
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Makes sure the solver has variables 0 to var
+# Only the variables of some clause are ever decided on, so variables nothing uses yet cost nothing in satSolve
+def satVar(solver, var):
+    while len(solver["assigns"]) <= var:
+        solver["watches"].extend([[], []])
+        solver["assigns"].append(-1)
+        solver["level"].append(0)
+        solver["reason"].append(-1)
+        solver["activity"].append(0.0)
+        solver["polarity"].append(0)
+        solver["decision"].append(False)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Makes lit true, with reason the index of the clause that implied it (-1 for a decision)
+def satEnqueue(solver, lit, reason):
+    var = lit >> 1
+    solver["assigns"][var] = (lit & 1) ^ 1
+    solver["level"][var] = len(solver["trailLim"])
+    solver["reason"][var] = reason
+    solver["trail"].append(lit)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Unit propagation over the two watched literals of every clause, returns a conflicting clause index or -1
+def satPropagate(solver):
+    assigns = solver["assigns"]
+    watches = solver["watches"]
+    clauses = solver["clauses"]
+    trail = solver["trail"]
+    qhead = solver["qhead"]
+    while qhead < len(trail):
+        false = trail[qhead] ^ 1
+        qhead += 1
+        watching = watches[false]
+        i = 0
+        j = 0
+        while i < len(watching):
+            index = watching[i]
+            i += 1
+            clause = clauses[index]
+            if clause[0] == false:
+                clause[0] = clause[1]
+                clause[1] = false
+            first = clause[0]
+            value = assigns[first >> 1]
+            if value >= 0 and value ^ (first & 1) == 1:
+                watching[j] = index
+                j += 1
+                continue
+
+            # Looking for another literal that is not false to watch instead
+            moved = False
+            for k in range(2, len(clause)):
+                lit = clause[k]
+                value = assigns[lit >> 1]
+                if value < 0 or value ^ (lit & 1) == 1:
+                    clause[1] = lit
+                    clause[k] = false
+                    watches[lit].append(index)
+                    moved = True
+                    break
+            if moved:
+                continue
+
+            watching[j] = index
+            j += 1
+            if assigns[first >> 1] >= 0:
+                # Every literal is false: conflict
+                while i < len(watching):
+                    watching[j] = watching[i]
+                    j += 1
+                    i += 1
+                del watching[j:]
+                solver["qhead"] = len(trail)
+                return index
+            satEnqueue(solver, first, index)
+        del watching[j:]
+    solver["qhead"] = qhead
+    return -1
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Undoes every assignment above decision level
+def satBacktrack(solver, level):
+    trailLim = solver["trailLim"]
+    if len(trailLim) <= level:
+        return
+    trail = solver["trail"]
+    assigns = solver["assigns"]
+    for k in range(len(trail) - 1, trailLim[level] - 1, -1):
+        var = trail[k] >> 1
+        solver["polarity"][var] = assigns[var]
+        assigns[var] = -1
+        heapq.heappush(solver["heap"], (-solver["activity"][var], var))
+    del trail[trailLim[level]:]
+    del trailLim[level:]
+    solver["qhead"] = len(trail)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: First UIP conflict analysis, returns [learnt clause (asserting literal first), level to go back to]
+def satAnalyze(solver, conflict):
+    level = solver["level"]
+    trail = solver["trail"]
+    activity = solver["activity"]
+    current = len(solver["trailLim"])
+    seen = set()
+    learnt = [0]
+    counter = 0
+    lit = -1
+    k = len(trail) - 1
+    clause = solver["clauses"][conflict]
+    while True:
+        for q in (clause if lit == -1 else clause[1:]):
+            var = q >> 1
+            if var in seen or level[var] == 0:
+                continue
+            seen.add(var)
+            activity[var] += solver["inc"]
+            if activity[var] > 1e100:
+                for v in range(len(activity)):
+                    activity[v] *= 1e-100
+                solver["inc"] *= 1e-100
+            heapq.heappush(solver["heap"], (-activity[var], var))
+            if level[var] >= current:
+                counter += 1
+            else:
+                learnt.append(q)
+
+        # The next literal of the current level on the trail
+        while (trail[k] >> 1) not in seen:
+            k -= 1
+        lit = trail[k]
+        k -= 1
+        counter -= 1
+        if counter == 0:
+            break
+        clause = solver["clauses"][solver["reason"][lit >> 1]]
+    learnt[0] = lit ^ 1
+
+    # Going back to the second highest level of the clause, whose literal is watched next to the asserting one
+    back = 0
+    for i in range(2, len(learnt)):
+        if level[learnt[i] >> 1] > level[learnt[1] >> 1]:
+            learnt[1], learnt[i] = learnt[i], learnt[1]
+    if len(learnt) > 1:
+        back = level[learnt[1] >> 1]
+    return [learnt, back]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Adds a clause (list of literals) at decision level 0; returns False once the clauses are unsatisfiable
+def satAddClause(solver, lits):
+    if not solver["ok"]:
+        return False
+    lits = sorted(set(lits))
+    satVar(solver, max(lits) >> 1)
+    for lit in lits:
+        if not solver["decision"][lit >> 1]:
+            solver["decision"][lit >> 1] = True
+            heapq.heappush(solver["heap"], (-solver["activity"][lit >> 1], lit >> 1))
+    clause = []
+    for lit in lits:
+        if lit ^ 1 in lits:
+            return True
+        value = solver["assigns"][lit >> 1]
+        if value >= 0 and value ^ (lit & 1) == 1:
+            return True
+        if value < 0:
+            clause.append(lit)
+    if not clause:
+        solver["ok"] = False
+        return False
+    if len(clause) == 1:
+        satEnqueue(solver, clause[0], -1)
+        if satPropagate(solver) >= 0:
+            solver["ok"] = False
+        return solver["ok"]
+    solver["clauses"].append(clause)
+    solver["watches"][clause[0]].append(len(solver["clauses"]) - 1)
+    solver["watches"][clause[1]].append(len(solver["clauses"]) - 1)
+    return True
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Solves the clauses with the assumption literals made true
+# Returns True (satisfiable, solver["model"][var] is the 0 / 1 value of every variable), False (unsatisfiable with
+# these assumptions) or None when conflictLimit conflicts (0 for no limit) were not enough
+def satSolve(solver, assumptions=(), conflictLimit=0):
+    if not solver["ok"]:
+        return False
+    if assumptions:
+        satVar(solver, max(assumptions) >> 1)
+    assigns = solver["assigns"]
+    trailLim = solver["trailLim"]
+    conflicts = 0
+    restart = 100
+    while True:
+        conflict = satPropagate(solver)
+        if conflict >= 0:
+            conflicts += 1
+            if not trailLim:
+                solver["ok"] = False
+                return False
+            learnt, back = satAnalyze(solver, conflict)
+            satBacktrack(solver, back)
+            if len(learnt) == 1:
+                satEnqueue(solver, learnt[0], -1)
+            else:
+                solver["clauses"].append(learnt)
+                solver["watches"][learnt[0]].append(len(solver["clauses"]) - 1)
+                solver["watches"][learnt[1]].append(len(solver["clauses"]) - 1)
+                satEnqueue(solver, learnt[0], len(solver["clauses"]) - 1)
+            solver["inc"] /= 0.95
+            if conflictLimit and conflicts >= conflictLimit:
+                satBacktrack(solver, 0)
+                return None
+            if conflicts >= restart:
+                satBacktrack(solver, 0)
+                restart = conflicts + int(restart * 0.5) + 100
+            continue
+
+        # The assumptions go first, one decision level each
+        if len(trailLim) < len(assumptions):
+            lit = assumptions[len(trailLim)]
+            value = assigns[lit >> 1]
+            if value >= 0 and value ^ (lit & 1) == 0:
+                satBacktrack(solver, 0)
+                return False
+            trailLim.append(len(solver["trail"]))
+            if value < 0:
+                satEnqueue(solver, lit, -1)
+            continue
+
+        var = -1
+        heap = solver["heap"]
+        while heap:
+            candidate = heapq.heappop(heap)[1]
+            if assigns[candidate] < 0:
+                var = candidate
+                break
+        if var == -1:
+            solver["model"] = list(assigns)
+            satBacktrack(solver, 0)
+            return True
+        trailLim.append(len(solver["trail"]))
+        satEnqueue(solver, 2 * var + (1 if solver["polarity"][var] == 0 else 0), -1)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# And-inverter graph
+# Variable 0 is the constant 0 (literal 0 is false, literal 1 true), then come the inputs and the 2-input AND nodes,
+# each after its fan-ins. Every node has a simulation signature (one bit per random pattern, plus one per
+# counterexample found while sweeping). With sweeping on, a new node whose signature matches an earlier node (or its
+# complement, or a constant) is checked against it with SAT and replaced by it when they are equal. The AND nodes are
+# only written to the solver (Tseitin clauses) when a check needs them, so every check works on its own fan-in cone.
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Makes an empty AIG; with sweep the nodes are SAT swept as they are made
+def aigNew(sweep=True, seed=1):
+    aig = {"fanins": [None], "strash": {}, "sigs": [0], "mask": (1 << SIGNATURE_BITS) - 1, "inputs": [],
+           "rand": random.Random(seed), "solver": None, "loaded": set([0]), "reps": {0: 0}, "merged": set(),
+           "checks": 0, "merges": 0}
+    if sweep:
+        aig["solver"] = satNew()
+        satAddClause(aig["solver"], [1])
+    return aig
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Adds an input to the AIG, returns its literal
+def aigInput(aig):
+    aig["fanins"].append(None)
+    aig["sigs"].append(aig["rand"].getrandbits(aig["mask"].bit_length()))
+    aig["inputs"].append(len(aig["fanins"]) - 1)
+    if aig["solver"] is not None:
+        satVar(aig["solver"], len(aig["fanins"]) - 1)
+    return 2 * (len(aig["fanins"]) - 1)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Signature of a literal
+def aigSig(aig, lit):
+    return aig["sigs"][lit >> 1] ^ (aig["mask"] if lit & 1 else 0)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: AND of two literals, with constant folding and structural hashing (and sweeping), returns its literal
+def aigAnd(aig, a, b):
+    if a > b:
+        a, b = b, a
+    if a == 0 or a ^ 1 == b:
+        return 0
+    if a == 1 or a == b:
+        return b
+    key = (a, b)
+    if key in aig["strash"]:
+        return aig["strash"][key]
+
+    var = len(aig["fanins"])
+    aig["fanins"].append(key)
+    aig["sigs"].append(aigSig(aig, a) & aigSig(aig, b))
+    lit = 2 * var
+    if aig["solver"] is not None:
+        lit = aigSweep(aig, lit)
+    aig["strash"][key] = lit
+    return lit
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Writes the Tseitin clauses of the fan-in cones of lits to the solver, where they are not there yet
+def aigLoad(aig, lits):
+    fanins = aig["fanins"]
+    loaded = aig["loaded"]
+    solver = aig["solver"]
+    stack = [lit >> 1 for lit in lits]
+    while stack:
+        var = stack.pop()
+        if var in loaded:
+            continue
+        loaded.add(var)
+        satVar(solver, var)
+        if fanins[var] is None:
+            continue
+        a, b = fanins[var]
+        lit = 2 * var
+        satAddClause(solver, [lit ^ 1, a])
+        satAddClause(solver, [lit ^ 1, b])
+        satAddClause(solver, [lit, a ^ 1, b ^ 1])
+        stack.extend([a >> 1, b >> 1])
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Checks a new node against the earlier node (or constant) with the same signature
+# Returns the literal to use for the node: the earlier one when SAT proved them equal, the node itself otherwise
+def aigSweep(aig, lit):
+    sig = aig["sigs"][lit >> 1]
+    phase = sig & 1
+    key = sig ^ (aig["mask"] if phase else 0)
+    if key not in aig["reps"]:
+        aig["reps"][key] = lit ^ phase
+        return lit
+
+    candidate = aig["reps"][key] ^ phase
+    solver = aig["solver"]
+    aig["checks"] += 1
+    aigLoad(aig, [lit, candidate])
+    result = satSolve(solver, [lit, candidate ^ 1], SWEEP_CONFLICTS)
+    if result is False:
+        result = satSolve(solver, [lit ^ 1, candidate], SWEEP_CONFLICTS)
+    if result is False:
+        # Equal: the node is replaced, and the solver learns the equality for the checks still to come
+        satAddClause(solver, [lit ^ 1, candidate])
+        satAddClause(solver, [lit, candidate ^ 1])
+        aig["merged"].add(lit >> 1)
+        aig["merges"] += 1
+        return candidate
+    if result is True:
+        aigRefine(aig, solver["model"])
+    return lit
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Adds a counterexample from the solver to every signature, and sorts the nodes into new classes
+def aigRefine(aig, model):
+    fanins = aig["fanins"]
+    sigs = aig["sigs"]
+    values = [0] * len(fanins)
+    for var in range(1, len(fanins)):
+        if fanins[var] is None:
+            values[var] = model[var] if var < len(model) and model[var] > 0 else 0
+        else:
+            a, b = fanins[var]
+            values[var] = (values[a >> 1] ^ (a & 1)) & (values[b >> 1] ^ (b & 1))
+        sigs[var] = (sigs[var] << 1) | values[var]
+    aig["mask"] = (aig["mask"] << 1) | 1
+
+    reps = {0: 0}
+    for var in range(1, len(fanins)):
+        if var in aig["merged"]:
+            continue
+        phase = sigs[var] & 1
+        key = sigs[var] ^ (aig["mask"] if phase else 0)
+        if key not in reps:
+            reps[key] = 2 * var ^ phase
+    aig["reps"] = reps
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: OR / XOR / MUX of literals out of AND nodes
+def aigOr(aig, a, b):
+    return aigAnd(aig, a ^ 1, b ^ 1) ^ 1
+
+
+def aigXor(aig, a, b):
+    return aigOr(aig, aigAnd(aig, a, b ^ 1), aigAnd(aig, a ^ 1, b))
+
+
+def aigMux(aig, sel, a, b):
+    return aigOr(aig, aigAnd(aig, sel ^ 1, a), aigAnd(aig, sel, b))
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: LUT of the literals terms, by Shannon expansion of its table like p3sim.lutPacked
+def aigLut(aig, table, terms, memo=None):
+    numTerms = len(terms)
+    if table == 0:
+        return 0
+    if table == (1 << (1 << numTerms)) - 1:
+        return 1
+    if memo is None:
+        memo = {}
+    if (table, numTerms) in memo:
+        return memo[(table, numTerms)]
+    half = 1 << (numTerms - 1)
+    low = table & ((1 << half) - 1)
+    high = table >> half
+    if low == high:
+        lit = aigLut(aig, low, terms[:-1], memo)
+    else:
+        lit = aigMux(aig, terms[-1], aigLut(aig, low, terms[:-1], memo), aigLut(aig, high, terms[:-1], memo))
+    memo[(table, numTerms)] = lit
+    return lit
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Builds the AIG of a compiled combinational netlist, returns the literal of every wire ID
+def aigFromNet(aig, net):
+    types = net["TYPES"]
+    fanin = net["FANIN"]
+    faninStart = net["FANIN_START"]
+    lits = [0] * len(net["NAMES"])
+    for node in net["INPUTS"]:
+        lits[node] = aigInput(aig)
+
+    for node in net["ORDER"]:
+        logic = types[node]
+        terms = [lits[term] for term in fanin[faninStart[node]:faninStart[node + 1]]]
+        if logic == p3sim.AND_CODE or logic == p3sim.NAND_CODE:
+            lit = 1
+            for term in terms:
+                lit = aigAnd(aig, lit, term)
+            lit ^= 1 if logic == p3sim.NAND_CODE else 0
+        elif logic == p3sim.OR_CODE or logic == p3sim.NOR_CODE:
+            lit = 0
+            for term in terms:
+                lit = aigOr(aig, lit, term)
+            lit ^= 1 if logic == p3sim.NOR_CODE else 0
+        elif logic == p3sim.XOR_CODE or logic == p3sim.XNOR_CODE:
+            lit = 0
+            for term in terms:
+                lit = aigXor(aig, lit, term)
+            lit ^= 1 if logic == p3sim.XNOR_CODE else 0
+        elif logic == p3sim.BUFF_CODE or logic == p3sim.NOT_CODE:
+            lit = terms[0] ^ (1 if logic == p3sim.NOT_CODE else 0)
+        elif logic == p3sim.MUX_CODE:
+            lit = aigMux(aig, terms[2], terms[0], terms[1])
+        else:
+            lit = aigLut(aig, net["TABLES"][node], terms)
+        lits[node] = lit
+    return lits
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Checks whether two benchmark files compute the same outputs for every 0/1 input line
+# tiesA / tiesB hold inputs of either netlist at a constant ("NAME=0" / "NAME=1" strings), byOrder pairs the ports by
+# position instead of by name. Returns a dictionary with
+#   "equivalent": True, False, or None when the SAT proof ran out of conflicts
+#   "method":     "exhaustive", "random" or "sat"
+#   "lineA" / "lineB": a counterexample input line for each netlist (when not equivalent), in p3sim's input format
+#   "outputs":    [output A, output B, value A, value B] of every output pair that differs on it
+# or an error message string
+def checkEquivalence(benchA, benchB, tiesA=(), tiesB=(), byOrder=False, exhaustiveLimit=EXHAUSTIVE_LIMIT,
+                     randomLines=RANDOM_LINES, conflictLimit=PROOF_CONFLICTS, seed=1, miterFile=None):
+    loaded = []
+    for bench in [benchA, benchB]:
+        result = p3sim.loadCircuit(bench)
+        if isinstance(result, str):
+            return result
+        if len(result[1]["DFFS"]):
+            return bench + ": EQUIVALENCE CHECKING NEEDS COMBINATIONAL NETLISTS (NO DFFS)"
+        loaded.append(result)
+    circuitA, netA = loaded[0]
+    circuitB, netB = loaded[1]
+
+    ties = [parseTies(tiesA), parseTies(tiesB)]
+    for tied in ties:
+        if isinstance(tied, str):
+            return tied
+    pairs = matchPorts(circuitA, circuitB, ties[0], ties[1], byOrder)
+    if isinstance(pairs, str):
+        return pairs
+    inputPairs, outputPairs = pairs
+
+    miterCircuit = buildMiter(circuitA, circuitB, inputPairs, outputPairs, ties[0], ties[1])
+    miter = p3sim.compileNet(miterCircuit)
+    if isinstance(miter, str):
+        return miter
+    if miterFile is not None:
+        writeMiter(miterFile, miterCircuit)
+
+    report = {"equivalent": None, "method": None, "inputs": len(miter["INPUTS"])}
+    counter = None
+    if len(miter["INPUTS"]) <= exhaustiveLimit:
+        report["method"] = "exhaustive"
+        counter = simMiter(miter, True)
+        report["equivalent"] = counter is None
+    else:
+        report["method"] = "random"
+        counter = simMiter(miter, False, randomLines, seed)
+        if counter is not None:
+            report["equivalent"] = False
+        else:
+            report["method"] = "sat"
+            aig = aigNew(True, seed)
+            lits = aigFromNet(aig, miter)
+            out = lits[miter["OUTPUTS"][0]]
+            report["sweep"] = [aig["checks"], aig["merges"], len(aig["fanins"])]
+            aigLoad(aig, [out])
+            result = False if out == 0 else satSolve(aig["solver"], [out], conflictLimit)
+            if result is True:
+                model = aig["solver"]["model"]
+                counter = dict((miter["INPUTS"][i], str(max(model[lits[miter["INPUTS"][i]] >> 1], 0)))
+                               for i in range(len(miter["INPUTS"])))
+                report["equivalent"] = False
+            elif result is False:
+                report["equivalent"] = True
+
+    if counter is not None:
+        # The counterexample as an input line of each netlist, checked with p3sim's own simulation
+        values = dict(("wire_" + miter["NAMES"][node], counter[node]) for node in counter)
+        outputs = []
+        for name, circuit, net, tied, column in [["lineA", circuitA, netA, ties[0], 0],
+                                                   ["lineB", circuitB, netB, ties[1], 1]]:
+            shared = dict((pair[column], values[pair[0]]) for pair in inputPairs)
+            bits = [tied[wire] if wire in tied else shared[wire] for wire in circuit["INPUTS"][1]]
+            report[name] = "".join(reversed(bits))
+            outputs.append(p3sim.simVectors(net, [report[name]])[0])
+        report["outputs"] = []
+        for k in range(len(outputPairs)):
+            valueA = outputs[0][len(outputs[0]) - 1 - circuitA["OUTPUTS"][1].index(outputPairs[k][0])]
+            valueB = outputs[1][len(outputs[1]) - 1 - circuitB["OUTPUTS"][1].index(outputPairs[k][1])]
+            if valueA != valueB:
+                report["outputs"].append([outputPairs[k][0][5:], outputPairs[k][1][5:], valueA, valueB])
+    return report
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Writes a miter circuit dictionary as a .bench file
+def writeMiter(outName, circuit):
+    outFile = open(outName, "w")
+    for wire in circuit["INPUTS"][1]:
+        outFile.write("INPUT(" + wire[5:] + ")\n")
+    for wire in circuit["OUTPUTS"][1]:
+        outFile.write("OUTPUT(" + wire[5:] + ")\n")
+    for wire in circuit["GATES"][1]:
+        gate = circuit[wire]
+        terms = [term[5:] for term in gate[1]]
+        if gate[0] == "LUT":
+            terms = [hex(gate[4])] + terms
+        outFile.write(wire[5:] + " = " + gate[0] + "(" + ", ".join(terms) + ")\n")
+    outFile.close()
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Command line entry point; the exit status is 0 if equivalent, 1 if not, 2 if undecided or on errors
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Combinational equivalence check of two .bench netlists")
+    parser.add_argument("benchA", help="first netlist")
+    parser.add_argument("benchB", help="second netlist")
+    parser.add_argument("--tie-a", action="append", default=[], metavar="NAME=V",
+                        help="hold an input of the first netlist at 0 or 1 (can be repeated)")
+    parser.add_argument("--tie-b", action="append", default=[], metavar="NAME=V",
+                        help="hold an input of the second netlist at 0 or 1, e.g. the 0 / 1 inputs of LUTgen netlists")
+    parser.add_argument("--by-order", action="store_true", help="pair the inputs and outputs by position")
+    parser.add_argument("--exhaustive-limit", type=int, default=EXHAUSTIVE_LIMIT,
+                        help="most inputs simulated exhaustively (default %d)" % EXHAUSTIVE_LIMIT)
+    parser.add_argument("--random", type=int, default=RANDOM_LINES,
+                        help="random lines simulated before the SAT proof (default %d)" % RANDOM_LINES)
+    parser.add_argument("--conflicts", type=int, default=PROOF_CONFLICTS,
+                        help="SAT conflict limit of the proof, 0 for none (default %d)" % PROOF_CONFLICTS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--miter", metavar="FILE", help="also write the miter netlist to this file")
+    args = parser.parse_args(argv)
+
+    report = checkEquivalence(args.benchA, args.benchB, args.tie_a, args.tie_b, args.by_order, args.exhaustive_limit,
+                              args.random, args.conflicts, args.seed, args.miter)
+    if isinstance(report, str):
+        print(report)
+        return 2
+    if report["equivalent"] is None:
+        print("UNDECIDED: the SAT proof ran out of conflicts (%d inputs)" % report["inputs"])
+        return 2
+    if report["equivalent"]:
+        print("EQUIVALENT (%s, %d inputs)" % (report["method"], report["inputs"]))
+        return 0
+    print("NOT EQUIVALENT (%s, %d inputs)" % (report["method"], report["inputs"]))
+    print("counterexample: " + args.benchA + " " + report["lineA"] + ", " + args.benchB + " " + report["lineB"])
+    for nameA, nameB, valueA, valueB in report["outputs"]:
+        print("  output %s = %s, %s = %s" % (nameA, valueA, nameB, valueB))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
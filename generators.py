@@ -0,0 +1,231 @@
+from __future__ import print_function
+import argparse
+import itertools
+import random
+import sys
+import p3sim
+
+# Random circuit and vector generators for scaling tests
+# randomBench writes a valid, levelized .bench netlist of any size; every gate reads at least one line of the level
+# right below it, so the netlist is exactly depth levels deep, and the lines nobody reads become the outputs. The
+# vector generators write input files in the format p3sim reads (one 0/1/U line per test vector).
+#
+# Function List:
+# 1. parseMix: turns "AND=2,OR=1" into a gate type mix
+# 2. randomBench: random netlist with a given input count, gate count, depth, fan-in, fan-out, gate mix and DFFs
+# 3. randomVectors / exhaustiveVectors: vector files for a netlist
+# 4. main: command line entry point
+
+# Default gate type mix (relative weights)
+GATE_MIX = {"AND": 2, "NAND": 2, "OR": 2, "NOR": 2, "XOR": 1, "XNOR": 1, "NOT": 1, "BUFF": 0.5, "MUX": 0.5}
+
+# Gate types with a fixed number of inputs; every other type takes the fanin range
+FIXED_FANIN = {"NOT": 1, "BUFF": 1, "MUX": 3}
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Turns a "TYPE=weight,TYPE=weight" string into a gate type mix dictionary
+def parseMix(text):
+    mix = {}
+    for item in text.split(","):
+        if item.strip() == "":
+            continue
+        logic, equals, weight = item.partition("=")
+        mix[logic.strip().upper()] = float(weight) if equals else 1.0
+    return mix
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Picks a random line out of pool, skipping (and dropping) the lines already read by maxFanout gates
+# Returns None when every line of the pool is full
+def pickLine(rand, pool, fanout, maxFanout):
+    while pool:
+        k = rand.randrange(len(pool))
+        line = pool[k]
+        if maxFanout is None or fanout.get(line, 0) < maxFanout:
+            return line
+        pool[k] = pool[-1]
+        pool.pop()
+    return None
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Writes a random levelized netlist to benchFile
+# numInputs / numGates / depth: size of the netlist (depth is capped at numGates)
+# fanin: [fewest, most] inputs of the AND/OR/XOR type gates and LUTs (NOT/BUFF take 1 and MUX 3)
+# maxFanout: most gates that may read one line (None for no limit); it is only broken when nothing else is left
+# locality: chance that an input (other than the first one, which always comes from the level below) is taken from the
+#           level below rather than from any lower level; high values give short wires and low fan-out per line
+# mix: gate type weights, like GATE_MIX; LUT gates get a random truth table
+# numDffs: DFFs whose outputs feed the netlist like inputs and whose D inputs are random gates
+# Returns [numInputs, numOutputs, numGates + numDffs]
+def randomBench(benchFile, numInputs=32, numGates=1000, depth=20, fanin=(2, 4), maxFanout=None, locality=0.5,
+                mix=None, numDffs=0, seed=1):
+    rand = random.Random(seed)
+    if mix is None:
+        mix = GATE_MIX
+    types = sorted(mix)
+    weights = list(itertools.accumulate([mix[logic] for logic in types]))
+    depth = max(1, min(depth, numGates))
+
+    sources = ["i" + str(i) for i in range(numInputs)] + ["q" + str(i) for i in range(numDffs)]
+    fanout = {}
+    gates = []
+    below = list(sources)
+    previous = list(sources)
+    for level in range(1, depth + 1):
+        count = numGates * level // depth - numGates * (level - 1) // depth
+        levelGates = []
+        nearPool = list(previous)
+        farPool = list(below)
+        for g in range(count):
+            logic = rand.choices(types, cum_weights=weights)[0]
+            numTerms = FIXED_FANIN.get(logic, rand.randint(fanin[0], fanin[1]))
+
+            # The first input comes from the level below, even if every line there is full
+            first = pickLine(rand, nearPool, fanout, maxFanout)
+            terms = [first if first is not None else rand.choice(previous)]
+            for x in range(numTerms - 1):
+                pools = [nearPool, farPool] if rand.random() < locality else [farPool, nearPool]
+                term = pickLine(rand, pools[0], fanout, maxFanout)
+                if term is None:
+                    term = pickLine(rand, pools[1], fanout, maxFanout)
+                terms.append(term if term is not None else rand.choice(below))
+            for term in terms:
+                fanout[term] = fanout.get(term, 0) + 1
+
+            name = "g" + str(len(gates))
+            if logic == "LUT":
+                # A random truth table over the inputs of the gate
+                terms = [hex(rand.getrandbits(1 << numTerms))] + terms
+            gates.append(name + " = " + logic + "(" + ", ".join(terms) + ")")
+            levelGates.append(name)
+        previous = levelGates
+        below.extend(levelGates)
+
+    # DFF D inputs are random gates, so the state feeds back through the netlist
+    gateNames = below[len(sources):]
+    dffs = []
+    for i in range(numDffs):
+        dInput = rand.choice(gateNames) if gateNames else rand.choice(sources)
+        fanout[dInput] = fanout.get(dInput, 0) + 1
+        dffs.append("q" + str(i) + " = DFF(" + dInput + ")")
+
+    outputs = [name for name in gateNames if name not in fanout]
+    if not outputs and gateNames:
+        outputs = [gateNames[-1]]
+
+    outFile = open(benchFile, "w")
+    outFile.write("# random netlist: " + str(numInputs) + " inputs, " + str(numGates) + " gates, depth " + str(depth) +
+                  ", " + str(numDffs) + " DFFs, seed " + str(seed) + "\n")
+    for i in range(numInputs):
+        outFile.write("INPUT(i" + str(i) + ")\n")
+    outFile.write("\n")
+    for name in outputs:
+        outFile.write("OUTPUT(" + name + ")\n")
+    outFile.write("\n")
+    for line in dffs:
+        outFile.write(line + "\n")
+    outFile.write("\n".join(gates) + "\n")
+    outFile.close()
+    return [numInputs, len(outputs), numGates + numDffs]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Writes count random input lines of numInputs bits to vectorFile
+# xRate is the chance of a U bit; with resetEvery > 0 a RESET line goes after every resetEvery lines (for sequential
+# simulation). Lines are written as they are made, so count can be as large as needed.
+def randomVectors(vectorFile, numInputs, count, xRate=0.0, resetEvery=0, seed=1):
+    rand = random.Random(seed)
+    outFile = open(vectorFile, "w")
+    outFile.write("# " + str(count) + " random vectors, " + str(numInputs) + " inputs, seed " + str(seed) + "\n")
+    chunk = []
+    for k in range(count):
+        if xRate > 0:
+            line = "".join(["U" if rand.random() < xRate else rand.choice("01") for x in range(numInputs)])
+        else:
+            line = format(rand.getrandbits(numInputs), "0" + str(numInputs) + "b") if numInputs else ""
+        chunk.append(line)
+        if resetEvery > 0 and (k + 1) % resetEvery == 0 and k + 1 < count:
+            chunk.append("RESET")
+        if len(chunk) >= 4096:
+            outFile.write("\n".join(chunk) + "\n")
+            chunk = []
+    if chunk:
+        outFile.write("\n".join(chunk) + "\n")
+    outFile.close()
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Writes all 2^numInputs input lines of numInputs bits to vectorFile, in counting order
+def exhaustiveVectors(vectorFile, numInputs):
+    outFile = open(vectorFile, "w")
+    outFile.write("# all " + str(2 ** numInputs) + " vectors, " + str(numInputs) + " inputs\n")
+    for start in range(0, 2 ** numInputs, 4096):
+        outFile.write("".join([format(k, "0" + str(numInputs) + "b") + "\n"
+                               for k in range(start, min(start + 4096, 2 ** numInputs))]))
+    outFile.close()
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Command line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Random netlist and vector generators")
+    commands = parser.add_subparsers(dest="command")
+
+    bench = commands.add_parser("bench", help="write a random .bench netlist")
+    bench.add_argument("out", help="netlist file to write")
+    bench.add_argument("--inputs", type=int, default=32)
+    bench.add_argument("--gates", type=int, default=1000)
+    bench.add_argument("--depth", type=int, default=20)
+    bench.add_argument("--fanin", type=int, nargs=2, default=[2, 4], metavar=("FEWEST", "MOST"))
+    bench.add_argument("--max-fanout", type=int, help="most gates reading one line")
+    bench.add_argument("--locality", type=float, default=0.5,
+                       help="chance of taking an input from the level right below (default 0.5)")
+    bench.add_argument("--mix", type=parseMix, help="gate type weights, e.g. AND=2,OR=2,XOR=1,NOT=1")
+    bench.add_argument("--dffs", type=int, default=0, help="number of DFFs")
+    bench.add_argument("--seed", type=int, default=1)
+
+    vectors = commands.add_parser("vectors", help="write a vector file")
+    vectors.add_argument("out", help="vector file to write")
+    vectors.add_argument("--inputs", type=int, help="number of input bits")
+    vectors.add_argument("--bench", help="take the number of input bits from this netlist")
+    vectors.add_argument("--count", type=int, default=1000)
+    vectors.add_argument("--exhaustive", action="store_true", help="write every input combination instead")
+    vectors.add_argument("--x-rate", type=float, default=0.0, help="chance of a U bit")
+    vectors.add_argument("--reset-every", type=int, default=0, help="put a RESET line after every N vectors")
+    vectors.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        # A mix can hold every gate type p3sim knows but DFF, which is placed by --dffs
+        mixTypes = sorted([logic for logic in p3sim.GATE_ARITY if logic != "DFF"])
+        for logic in args.mix or {}:
+            if logic not in mixTypes:
+                bench.error("unknown gate type " + logic + " in --mix, use " + ", ".join(mixTypes) +
+                            " (DFFs are added with --dffs)")
+        size = randomBench(args.out, args.inputs, args.gates, args.depth, args.fanin, args.max_fanout, args.locality,
+                           args.mix, args.dffs, args.seed)
+        print("wrote " + args.out + ": %d inputs, %d outputs, %d gates" % tuple(size))
+        return 0
+
+    if args.command == "vectors":
+        numInputs = args.inputs
+        if args.bench is not None:
+            benchFile = open(args.bench, "r")
+            numInputs = len([line for line in benchFile if line.replace(" ", "")[0:6] == "INPUT("])
+            benchFile.close()
+        if numInputs is None:
+            parser.error("--inputs or --bench is required")
+        if args.exhaustive:
+            exhaustiveVectors(args.out, numInputs)
+        else:
+            randomVectors(args.out, numInputs, args.count, args.x_rate, args.reset_every, args.seed)
+        print("wrote " + args.out)
+        return 0
+
+    parser.print_help()
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
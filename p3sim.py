@@ -1,15 +1,60 @@
 from __future__ import print_function
-import copy
+import argparse
+import collections
+import concurrent.futures
+import csv
+import gc
+import hashlib
+import heapq
+import logging
+import marshal
+import mmap
 import os
-import generators
+import pickle
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from array import array
+
+# NumPy is optional, it is only needed for the "numpy" engine
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# All of the simulator messages go through this logger; cli sets the level (--quiet / --debug)
+logger = logging.getLogger("p3sim")
 # Function List:
 # 0. getFaults: gets the faults from the file
 # 1. genFaultList: generates all of the faults and prints them to a file
+#     buildFaultList: the full fault list itself, without writing it
 # 2. netRead: read the benchmark file and build circuit netlist
+#     netReadFast: the same reading in a single pass over the file, keeping line numbers
+#     validateCircuit: reports every problem of a netlist (with its line number) before it is compiled
+# 2a. compileNet: turn the circuit dictionary into the compiled, levelized netlist (integer wire IDs)
 # 3. gateCalc: function that will work on the logic of each gate
-# 4. inputRead: function that will update the circuit dictionary made in netRead to hold the line values
-# 5. basic_sim: the actual simulation
-# 6. main: The main function
+#     lutTable / lutPacked: truth tables of LUT gates and their packed evaluation
+# 4. inputRead: function that will build the line values of the compiled netlist for one input line
+# 4a. faultSite: turns a fault from getFaults into the line/gate it is injected on
+# 4b. collapseFaults: equivalence (and dominance) fault collapsing with a mapping back to the full list
+# 5. basic_sim: the actual simulation, one pass in topological order
+# 5a. parallelSim / simVectors: bit-parallel simulation of many input lines at once (two-rail 0/1/U encoding)
+#     numpySim: the same simulation level by level on NumPy arrays, for very large vector sets
+# 5b. parallelFaultSim / faultSimVector: fault simulation of one input line with one fault per bit lane
+#     compiledSim: parallelSim / parallelFaultSim through straight-line Python code generated from the netlist
+# 5c. eventFaultSim / faultSimLines: event-driven fault simulation that only follows the changed gates of each fault
+#     resultCacheNew / cachedSimChunk: LRU cache of the good and fault simulation results of input lines
+# 5d. seqState / seqSim / seqFaultSim: cycle-accurate sequential simulation, DFF state carried from line to line
+#     packGroups / unpackGroups: faulty machine states packed into the lanes of seqFaultSim and back
+#     eventSeqFaultSim: event-driven sequential fault simulation that only keeps the faulty states that differ
+# 5e. jobsPool / faultSimJobs: faultSimLines with the fault list sharded across a pool of worker processes
+# 6. main: The main function, asks what to do and for the files, then runs run_fault_sim (or the ATPG of atpg.py)
+# 6a. run_fault_sim / run_batch: non-interactive fault simulation of one job / a manifest of jobs
+#     readVectors / batchLines: the streaming input stages of run_fault_sim
+#     openResults / readResults / resultsToText: compact binary result files, their reader and the text converter
+# 6b. cli: command line entry point
 
 #gets all of the faults from the file
 
@@ -37,32 +82,41 @@ def getFaults(faultFile):
     inFile.close()
     return faults
 
-#generates all of the faults
-def genFaultList(circuit, faultFile, circuitName):
-    numFaults = 0
-    outFile = open(faultFile, "w")
-    
-    outFile.write("# " + circuitName + "\n")
-    outFile.write("# full SSA fault list\n\n")
+#gets the name of a fault the way it is written in the fault list, i.e. X-SA-v or G-IN-X-SA-v
+def faultName(faultLine):
+    return "-".join(faultLine[1])
 
+#builds all of the faults, split into fields the way getFaults splits them
+def buildFaultList(circuit):
+    faults = []
 
     #handles the inputs
     for input in circuit["INPUTS"][1]:
-        outFile.write(input[5:] + "-SA-0\n")
-        outFile.write(input[5:] + "-SA-1\n")
-        numFaults += 2
+        faults.append([input[5:], "SA", "0"])
+        faults.append([input[5:], "SA", "1"])
 
     for wire in circuit["GATES"][1]:
-        outFile.write(wire[5:] + "-SA-0\n")
-        outFile.write(wire[5:] + "-SA-1\n")
-        numFaults += 2
+        faults.append([wire[5:], "SA", "0"])
+        faults.append([wire[5:], "SA", "1"])
 
         for inWire in circuit[wire][1]:
-            outFile.write(wire[5:] + "-IN-" + inWire[5:] + "-SA-0\n")
-            outFile.write(wire[5:] + "-IN-" + inWire[5:] + "-SA-1\n")
-            numFaults += 2
+            faults.append([wire[5:], "IN", inWire[5:], "SA", "0"])
+            faults.append([wire[5:], "IN", inWire[5:], "SA", "1"])
+
+    return faults
 
-    outFile.write("\n# total faults: " + str(numFaults))
+#generates all of the faults and writes them to the fault file
+def genFaultList(circuit, faultFile, circuitName):
+    faults = buildFaultList(circuit)
+    outFile = open(faultFile, "w")
+    
+    outFile.write("# " + circuitName + "\n")
+    outFile.write("# full SSA fault list\n\n")
+
+    for fault in faults:
+        outFile.write("-".join(fault) + "\n")
+
+    outFile.write("\n# total faults: " + str(len(faults)))
     outFile.close()
 
 # -------------------------------------------------------------------------------------------------------------------- #
@@ -85,6 +139,24 @@ def printCkt (circuit):
     print()
 
 
+# -------------------------------------------------------------------------------------------------------------------- #
+# LUT gates
+# z = LUT(table, i0, i1, ..., in-1) is a lookup table over its n inputs: table is an integer (hex like 0x8 or decimal)
+# whose bit r is the output for the row r = i0 + 2 * i1 + 4 * i2 + ..., so i0 is the least significant select bit.
+# The circuit dictionary keeps the table as a fifth item of the gate, [logic, terms, False, 'U', table], and the
+# compiled netlist in TABLES[id]. A U on an input makes the output U only if the rows it could select disagree.
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Reads the truth table term of a LUT gate, returns the integer or None if it is not a number
+def lutTable(term):
+    try:
+        table = int(term, 0)
+    except ValueError:
+        return None
+    return table if table >= 0 else None
+
+
 # -------------------------------------------------------------------------------------------------------------------- #
 # FUNCTION: Reading in the Circuit gate-level netlist file:
 def netRead(netName):
@@ -137,7 +209,7 @@ def netRead(netName):
             # Error detection: line being made already exists
             if line in circuit:
                 msg = "NETLIST ERROR: INPUT LINE \"" + line + "\" ALREADY EXISTS PREVIOUSLY IN NETLIST"
-                print(msg + "\n")
+                logger.error(msg)
                 return msg
 
             # Appending to the inputs array and update the inputBits
@@ -170,7 +242,7 @@ def netRead(netName):
         # Error detection: line being made already exists
         if gateOut in circuit:
             msg = "NETLIST ERROR: GATE OUTPUT LINE \"" + gateOut + "\" ALREADY EXISTS PREVIOUSLY IN NETLIST"
-            print(msg+"\n")
+            logger.error(msg)
             return msg
 
         # Appending the dest name to the gate list
@@ -182,6 +254,17 @@ def netRead(netName):
 
         lineSpliced[1] = lineSpliced[1].replace(")", "")
         terms = lineSpliced[1].split(",")  # Splicing the the line again at each comma to the get the gate terminals
+
+        # LUT(table,a,b,...): the first term is the truth table, not a line
+        if logic == "LUT":
+            table = lutTable(terms[0])
+            if table is None:
+                msg = "NETLIST ERROR: LUT TABLE \"" + terms[0] + "\" OF LINE \"" + gateOut + "\" IS NOT A NUMBER"
+                logger.error(msg)
+                return msg
+            circuit[gateOut] = [logic, ["wire_" + x for x in terms[1:]], False, 'U', table]
+            continue
+
         # Turning each term into an integer before putting it into the circuit dictionary
         terms = ["wire_" + x for x in terms]
 
@@ -211,698 +294,3110 @@ def netRead(netName):
 
 
 # -------------------------------------------------------------------------------------------------------------------- #
-# FUNCTION: calculates the output value for each logic gate
-def gateCalc(circuit, node, memory):
-    
-    # terminal will contain all the input wires of this logic gate (node)
-    terminals = list(circuit[node][1])  
-
-
-    # If the node is an Buffer gate output, solve and return the output
-    if circuit[node][0] == "BUFF":
-        if circuit[terminals[0]][3] == '0':
-            circuit[node][3] = '0'
-        elif circuit[terminals[0]][3] == '1':
-            circuit[node][3] = '1'
-        elif circuit[terminals[0]][3] == "U":
-            circuit[node][3] = "U"
-        else:  # Should not be able to come here
-            return -1
-        return [circuit, memory];
-
-
-
-    # If the node is an Inverter gate output, solve and return the output
-    if circuit[node][0] == "NOT":
-        if circuit[terminals[0]][3] == '0':
-            circuit[node][3] = '1'
-        elif circuit[terminals[0]][3] == '1':
-            circuit[node][3] = '0'
-        elif circuit[terminals[0]][3] == "U":
-            circuit[node][3] = "U"
-        else:  # Should not be able to come here
-            return -1
-        return [circuit, memory];
-
-
-    elif circuit[node][0] == "DFF":
-        circuit[node][3]=memory[node]
-        #print("memory node: " + str(memory[node]))
-        unknownTerm = False  # This will become True if at least one unknown terminal is found
-        print("dff terminals: " + str(terminals))
-        print("circuit terminals: " + str(circuit[terminals[0]][3]))
-
-        for term in terminals:  
-            if circuit[term][3] == '0':
-                circuit[node][3] = '0'
-            elif circuit[term][3] =='1':
-                circuit[node][3]='1'
-                break
-            if circuit[term][3] == "U":
-                unknownTerm = True
-
-        if unknownTerm:
-            if circuit[node][3] == '1':
-                circuit[node][3] = '1'
-            elif circuit[node][3] == '0': 
-                circuit[node][3] = '0'
-        print("final node: " + str(circuit[node][3]))
-
-        return [circuit, memory];
-
-        # for term in terminals:  
-        #     if circuit[term][3] == '0':
-        #         circuit[node][3] = '0'
-        #         memory[node]='0'
-
-        #     elif circuit[term][3] == '1':
-        #         circuit[node][3]='1'
-        #         memory[node]='1'
-
-
-        # if circuit[terminals[0]][3] == '0':
-        #     circuit[node][3] = '0'
-        #     memory[node]='0'
-        # elif circuit[terminals[0]][3] == '1':
-        #     circuit[node][3] = '1'
-        #     memory[node]='1'
-        # elif circuit[terminals[0]][3] == "U":
-        #     circuit[node][3] = "U"
-        #     memory[node]="U"
-        # else:  # Should not be able to come here
-        #     return -1
-        return [circuit, memory];
-
-
-      #TV input
-      #C
-      #B
-      #A
-     #MUX(A,B,C) -> MUX(A B SEL)
-
-     #If SEL=0, OUT=A
-     #IF SEL=1, OUT=B
-    elif circuit[node][0] == "MUX":
-
-        if circuit[terminals[2]][3] == '0': #sel bit
-            circuit[node][3] = circuit[terminals[0]][3]
-        elif circuit[terminals[2]][3] == '1':
-            circuit[node][3] = circuit[terminals[1]][3]
-        elif circuit[terminals[2]][3] == "U":
-            circuit[node][3] = "U"
-        else:  # Should not be able to come here
-            return -1
-
-        return [circuit, memory];  
-
-
-    # If the node is an AND gate output, solve and return the output
-    elif circuit[node][0] == "AND":
-
-        # Initialize the output to 1
-        circuit[node][3] = '1'
-
-        # Initialize also a flag that detects a U to false
-        unknownTerm = False  # This will become True if at least one unknown terminal is found
-
-        # if there is a 0 at any input terminal, AND output is 0. If there is an unknown terminal, mark the flag
-        # Otherwise, keep it at 1
-        for term in terminals:  
-            if circuit[term][3] == '0':
-                circuit[node][3] = '0'
-                break
-            if circuit[term][3] == "U":
-                unknownTerm = True
-
-        if unknownTerm:
-            if circuit[node][3] == '1':
-                circuit[node][3] = "U"
-        return [circuit, memory];
-
-    # If the node is a NAND gate output, solve and return the output
-    elif circuit[node][0] == "NAND":
-        # Initialize the output to 0
-        circuit[node][3] = '0'
-        # Initialize also a variable that detects a U to false
-        unknownTerm = False  # This will become True if at least one unknown terminal is found
-
-        # if there is a 0 terminal, NAND changes the output to 1. If there is an unknown terminal, it
-        # changes to "U" Otherwise, keep it at 0
-        for term in terminals:
-            if circuit[term][3] == '0':
-                circuit[node][3] = '1'
-                break
-            if circuit[term][3] == "U":
-                unknownTerm = True
-                break
+# Fast bench file reading
+# netReadFast builds the same circuit dictionary as netRead in a single pass: the file is read at once, the spaces are
+# removed from all of it with one replace, and every line is cut up with partition instead of a string replace per
+# token. It also keeps the file line number of every definition, and instead of stopping at the first bad or duplicate
+# line it notes the problem and goes on, so validateCircuit can report everything that is wrong at once:
+#   circuit["LINE_NUMBERS"] = ["Line numbers", {wire: line number of its INPUT or gate definition}]
+#   circuit["OUTPUT_LINES"] = ["Output line numbers", [line number of every OUTPUT, same order as OUTPUTS]]
+#   circuit["PROBLEMS"]     = ["Problems", [[line number, message] for every line that could not be read]]
 
-        if unknownTerm:
-            if circuit[node][3] == '0':
-                circuit[node][3] = "U"
-        return [circuit, memory];
 
-    # If the node is an OR gate output, solve and return the output
-    elif circuit[node][0] == "OR":
-        # Initialize the output to 0
-        circuit[node][3] = '0'
-        # Initialize also a variable that detects a U to false
-        unknownTerm = False  # This will become True if at least one unknown terminal is found
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Reads a benchmark file like netRead does, returns [circuit, inputCounter]
+def netReadFast(netName):
+    netFile = open(netName, "r")
+    raw = netFile.read()
+    netFile.close()
+    text = raw.replace(" ", "").replace("\t", "").replace("\r", "")
 
-        # if there is a 1 terminal, OR changes the output to 1. Otherwise, keep it at 0
-        for term in terminals:
-            if circuit[term][3] == '1':
-                circuit[node][3] = '1'
-                break
-            if circuit[term][3] == "U":
-                unknownTerm = True
+    inputs = []
+    outputs = []
+    gates = []
+    circuit = {}
+    wires = {}          # one "wire_" string per line name, shared by every gate that uses it
+    lineNumbers = {}
+    outputLines = []
+    problems = []
+    lineNumber = 0
+    for line in text.split("\n"):
+        lineNumber += 1
+        # Empty lines and comments
+        if line == "" or line[0] == "#":
+            continue
+
+        # INPUT(x) / OUTPUT(y)
+        kind, bracket, name = line.partition("(")
+        if kind == "INPUT" or kind == "OUTPUT":
+            if name[-1:] != ")" or name == ")" or "(" in name or ")" in name[:-1]:
+                problems.append([lineNumber, "UNRECOGNIZED LINE \"" + raw.split("\n")[lineNumber - 1].strip() + "\""])
+                continue
+            name = name[:-1]
+            if name not in wires:
+                wires[name] = "wire_" + name
+            if kind == "OUTPUT":
+                outputs.append(wires[name])
+                outputLines.append(lineNumber)
+                continue
+            if wires[name] in circuit:
+                problems.append([lineNumber, "INPUT LINE \"" + wires[name] + "\" ALREADY EXISTS PREVIOUSLY IN NETLIST "
+                                 "(line " + str(lineNumbers[wires[name]]) + ")"])
+                continue
+            inputs.append(wires[name])
+            circuit[wires[name]] = ["INPUT", wires[name], False, 'U']
+            lineNumbers[wires[name]] = lineNumber
+            continue
+
+        # z=LOGIC(a,b,c,...)
+        gateOut, equals, gate = line.partition("=")
+        logic, bracket, terms = gate.partition("(")
+        if gateOut == "" or equals == "" or bracket == "" or terms[-1:] != ")" or "=" in gate or "(" in terms or \
+                ")" in terms[:-1]:
+            problems.append([lineNumber, "UNRECOGNIZED LINE \"" + raw.split("\n")[lineNumber - 1].strip() + "\""])
+            continue
+        if gateOut not in wires:
+            wires[gateOut] = "wire_" + gateOut
+        gateOut = wires[gateOut]
+        if gateOut in circuit:
+            problems.append([lineNumber, "GATE OUTPUT LINE \"" + gateOut + "\" ALREADY EXISTS PREVIOUSLY IN NETLIST "
+                             "(line " + str(lineNumbers[gateOut]) + ")"])
+            continue
+        gates.append(gateOut)
+        lineNumbers[gateOut] = lineNumber
+
+        terms = terms[:-1].split(",") if terms != ")" else []
+        logic = logic.upper()
+        table = None
+        if logic == "LUT":
+            # LUT(table,a,b,...): the first term is the truth table, not a line
+            table = lutTable(terms[0]) if terms else None
+            if table is None:
+                problems.append([lineNumber, "LUT TABLE \"" + (terms[0] if terms else "") + "\" OF LINE \"" +
+                                 gateOut + "\" IS NOT A NUMBER"])
+                table = 0
+            terms = terms[1:]
+        for x in terms:
+            if x not in wires:
+                wires[x] = "wire_" + x
+        circuit[gateOut] = [logic, [wires[x] for x in terms], False, 'U']
+        if table is not None:
+            circuit[gateOut].append(table)
+
+    circuit["INPUT_WIDTH"] = ["input width:", len(inputs)]
+    circuit["INPUTS"] = ["Input list", inputs]
+    circuit["OUTPUTS"] = ["Output list", outputs]
+    circuit["GATES"] = ["Gate list", gates]
+    circuit["LINE_NUMBERS"] = ["Line numbers", lineNumbers]
+    circuit["OUTPUT_LINES"] = ["Output line numbers", outputLines]
+    circuit["PROBLEMS"] = ["Problems", problems]
+    return [circuit, len(inputs)]
 
-        if unknownTerm:
-            if circuit[node][3] == '0':
-                circuit[node][3] = "U"
-        return [circuit, memory];
 
+# -------------------------------------------------------------------------------------------------------------------- #
+# Netlist validation
+# validateCircuit checks a circuit dictionary in one linear pass before anything is compiled or simulated, and reports
+# every problem with the line number it comes from: the lines netReadFast could not read, duplicate definitions,
+# unknown gate types, gates with the wrong number of inputs, LUT tables with more rows than their inputs can select,
+# lines used but never defined, outputs never driven and combinational loops (DFF outputs break loops, like in
+# compileNet).
+GATE_ARITY = {"BUFF": [1, 1], "NOT": [1, 1], "DFF": [1, 1], "MUX": [3, 3], "AND": [1, None], "NAND": [1, None],
+              "OR": [1, None], "NOR": [1, None], "XOR": [1, None], "XNOR": [1, None], "LUT": [1, None]}
 
 
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Finds the combinational loops among the gates left over by levelizing (iterative Tarjan SCC)
+# fanins[wire] holds the left over gates wire reads; returns one list of wires for every loop
+def findLoops(stuck, fanins):
+    index = {}
+    low = {}
+    onStack = set()
+    stack = []
+    loops = []
+    for root in stuck:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        onStack.add(root)
+        work = [[root, 0]]
+        while work:
+            node, i = work[-1]
+            if i < len(fanins[node]):
+                work[-1][1] += 1
+                term = fanins[node][i]
+                if term not in index:
+                    index[term] = low[term] = len(index)
+                    stack.append(term)
+                    onStack.add(term)
+                    work.append([term, 0])
+                elif term in onStack:
+                    low[node] = min(low[node], index[term])
+                continue
+
+            # Every input of node is done: pass its low link up, and pop its loop if node is the root of one
+            work.pop()
+            if work:
+                low[work[-1][0]] = min(low[work[-1][0]], low[node])
+            if low[node] == index[node]:
+                loop = []
+                while True:
+                    wire = stack.pop()
+                    onStack.discard(wire)
+                    loop.append(wire)
+                    if wire == node:
+                        break
+                if len(loop) > 1 or node in fanins[node]:
+                    loops.append(loop)
+    return loops
 
-    # If the node is an NOR gate output, solve and return the output
-    if circuit[node][0] == "NOR":
-        # Initialize the output to 1
-        circuit[node][3] = '1'
-        # Initialize also a variable that detects a U to false
-        unknownTerm = False  # This will become True if at least one unknown terminal is found
 
-        # if there is a 1 terminal, NOR changes the output to 0. Otherwise, keep it at 1
-        for term in terminals:
-            if circuit[term][3] == '1':
-                circuit[node][3] = '0'
-                break
-            if circuit[term][3] == "U":
-                unknownTerm = True
-        if unknownTerm:
-            if circuit[node][3] == '1':
-                circuit[node][3] = "U"
-        return [circuit, memory];
-
-    # If the node is an XOR gate output, solve and return the output
-    if circuit[node][0] == "XOR":
-        # Initialize a variable to zero, to count how many 1's in the terms
-        count = 0
-
-        # if there are an odd number of terminals, XOR outputs 1. Otherwise, it should output 0
-        for term in terminals:
-            if circuit[term][3] == '1':
-                count += 1  # For each 1 bit, add one count
-            if circuit[term][3] == "U":
-                circuit[node][3] = "U"
-                return [circuit, memory];
-
-        # check how many 1's we counted
-        if count % 2 == 1:  # if more than one 1, we know it's going to be 0.
-            circuit[node][3] = '1'
-        else:  # Otherwise, the output is equal to how many 1's there are
-            circuit[node][3] = '0'
-        return [circuit, memory];
-
-    # If the node is an XNOR gate output, solve and return the output
-    elif circuit[node][0] == "XNOR":
-        # Initialize a variable to zero, to count how many 1's in the terms
-        count = 0
-
-        # if there is a single 1 terminal, XNOR outputs 0. Otherwise, it outputs 1
-        for term in terminals:
-            if circuit[term][3] == '1':
-                count += 1  # For each 1 bit, add one count
-            if circuit[term][3] == "U":
-                circuit[node][3] = "U"
-                return [circuit, memory];
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Checks a circuit dictionary from netReadFast (or netRead, without line numbers)
+# Returns the list of problem messages ("NETLIST ERROR (line n): ..."), in line order; empty if the netlist is fine
+def validateCircuit(circuit):
+    lineNumbers = circuit.get("LINE_NUMBERS", ["", {}])[1]
+    problems = list(circuit.get("PROBLEMS", ["", []])[1])
+
+    # Gate types, input counts and undefined lines, one gate at a time
+    for wire in circuit["GATES"][1]:
+        logic, terms = circuit[wire][0:2]
+        lineNumber = lineNumbers.get(wire, 0)
+        if logic not in GATE_ARITY:
+            problems.append([lineNumber, "UNKNOWN GATE TYPE \"" + logic + "\" DRIVING LINE \"" + wire + "\""])
+        else:
+            fewest, most = GATE_ARITY[logic]
+            if len(terms) < fewest or (most is not None and len(terms) > most):
+                needs = str(fewest) if fewest == most else "AT LEAST " + str(fewest)
+                problems.append([lineNumber, logic + " GATE DRIVING LINE \"" + wire + "\" NEEDS " + needs +
+                                 " INPUT" + ("S" if most != 1 else "") + ", IT HAS " + str(len(terms))])
+            elif logic == "LUT" and circuit[wire][4] >> (1 << len(terms)) != 0:
+                problems.append([lineNumber, "LUT TABLE OF LINE \"" + wire + "\" HAS MORE THAN " +
+                                 str(1 << len(terms)) + " ROWS FOR " + str(len(terms)) + " INPUTS"])
+        for term in terms:
+            if term == "wire_":
+                problems.append([lineNumber, "EMPTY INPUT NAME IN THE GATE DRIVING LINE \"" + wire + "\""])
+            elif term not in circuit:
+                problems.append([lineNumber, "LINE \"" + term + "\" USED BY \"" + wire + "\" IS NEVER DEFINED"])
+
+    outputLines = circuit.get("OUTPUT_LINES", ["", [0] * len(circuit["OUTPUTS"][1])])[1]
+    for i in range(len(circuit["OUTPUTS"][1])):
+        if circuit["OUTPUTS"][1][i] not in circuit:
+            problems.append([outputLines[i], "OUTPUT LINE \"" + circuit["OUTPUTS"][1][i] + "\" IS NEVER DEFINED"])
+
+    # Levelizing like compileNet does; the gates that never become ready sit on or behind a loop
+    waiting = {}
+    fanouts = {}
+    ready = list(circuit["INPUTS"][1])
+    for wire in circuit["GATES"][1]:
+        if circuit[wire][0] == "DFF":
+            ready.append(wire)
+            continue
+        terms = [term for term in circuit[wire][1] if term in circuit]
+        waiting[wire] = len(terms)
+        for term in terms:
+            fanouts.setdefault(term, []).append(wire)
+        if len(terms) == 0:
+            ready.append(wire)
+    done = 0
+    while done < len(ready):
+        for gate in fanouts.get(ready[done], []):
+            waiting[gate] -= 1
+            if waiting[gate] == 0:
+                ready.append(gate)
+        done += 1
+
+    stuck = [wire for wire in circuit["GATES"][1] if waiting.get(wire, 0) > 0]
+    if stuck:
+        stuckSet = set(stuck)
+        fanins = dict((wire, [term for term in circuit[wire][1] if term in stuckSet]) for wire in stuck)
+        for loop in findLoops(stuck, fanins):
+            loop.sort(key=lambda wire: lineNumbers.get(wire, 0))
+            problems.append([lineNumbers.get(loop[0], 0), "COMBINATIONAL LOOP THROUGH LINES " + ", ".join(
+                ["\"" + wire + "\" (line " + str(lineNumbers.get(wire, "?")) + ")" for wire in loop])])
+
+    problems.sort(key=lambda problem: problem[0])
+    return ["NETLIST ERROR (line " + (str(lineNumber) if lineNumber else "?") + "): " + message
+            for lineNumber, message in problems]
+
+
+# Gate type codes used by the compiled netlist; the index in GATE_TYPES is the code stored per wire
+GATE_TYPES = ["INPUT", "BUFF", "NOT", "AND", "NAND", "OR", "NOR", "XOR", "XNOR", "MUX", "DFF", "LUT"]
+GATE_CODES = dict((name, code) for code, name in enumerate(GATE_TYPES))
+INPUT_CODE = GATE_CODES["INPUT"]
+BUFF_CODE = GATE_CODES["BUFF"]
+NOT_CODE = GATE_CODES["NOT"]
+AND_CODE = GATE_CODES["AND"]
+NAND_CODE = GATE_CODES["NAND"]
+OR_CODE = GATE_CODES["OR"]
+NOR_CODE = GATE_CODES["NOR"]
+XOR_CODE = GATE_CODES["XOR"]
+XNOR_CODE = GATE_CODES["XNOR"]
+MUX_CODE = GATE_CODES["MUX"]
+DFF_CODE = GATE_CODES["DFF"]
+LUT_CODE = GATE_CODES["LUT"]
+
+# Inverting a line value
+INVERT = {'0': '1', '1': '0', "U": "U"}
+
 
-        # check how many 1's we counted
-        if count % 2 == 1:  # if more than one 1, we know it's going to be 0.
-            circuit[node][3] = '1'
-        else:  # Otherwise, the output is equal to how many 1's there are
-            circuit[node][3] = '0'
-        return [circuit, memory];
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Compiles the circuit dictionary built by netRead into a levelized netlist:
+# every wire is interned to an integer ID (inputs first, then gates in the order they were defined), and the
+# gates are stored in flat arrays instead of "wire_" keyed lists:
+#   NAMES[id]        = wire name without the "wire_" prefix, IDS[name] = id
+#   TYPES[id]        = gate type code (see GATE_TYPES)
+#   FANIN[FANIN_START[id]:FANIN_START[id + 1]] = input wire IDs of the gate driving wire id
+#   FANOUT[id]       = list of gate IDs that read wire id
+#   TABLES[id]       = truth table of every LUT gate (see lutTable)
+#   LEVELS[id]       = topological level (inputs and DFF outputs are level 0)
+#   ORDER            = combinational gate IDs sorted by level, i.e. a valid evaluation order
+#   HASH             = hash of the gates and their connections (the key of the generated simulation code)
+# DFF outputs are treated like inputs when levelizing, so only combinational loops are errors.
+# Returns the compiled netlist dictionary, or an error message string like netRead does.
+def compileNet(circuit):
+    names = []
+    ids = {}
+
+    # Interning the wires: inputs first, then every gate output
+    for wire in circuit["INPUTS"][1] + circuit["GATES"][1]:
+        ids[wire[5:]] = len(names)
+        names.append(wire[5:])
+    numWires = len(names)
+
+    types = array("B", [INPUT_CODE]) * numWires
+    faninStart = array("l", [0]) * (numWires + 1)
+    fanin = array("l")
+    fanout = [[] for x in range(numWires)]
+    tables = {}
+
+    # Filling in the gate arrays; inputs have an empty fan-in range
+    for wire in circuit["GATES"][1]:
+        node = ids[wire[5:]]
+        logic = circuit[wire][0]
+        if logic not in GATE_CODES or logic == "INPUT":
+            msg = "NETLIST ERROR: UNKNOWN GATE TYPE \"" + logic + "\" DRIVING LINE \"" + wire + "\""
+            logger.error(msg)
+            return msg
+        types[node] = GATE_CODES[logic]
+        if logic == "LUT":
+            tables[node] = circuit[wire][4]
+
+    for node in range(numWires):
+        faninStart[node] = len(fanin)
+        if types[node] == INPUT_CODE:
+            continue
+        for term in circuit["wire_" + names[node]][1]:
+            if term[5:] not in ids:
+                msg = "NETLIST ERROR: LINE \"" + term + "\" USED BY \"wire_" + names[node] + "\" IS NEVER DEFINED"
+                logger.error(msg)
+                return msg
+            fanin.append(ids[term[5:]])
+            fanout[ids[term[5:]]].append(node)
+    faninStart[numWires] = len(fanin)
+
+    outputs = array("l")
+    for wire in circuit["OUTPUTS"][1]:
+        if wire[5:] not in ids:
+            msg = "NETLIST ERROR: OUTPUT LINE \"" + wire + "\" IS NEVER DEFINED"
+            logger.error(msg)
+            return msg
+        outputs.append(ids[wire[5:]])
+
+    # Levelizing (Kahn's algorithm): count the unresolved fan-ins of every combinational gate,
+    # inputs and DFF outputs are ready from the start
+    levels = array("l", [0]) * numWires
+    waiting = array("l", [0]) * numWires
+    ready = []
+    for node in range(numWires):
+        if types[node] == INPUT_CODE or types[node] == DFF_CODE:
+            ready.append(node)
+        else:
+            waiting[node] = faninStart[node + 1] - faninStart[node]
+
+    done = 0
+    while done < len(ready):
+        node = ready[done]
+        done += 1
+        for gate in fanout[node]:
+            if types[gate] == DFF_CODE:
+                continue
+            if levels[gate] < levels[node] + 1:
+                levels[gate] = levels[node] + 1
+            waiting[gate] -= 1
+            if waiting[gate] == 0:
+                ready.append(gate)
+
+    # Anything never made ready sits on (or behind) a combinational loop
+    if done < numWires:
+        stuck = [names[node] for node in range(numWires) if waiting[node] > 0]
+        msg = "NETLIST ERROR: COMBINATIONAL LOOP THROUGH LINES \"" + "\", \"".join(stuck) + "\""
+        logger.error(msg)
+        return msg
+
+    # Bucketing the gates by level gives the evaluation order
+    depth = max(levels) if numWires else 0
+    buckets = [[] for x in range(depth + 1)]
+    for node in range(numWires):
+        if types[node] != INPUT_CODE and types[node] != DFF_CODE:
+            buckets[levels[node]].append(node)
+    order = array("l")
+    for bucket in buckets:
+        order.extend(bucket)
+
+    net = {}
+    net["NAMES"] = names
+    net["IDS"] = ids
+    net["TYPES"] = types
+    net["TABLES"] = tables
+    net["FANIN_START"] = faninStart
+    net["FANIN"] = fanin
+    net["FANOUT"] = fanout
+    net["LEVELS"] = levels
+    net["DEPTH"] = depth
+    net["ORDER"] = order
+    net["INPUTS"] = array("l", [ids[wire[5:]] for wire in circuit["INPUTS"][1]])
+    net["OUTPUTS"] = outputs
+    net["GATES"] = array("l", [ids[wire[5:]] for wire in circuit["GATES"][1]])
+    net["DFFS"] = array("l", [node for node in net["GATES"] if types[node] == DFF_CODE])
+    net["OUTPUT_SET"] = set(outputs)
+    net["INPUT_WIDTH"] = len(net["INPUTS"])
+    net["HASH"] = hashlib.sha1(repr([list(net["INPUTS"]), list(outputs), list(types), list(faninStart),
+                                     list(fanin), list(order), list(net["DFFS"]),
+                                     sorted(tables.items())]).encode()).hexdigest()
+    return net
 
-    # Error detection... should not be able to get at this point
-    return [circuit[node][0], memory];
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: calculates the output value for each logic gate
+# values is the list of line values ('0', '1' or 'U') indexed by wire ID; returns the gate's output value
+def gateCalc(net, node, values):
+    logic = net["TYPES"][node]
+
+    # terminals will contain the values of all the input wires of this logic gate (node)
+    fanin = net["FANIN"]
+    terminals = [values[term] for term in fanin[net["FANIN_START"][node]:net["FANIN_START"][node + 1]]]
+
+    # AND: any 0 gives 0, otherwise any U gives U, otherwise 1 (NAND is the inverse)
+    if logic == AND_CODE or logic == NAND_CODE:
+        if '0' in terminals:
+            out = '0'
+        elif "U" in terminals:
+            out = "U"
+        else:
+            out = '1'
+        if logic == NAND_CODE:
+            out = INVERT[out]
+        return out
+
+    # OR: any 1 gives 1, otherwise any U gives U, otherwise 0 (NOR is the inverse)
+    if logic == OR_CODE or logic == NOR_CODE:
+        if '1' in terminals:
+            out = '1'
+        elif "U" in terminals:
+            out = "U"
+        else:
+            out = '0'
+        if logic == NOR_CODE:
+            out = INVERT[out]
+        return out
+
+    # Buffer and Inverter
+    if logic == BUFF_CODE:
+        return terminals[0]
+    if logic == NOT_CODE:
+        return INVERT[terminals[0]]
+
+    # XOR: any U gives U, otherwise an odd number of 1's gives 1 (XNOR is the inverse)
+    if logic == XOR_CODE or logic == XNOR_CODE:
+        if "U" in terminals:
+            return "U"
+        out = '1' if terminals.count('1') % 2 == 1 else '0'
+        if logic == XNOR_CODE:
+            out = INVERT[out]
+        return out
+
+    # MUX(A,B,SEL): If SEL=0, OUT=A; If SEL=1, OUT=B; unknown select gives U
+    if logic == MUX_CODE:
+        if terminals[2] == '0':
+            return terminals[0]
+        if terminals[2] == '1':
+            return terminals[1]
+        return "U"
+
+    # LUT: the table bit of the row the inputs select; with U inputs, every row they could select has to agree
+    if logic == LUT_CODE:
+        rows = [0]
+        for i in range(len(terminals)):
+            if terminals[i] == '1':
+                rows = [row | (1 << i) for row in rows]
+            elif terminals[i] == "U":
+                rows = rows + [row | (1 << i) for row in rows]
+        table = net["TABLES"][node]
+        bits = set([(table >> row) & 1 for row in rows])
+        if len(bits) == 2:
+            return "U"
+        return '1' if 1 in bits else '0'
+
+    # Error detection... compileNet only lets known gate types through
+    return -1
 
 
 # -------------------------------------------------------------------------------------------------------------------- #
-# FUNCTION: Updating the circuit dictionary with the input line, and also resetting the gates and output lines
-def inputRead(circuit, line):
+# FUNCTION: Builds the list of line values for one input line; every non-input line starts as U
+def inputRead(net, line):
     # Checking if input bits are enough for the circuit
-    if len(line) < circuit["INPUT_WIDTH"][1]:
+    if len(line) < net["INPUT_WIDTH"]:
         return -1
 
     # Getting the proper number of bits:
-    line = line[(len(line) - circuit["INPUT_WIDTH"][1]):(len(line))]
+    line = line[(len(line) - net["INPUT_WIDTH"]):(len(line))]
+
+    values = ["U"] * len(net["NAMES"])
 
-    # Adding the inputs to the dictionary
     # Since the for loop will start at the most significant bit, we start at input width N
-    i = circuit["INPUT_WIDTH"][1] - 1
-    inputs = list(circuit["INPUTS"][1])
-    # dictionary item: [(bool) If accessed, (int) the value of each line, (int) layer number, (str) origin of U value]
+    i = net["INPUT_WIDTH"] - 1
+    inputs = net["INPUTS"]
     for bitVal in line:
         bitVal = bitVal.upper() # in the case user input lower-case u
-        circuit[inputs[i]][3] = bitVal # put the bit value as the line value
-        circuit[inputs[i]][2] = True  # and make it so that this line is accessed
 
         # In case the input has an invalid character (i.e. not "0", "1" or "U"), return an error flag
         if bitVal != "0" and bitVal != "1" and bitVal != "U":
             return -2
+        values[inputs[i]] = bitVal # put the bit value as the line value
         i -= 1 # continuing the increments
 
-    return circuit
+    return values
+
 
 # -------------------------------------------------------------------------------------------------------------------- #
-# FUNCTION: the actual simulation #
-def basic_sim(circuit, memory):
-    # QUEUE and DEQUEUE
-    # Creating a queue, using a list, containing all of the gates in the circuit
-    queue = list(circuit["GATES"][1])
-    #memory={}
-    # neighbors=list(circuit[queue[0]][1])
-    # print("neighbors: " +  str(circuit[queue[0]][1]))
-
-    i = 1
-    ct=0
-    i2=0
-    while (i2 <5):
-        i2=i2+1
-        while True:
-            i -= 1
-            # If there's no more things in queue, done
-            if len(queue) == 0:
-                break
+# FUNCTION: Turns a fault line from getFaults into [site, gate, value] on the compiled netlist:
+#   X-SA-v      -> [X, -1, v]  (stem fault, the whole line X is stuck)
+#   G-IN-X-SA-v -> [X, G, v]   (branch fault, only gate G sees X stuck)
+# Returns None if the fault names a line (or gate input) that is not in the netlist, since it can never be detected
+def faultSite(net, faultLine):
+    ids = net["IDS"]
+    if faultLine[1][1] == "SA":
+        if faultLine[1][0] not in ids:
+            return None
+        return [ids[faultLine[1][0]], -1, faultLine[1][2]]
+
+    if faultLine[1][1] == "IN":
+        if faultLine[1][0] not in ids or faultLine[1][2] not in ids:
+            return None
+        gate = ids[faultLine[1][0]]
+        site = ids[faultLine[1][2]]
+        if site not in net["FANIN"][net["FANIN_START"][gate]:net["FANIN_START"][gate + 1]]:
+            return None
+        return [site, gate, faultLine[1][4]]
+    return None
 
-            # Remove the first element of the queue and assign it to a variable for us to use
-            curr = queue[0]
-            queue.remove(curr)
-            neighbors=list(circuit[curr][1]) #inputs needed to calculate gate output
-
-            # initialize a flag, used to check if every terminal has been accessed
-            term_has_value = True
-
-            if(str(circuit[curr][0]) == "DFF"):
-                    if curr not in memory:
-                        print("memory: " + str(memory)+ " \ncurr: " + str(curr))
-                        memory[curr]='U'
-
-            # Check if the terminals have been accessed
-            for term in circuit[curr][1]:
-                
-
-                #check if the inputs needed to calculate gate output have been calculated themselves
-                if(str(circuit[curr][0]) == "DFF"):
-                    dL=list(set(neighbors)-set(queue))
-                    print("dLbasic_sim: "+ str(dL))
-                    if dL: #if the inputs needed to calculate the gate havent been calulated yet, skip
-                        continue
-
-                if not circuit[term][2]:
-                    if(str(circuit[curr][0]) == "DFF"):
-                        dL=list(set(neighbors)-set(queue))
-                        print("dLbasic_sim: "+ str(dL))
-                        if dL: #if the inputs needed to calculate the gate havent been calulated yet, skip
-                            term_has_value = False
-                            continue
-
-                    else:
-                        term_has_value = False
-                        break
 
-            if term_has_value:
-                
-                #checks to make sure the gate output has not already been set
-                if(circuit[curr][2] == False):
-                    circuitIM = gateCalc(circuit, curr, memory)
-                    circuit=circuitIM[0]
-                    memory=circuitIM[1]
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Gets the output string for the simulated line values (last OUTPUT first, same as the result file)
+def outputString(net, values):
+    return "".join([values[y] for y in reversed(net["OUTPUTS"])])
 
 
-                circuit[curr][2] = True
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: the actual simulation #
+# One pass over the gates in the topological order compileNet made, so every gate is evaluated exactly once after
+# all of its inputs. DFF outputs read their present state from memory (U if never set), and after the pass memory
+# holds the next state latched from the DFF inputs.
+# fault is an optional [site, gate, value] from faultSite that is injected while simulating.
+def basic_sim(net, values, memory, fault=None):
+    types = net["TYPES"]
+    fanin = net["FANIN"]
+    faninStart = net["FANIN_START"]
+
+    stem = -1
+    gate = -1
+    if fault is not None:
+        site, gate, faultVal = fault
+        if gate == -1:
+            stem = site
+
+    # DFF outputs come from the present state
+    for node in net["DFFS"]:
+        values[node] = memory.get(node, "U")
+
+    # A stuck input or DFF line is never evaluated, so set it before the pass
+    if stem != -1 and (types[stem] == INPUT_CODE or types[stem] == DFF_CODE):
+        values[stem] = faultVal
+
+    for node in net["ORDER"]:
+        if node == gate:
+            # Branch fault: only this gate sees the stuck value on its input
+            good = values[site]
+            values[site] = faultVal
+            values[node] = gateCalc(net, node, values)
+            values[site] = good
+        else:
+            values[node] = gateCalc(net, node, values)
+        if node == stem:
+            values[node] = faultVal
+
+    # Latching the next state of every DFF
+    for node in net["DFFS"]:
+        dInput = fanin[faninStart[node]]
+        if node == gate and dInput == site:
+            memory[node] = faultVal
+        else:
+            memory[node] = values[dInput]
 
-                # ERROR Detection if LOGIC does not exist
-                if isinstance(circuit, str):
-                    print(circuit)
-                    return circuit
+    return [values, memory]
 
-    #            print("Progress: updating " + curr + " = " + circuit[curr][3] + " as the output of " + circuit[curr][0] + " for:")
-    #            for term in circuit[curr][1]:
-    #                print(term + " = " + circuit[term][3])
-    #            print("\n")
 
-            else:
-                # If the terminals have not been accessed yet, append the current node at the end of the queue
-                queue.append(curr)
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Structural fault collapsing of a fault list
+# Faults that always give the same faulty circuit are equivalent, so only one fault of each class is simulated:
+#   - a stem fault X-SA-v and the branch fault G-IN-X-SA-v when G is the only gate reading X and X is not an OUTPUT
+#   - any input SA-0 of an AND (SA-1 of an OR) and the output SA-0 (SA-1); NAND/NOR the same with the output inverted
+#   - the input and output faults of a NOT (inverted) or BUFF
+# With dominance, the output SA-1 of an AND (SA-0 of a NAND, SA-0 of an OR, SA-1 of a NOR) is also dropped, since
+# any test for one of the inputs stuck at the non-controlling value detects it as well. Other tests can detect it too,
+# so run_fault_sim still simulates a dominated class until it has been detected.
+# sites comes from faultSite. Returns [reps, classes, dominated]:
+#   reps        = indices of the faults to simulate, in fault list order
+#   classes[r]  = indices of every fault in the full list that fault r stands for (r included)
+#   dominated[d] = reps whose detection also detects the dropped class d (only filled in with dominance)
+def collapseFaults(net, faults, sites, dominance=False):
+    types = net["TYPES"]
+    fanin = net["FANIN"]
+    faninStart = net["FANIN_START"]
+    fanout = net["FANOUT"]
+    outputSet = net["OUTPUT_SET"]
+
+    # Union-find over [site, gate, value] fault keys
+    parent = {}
+
+    def find(key):
+        root = key
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while key != root:
+            parent[key], key = root, parent.get(key, key)
+        return root
+
+    def union(keyA, keyB):
+        rootA = find(keyA)
+        rootB = find(keyB)
+        if rootA != rootB:
+            parent[rootB] = rootA
+
+    for node in net["GATES"]:
+        logic = types[node]
+        if logic == DFF_CODE:
+            continue
+        for term in set(fanin[faninStart[node]:faninStart[node + 1]]):
+            # Stem and branch are the same fault when this gate is the only reader of the line
+            if term not in outputSet and all([gate == node for gate in fanout[term]]):
+                union((term, -1, '0'), (term, node, '0'))
+                union((term, -1, '1'), (term, node, '1'))
+
+            # Controlling value on an input gives the same output as the output stuck at the controlled value
+            if logic == AND_CODE:
+                union((node, -1, '0'), (term, node, '0'))
+            elif logic == NAND_CODE:
+                union((node, -1, '1'), (term, node, '0'))
+            elif logic == OR_CODE:
+                union((node, -1, '1'), (term, node, '1'))
+            elif logic == NOR_CODE:
+                union((node, -1, '0'), (term, node, '1'))
+            elif logic == NOT_CODE:
+                union((node, -1, '1'), (term, node, '0'))
+                union((node, -1, '0'), (term, node, '1'))
+            elif logic == BUFF_CODE:
+                union((node, -1, '0'), (term, node, '0'))
+                union((node, -1, '1'), (term, node, '1'))
+
+    # Grouping the listed faults by class, the first fault of a class in the list represents it
+    reps = []
+    classes = {}
+    repOf = {}
+    for faultIndex in range(len(faults)):
+        if sites[faultIndex] is None:
+            reps.append(faultIndex)
+            classes[faultIndex] = [faultIndex]
+            continue
+        root = find(tuple(sites[faultIndex]))
+        if root not in repOf:
+            repOf[root] = faultIndex
+            reps.append(faultIndex)
+            classes[faultIndex] = [faultIndex]
+        else:
+            classes[repOf[root]].append(faultIndex)
+
+    dominated = {}
+    if dominance:
+        # [output value, input value] of the dominance relation for each gate type
+        rules = {AND_CODE: ['1', '1'], NAND_CODE: ['0', '1'], OR_CODE: ['0', '0'], NOR_CODE: ['1', '0']}
+        needed = set()
+        for node in net["GATES"]:
+            if types[node] not in rules:
+                continue
+            outVal, inVal = rules[types[node]]
+            outRoot = find((node, -1, outVal))
+            inRoots = [find((term, node, inVal)) for term in set(fanin[faninStart[node]:faninStart[node + 1]])]
+
+            # Only drop a class if every dominating fault is listed and kept, and nothing else relies on it
+            if outRoot not in repOf or outRoot in needed or outRoot in inRoots:
+                continue
+            if not all([root in repOf and repOf[root] not in dominated for root in inRoots]):
+                continue
+            dominated[repOf[outRoot]] = [repOf[root] for root in inRoots]
+            needed.update(inRoots)
+        reps = [faultIndex for faultIndex in reps if faultIndex not in dominated]
+
+    return [reps, classes, dominated]
 
-        
 
-    print(memory)
-    return [circuit, memory]
+# -------------------------------------------------------------------------------------------------------------------- #
+# Bit-parallel (word-packed) simulation
+# Every line holds two Python integers instead of one character, one bit per test vector (lane):
+#   ones[id]  has bit k set if the line is 1 for vector k
+#   zeros[id] has bit k set if the line is 0 for vector k
+# and a lane with neither bit set is U, so the 0/1/U logic of gateCalc carries over to plain bitwise operations.
+# Python integers grow as needed, so a pack can hold any number of vectors (PACK_WIDTH by default).
+PACK_WIDTH = 64
 
+# Translation tables from input characters to the ones / zeros rails
+ONES_TABLE = str.maketrans("01Uu", "0100")
+ZEROS_TABLE = str.maketrans("01Uu", "1000")
 
-def userIn():
-    while True:
-        print("Choose what you'd like to do (1, 2, or 3): " + "\n 1: Test Vector Generation" + "\n 2: Fault Coverage Simulation \n")
-        opt=input()
 
-        if opt not in ("1", "2"):
-            print("Input not recognized. \n")
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Packs a list of input lines into the two rails of the input wires (vector k goes into bit k).
+# Returns [ones, zeros, status]; status[k] is 0 for a good line or the inputRead error code (-1 / -2), and the lanes of
+# bad lines are left at U.
+def packInputs(net, lines):
+    width = net["INPUT_WIDTH"]
+    numWires = len(net["NAMES"])
+    ones = [0] * numWires
+    zeros = [0] * numWires
+    status = []
+
+    # Checking every line the same way inputRead does, and cutting it down to the proper number of bits
+    trimmed = []
+    for line in lines:
+        if len(line) < width:
+            status.append(-1)
+            trimmed.append("U" * width)
             continue
-        else:
-            return opt
-            #break  
+        line = line[(len(line) - width):(len(line))]
+        if line.strip("01Uu") != "":
+            status.append(-2)
+            trimmed.append("U" * width)
+            continue
+        status.append(0)
+        trimmed.append(line)
+
+    # Column j of the lines is input N-1-j (the most significant bit is the last input), the lane 0 bit is the LSB
+    inputs = net["INPUTS"]
+    j = width - 1
+    for column in zip(*trimmed):
+        column = "".join(column)[::-1]
+        ones[inputs[j]] = int(column.translate(ONES_TABLE), 2)
+        zeros[inputs[j]] = int(column.translate(ZEROS_TABLE), 2)
+        j -= 1
+
+    return [ones, zeros, status]
 
 
 # -------------------------------------------------------------------------------------------------------------------- #
-# FUNCTION: Main Function
-def main():
-    # **************************************************************************************************************** #
-    # NOTE: UI code; Does not contain anything about the actual simulation
+# FUNCTION: calculates the packed output value of a logic gate, same logic as gateCalc but for every lane at once
+# mask has a bit set for every lane in use; returns [ones, zeros] of the gate output
+def gateCalcPacked(net, node, ones, zeros, mask):
+    logic = net["TYPES"][node]
+    terminals = net["FANIN"][net["FANIN_START"][node]:net["FANIN_START"][node + 1]]
+
+    # AND is 1 where every input is 1, and 0 where any input is 0
+    if logic == AND_CODE or logic == NAND_CODE:
+        outOnes = mask
+        outZeros = 0
+        for term in terminals:
+            outOnes &= ones[term]
+            outZeros |= zeros[term]
+        if logic == NAND_CODE:
+            return [outZeros, outOnes]
+        return [outOnes, outZeros]
+
+    # OR is 1 where any input is 1, and 0 where every input is 0
+    if logic == OR_CODE or logic == NOR_CODE:
+        outOnes = 0
+        outZeros = mask
+        for term in terminals:
+            outOnes |= ones[term]
+            outZeros &= zeros[term]
+        if logic == NOR_CODE:
+            return [outZeros, outOnes]
+        return [outOnes, outZeros]
+
+    if logic == BUFF_CODE:
+        return [ones[terminals[0]], zeros[terminals[0]]]
+    if logic == NOT_CODE:
+        return [zeros[terminals[0]], ones[terminals[0]]]
+
+    # XOR is the parity of the 1 rails, but only in lanes where every input is known
+    if logic == XOR_CODE or logic == XNOR_CODE:
+        known = mask
+        parity = 0
+        for term in terminals:
+            known &= ones[term] | zeros[term]
+            parity ^= ones[term]
+        outOnes = parity & known
+        outZeros = known & ~parity
+        if logic == XNOR_CODE:
+            return [outZeros, outOnes]
+        return [outOnes, outZeros]
 
-    # Used for file access
-    script_dir = os.path.dirname(__file__)  # <-- absolute dir the script is in
+    # MUX(A,B,SEL): A where SEL is 0, B where SEL is 1, U where SEL is U
+    if logic == MUX_CODE:
+        a = terminals[0]
+        b = terminals[1]
+        sel = terminals[2]
+        return [(zeros[sel] & ones[a]) | (ones[sel] & ones[b]), (zeros[sel] & zeros[a]) | (ones[sel] & zeros[b])]
 
-    print("Circuit Simulator:")
-##########################################################################################
-    # Select circuit benchmark file, default is circuit.bench
-    
+    if logic == LUT_CODE:
+        return lutPacked(net["TABLES"][node], len(terminals), [ones[term] for term in terminals],
+                         [zeros[term] for term in terminals], mask)
 
-    while True:
-        cktFile = "circuit.bench"   
-        print("\n Read circuit benchmark file: use " + cktFile + "?" + " Enter to accept or type filename: ")
-        userInput = input()
-        if userInput == "":
-            break
-        else:
-            cktFile = os.path.join(script_dir, userInput)
-            if not os.path.isfile(cktFile):
-                print("File does not exist. \n")
-            else:
-                break
+    # Error detection... compileNet only lets known gate types through
+    return -1
 
-    print("\n Reading " + cktFile + " ... \n")
-    tempNetRead=netRead(cktFile)
-    ##---------------Calling modified netRead here ---------#
-    #circuit = netRead(cktFile)
-    circuit=tempNetRead[0]
-    myN=tempNetRead[1]
-    ##---------------Calling modified netRead here ---------#
 
-    print("\n Finished processing benchmark file and built netlist dictionary: \n")
-    # Uncomment the following line, for the neater display of the function and then comment out print(circuit)
-#    printCkt(circuit)
-    #print(circuit)
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Packed output [ones, zeros] of a LUT with numTerms inputs, whose input rails are termOnes / termZeros
+# The table is split on its last input (Shannon expansion) down to constant sub-tables, and the halves are joined like
+# a MUX with that input as the select, plus the lanes where both halves agree, so a U select only gives U where the
+# rows it could pick disagree. Equal sub-tables are only built once (memo). The rails can be Python integers or NumPy
+# arrays (numpySimBlock).
+def lutPacked(table, numTerms, termOnes, termZeros, mask, memo=None):
+    if table == 0:
+        return [0, mask]
+    if table == (1 << (1 << numTerms)) - 1:
+        return [mask, 0]
+    if memo is None:
+        memo = {}
+    key = (table, numTerms)
+    if key in memo:
+        return memo[key]
+
+    half = 1 << (numTerms - 1)
+    low = table & ((1 << half) - 1)
+    high = table >> half
+    if low == high:
+        out = lutPacked(low, numTerms - 1, termOnes, termZeros, mask, memo)
+    else:
+        lowVal = lutPacked(low, numTerms - 1, termOnes, termZeros, mask, memo)
+        highVal = lutPacked(high, numTerms - 1, termOnes, termZeros, mask, memo)
+        selOnes = termOnes[numTerms - 1]
+        selZeros = termZeros[numTerms - 1]
+        out = [(selZeros & lowVal[0]) | (selOnes & highVal[0]) | (lowVal[0] & highVal[0]),
+               (selZeros & lowVal[1]) | (selOnes & highVal[1]) | (lowVal[1] & highVal[1])]
+    memo[key] = out
+    return out
 
-    # keep an initial (unassigned any value) copy of the circuit for an easy reset
-    newCircuit = circuit
 
-    #select fault file, default is  full_f_list.txt
-################################################"WRITE FULL FAULT LIST###########################"
-    while True:
-        faultListName = "full_f_list.txt"
-        print("\n Write full fault list file: use " + faultListName + "?" + " Enter to accept or type filename: ")
-        userInput = input()
-        if userInput == "":
-            break
-        else:
-            faultListName = os.path.join(script_dir, userInput)
-            break
-################################################"WRITE FULL FAULT LIST###########################"
-    
-    #generates the fault list
-    genFaultList(circuit, faultListName, cktFile) 
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: the bit-parallel simulation, basic_sim for every lane of a pack at once
+# memory maps a DFF to the [ones, zeros] of its present state (U if missing) and holds the next state afterwards
+def parallelSim(net, ones, zeros, mask, memory):
+    for node in net["DFFS"]:
+        state = memory.get(node, [0, 0])
+        ones[node] = state[0]
+        zeros[node] = state[1]
 
-    #Select input fault file, default is f_list.txt
-    while True:
-        faultInputName = "full_f_list.txt"
-        print("\n Read input fault file: use " + faultInputName + "?" + " Enter to accept or type filename: ")
-        userInput = input()
-        if userInput == "":
+    for node in net["ORDER"]:
+        outVal = gateCalcPacked(net, node, ones, zeros, mask)
+        ones[node] = outVal[0]
+        zeros[node] = outVal[1]
 
-            break
-        else:
-            faultInputName = os.path.join(script_dir, userInput)
-            if not os.path.isfile(faultInputName):
-                print("File does not exist. \n")
-            else:
-                break
+    # Latching the next state of every DFF
+    fanin = net["FANIN"]
+    faninStart = net["FANIN_START"]
+    for node in net["DFFS"]:
+        dInput = fanin[faninStart[node]]
+        memory[node] = [ones[dInput], zeros[dInput]]
 
-    #gets the faults that need to be tested
-    faults = getFaults(faultInputName)
+    return [ones, zeros, memory]
 
-    # Select input file, default is input.txt
-    while True:
-        inputName = "input.txt"
-        print("\n Read input vector file: use " + inputName + "?" + " Enter to accept or type filename: ")
-        userInput = input()
-        if userInput == "":
 
-            break
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Gets the output string of every lane after a packed simulation (last OUTPUT first, like outputString)
+def unpackOutputs(net, ones, zeros, count):
+    columns = []
+    for y in reversed(net["OUTPUTS"]):
+        oneBits = format(ones[y], "0" + str(count) + "b")[::-1]
+        zeroBits = format(zeros[y], "0" + str(count) + "b")[::-1]
+        columns.append("".join(["1" if oneBits[k] == "1" else ("0" if zeroBits[k] == "1" else "U")
+                                for k in range(count)]))
+    return ["".join(lane) for lane in zip(*columns)] if columns else [""] * count
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Simulates the good circuit for a whole list of input lines, width lines per packed pass
+# Returns the output string of every line, or the inputRead error code (-1 / -2) for bad lines
+# engine "codegen" runs the passes through compiledSim instead of parallelSim, and "numpy" simulates all of the
+# lines with numpySim when NumPy is installed
+def simVectors(net, lines, width=PACK_WIDTH, engine="parallel"):
+    if engine == "numpy" and numpy is not None:
+        return numpySim(net, lines)
+
+    outputs = []
+    for start in range(0, len(lines), width):
+        chunk = lines[start:start + width]
+        packed = packInputs(net, chunk)
+        mask = (1 << len(chunk)) - 1
+        if engine == "codegen":
+            result = compiledSim(net, packed[0], packed[1], mask, {})
         else:
-            inputName = os.path.join(script_dir, userInput)
-            if not os.path.isfile(inputName):
-                print("File does not exist. \n")
+            result = parallelSim(net, packed[0], packed[1], mask, {})
+        laneOutputs = unpackOutputs(net, result[0], result[1], len(chunk))
+        for k in range(len(chunk)):
+            if packed[2][k] != 0:
+                outputs.append(packed[2][k])
             else:
-                break
+                outputs.append(laneOutputs[k])
+    return outputs
 
-    # Select output file, default is output.txt
-    while True:
-        outputName = "fault_sim_result.txt"
-        print("\n Write result file: use " + outputName + "?" + " Enter to accept or type filename: ")
-        userInput = input()
-        if userInput == "":
-            break
-        else:
-            outputName = os.path.join(script_dir, userInput)
-            break
 
-    # Note: UI code;
-    # **************************************************************************************************************** #
+# -------------------------------------------------------------------------------------------------------------------- #
+# NumPy levelized simulation
+# For large vector sets the two rails are NumPy arrays of shape (wires, words), 64 input lines per uint64 word, and
+# every level of the netlist is evaluated as a few array operations: the gates of a level are grouped by type and
+# number of inputs (and truth table, for LUTs), so one group is a single gather of its fan-in rows and one reduction.
+# The lines are simulated NUMPY_BLOCK at a time to bound the memory use. Only used when NumPy is installed (engine
+# "numpy").
+NUMPY_BLOCK = 1 << 16
+NUMPY_PLANS = {}
 
-    print("\n *** Simulating the" + inputName + " file and will output in" + outputName + "*** \n")
-    inputFile = open(inputName, "r")
-    outputFile = open(outputName, "w")
 
-    outputFile.write("# fault sim result\n")
-    outputFile.write("# input: " + cktFile + "\n")
-    outputFile.write("# input: " + inputName + "\n")
-    outputFile.write("# input: " + faultInputName + "\n\n\n")
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Groups the gates of a compiled netlist for numpySim, once per netlist hash
+# Returns a list of [logic, outputs, terminals, table] in level order; outputs is the array of gate IDs of the group,
+# terminals[i] the fan-in wire IDs of gate outputs[i] and table the truth table shared by a group of LUTs (0 otherwise)
+def numpyPlan(net):
+    if net["HASH"] in NUMPY_PLANS:
+        return NUMPY_PLANS[net["HASH"]]
+    types = net["TYPES"]
+    levels = net["LEVELS"]
+    fanin = net["FANIN"]
+    faninStart = net["FANIN_START"]
+    tables = net["TABLES"]
+
+    groups = {}
+    for node in net["ORDER"]:
+        terminals = list(fanin[faninStart[node]:faninStart[node + 1]])
+        group = groups.setdefault((levels[node], types[node], len(terminals), tables.get(node, 0)), [[], []])
+        group[0].append(node)
+        group[1].append(terminals)
+
+    plan = []
+    for key in sorted(groups):
+        plan.append([key[1], numpy.array(groups[key][0], dtype=numpy.intp),
+                     numpy.array(groups[key][1], dtype=numpy.intp), key[3]])
+    NUMPY_PLANS[net["HASH"]] = plan
+    return plan
 
-   
 
-    # Runs the simulator for each line of the input file
-##############################################################LOOK FOR N HERE###################################    
-    testVectorNum = 1
-    for line in inputFile:
-        print("line: " + line)
-        # Initializing output variable each input line
-        output = ""
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Packs one row of booleans per wire into uint64 words (line k goes into bit k % 64 of word k // 64)
+def numpyPack(bits):
+    packed = numpy.packbits(bits, axis=1, bitorder="little")
+    padding = (-packed.shape[1]) % 8
+    if padding:
+        packed = numpy.pad(packed, ((0, 0), (0, padding)))
+    return numpy.ascontiguousarray(packed).view("<u8")
 
-        # Do nothing else if empty lines, ...
-        if (line == "\n"):
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: simVectors with the NumPy backend, same results for the same lines
+def numpySim(net, lines, block=NUMPY_BLOCK):
+    outputs = []
+    for start in range(0, len(lines), block):
+        outputs.extend(numpySimBlock(net, lines[start:start + block]))
+    return outputs
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Simulates one block of input lines with the NumPy backend, returns the outputs like simVectors
+def numpySimBlock(net, lines):
+    width = net["INPUT_WIDTH"]
+    count = len(lines)
+    if count == 0:
+        return []
+
+    # Checking every line the same way packInputs does
+    status = []
+    trimmed = []
+    for line in lines:
+        if len(line) < width:
+            status.append(-1)
+            trimmed.append("U" * width)
             continue
-        # ... or any comments
-        if (line[0] == "#"):
+        line = line[(len(line) - width):(len(line))]
+        if line.strip("01Uu") != "":
+            status.append(-2)
+            trimmed.append("U" * width)
             continue
+        status.append(0)
+        trimmed.append(line)
+
+    # Column j of the lines is input N-1-j (the most significant bit is the last input)
+    chars = numpy.frombuffer("".join(trimmed).encode("ascii"), dtype=numpy.uint8).reshape(count, width)
+    columns = chars[:, ::-1].T
+    inputOnes = numpyPack(columns == ord("1"))
+    inputZeros = numpyPack(columns == ord("0"))
+    mask = numpyPack(numpy.array([status], dtype=numpy.int8) == 0)[0]
+
+    words = mask.shape[0]
+    ones = numpy.zeros((len(net["NAMES"]), words), dtype="<u8")
+    zeros = numpy.zeros((len(net["NAMES"]), words), dtype="<u8")
+    if width:
+        inputs = numpy.array(net["INPUTS"], dtype=numpy.intp)
+        ones[inputs] = inputOnes
+        zeros[inputs] = inputZeros
+
+    # Same two-rail logic as gateCalcPacked, one gate group at a time
+    for logic, outs, terminals, table in numpyPlan(net):
+        termOnes = ones[terminals]
+        termZeros = zeros[terminals]
+        if logic == AND_CODE or logic == NAND_CODE:
+            outOnes = numpy.bitwise_and.reduce(termOnes, axis=1) & mask
+            outZeros = numpy.bitwise_or.reduce(termZeros, axis=1)
+        elif logic == OR_CODE or logic == NOR_CODE:
+            outOnes = numpy.bitwise_or.reduce(termOnes, axis=1)
+            outZeros = numpy.bitwise_and.reduce(termZeros, axis=1) & mask
+        elif logic == BUFF_CODE or logic == NOT_CODE:
+            outOnes = termOnes[:, 0]
+            outZeros = termZeros[:, 0]
+        elif logic == XOR_CODE or logic == XNOR_CODE:
+            known = numpy.bitwise_and.reduce(termOnes | termZeros, axis=1) & mask
+            parity = numpy.bitwise_xor.reduce(termOnes, axis=1)
+            outOnes = parity & known
+            outZeros = known & ~parity
+        elif logic == LUT_CODE:
+            numTerms = terminals.shape[1]
+            outOnes, outZeros = lutPacked(table, numTerms, [termOnes[:, i] for i in range(numTerms)],
+                                          [termZeros[:, i] for i in range(numTerms)], mask)
+        else:
+            # MUX(A,B,SEL)
+            outOnes = (termZeros[:, 2] & termOnes[:, 0]) | (termOnes[:, 2] & termOnes[:, 1])
+            outZeros = (termZeros[:, 2] & termZeros[:, 0]) | (termOnes[:, 2] & termZeros[:, 1])
 
-        # Removing the the newlines at the end and then output it to the txt file
-        line = line.replace("\n", "")
-        outputFile.write("tv" + str(testVectorNum) + " = " + line)
+        if logic == NAND_CODE or logic == NOR_CODE or logic == NOT_CODE or logic == XNOR_CODE:
+            ones[outs] = outZeros
+            zeros[outs] = outOnes
+        else:
+            ones[outs] = outOnes
+            zeros[outs] = outZeros
 
-        #updates testVectorNum for the next one
-        testVectorNum += 1
+    # Output strings, last OUTPUT first
+    outWires = numpy.array(list(reversed(net["OUTPUTS"])), dtype=numpy.intp)
+    outOnes = numpy.unpackbits(ones[outWires].view(numpy.uint8), axis=1, bitorder="little")[:, :count]
+    outZeros = numpy.unpackbits(zeros[outWires].view(numpy.uint8), axis=1, bitorder="little")[:, :count]
+    text = numpy.full((count, len(outWires)), ord("U"), dtype=numpy.uint8)
+    text[outOnes.T == 1] = ord("1")
+    text[outZeros.T == 1] = ord("0")
+    text = text.tobytes().decode("ascii")
 
-        # Removing spaces
-        line = line.replace(" ", "")
-        
-#        print("\n before processing circuit dictionary...")
-        # Uncomment the following line, for the neater display of the function and then comment out print(circuit)
-        #printCkt(circuit)
-#        print(circuit)
-
-#        print("\n ---> Now ready to simulate INPUT = " + line)
-        circuit = inputRead(circuit, line)
-        # Uncomment the following line, for the neater display of the function and then comment out print(circuit)
-        #printCkt(circuit)
-#        print(circuit)
-
-        if circuit == -1:
-            print("INPUT ERROR: INSUFFICIENT BITS")
-            outputFile.write(" -> INPUT ERROR: INSUFFICIENT BITS" + "\n")
-            # After each input line is finished, reset the netList
-            circuit = newCircuit
-            print("...move on to next input\n")
-            continue
-        elif circuit == -2:
-            print("INPUT ERROR: INVALID INPUT VALUE/S")
-            outputFile.write(" -> INPUT ERROR: INVALID INPUT VALUE/S" + "\n")
-            # After each input line is finished, reset the netList
-            circuit = newCircuit
-            print("...move on to next input\n")
-            continue
-        memory={}
-        circuitIN = basic_sim(circuit, memory)
-        circuit=circuitIN[0]
-        memory=circuitIN[1]
-        # circuitIN = basic_sim(circuit, memory)
-        # circuit=circuitIN[0]
-        # memory=circuitIN[1]
-        # circuitIN = basic_sim(circuit, memory)
-        # circuit=circuitIN[0]
-        # memory=circuitIN[1]
-        # circuitIN = basic_sim(circuit, memory)
-        # circuit=circuitIN[0]
-        # memory=circuitIN[1]
-
-        print("\n *** Finished simulation - resulting circuit: \n")
-        # Uncomment the following line, for the neater display of the function and then comment out print(circuit)
-        #printCkt(circuit)
- #       print(circuit)
-
-        for y in circuit["OUTPUTS"][1]:
-            if not circuit[y][2]:
-                output = "NETLIST ERROR: OUTPUT LINE \"" + y + "\" NOT ACCESSED"
-                break
-            output = str(circuit[y][3]) + output
+    size = len(outWires)
+    return [status[k] if status[k] != 0 else text[k * size:(k + 1) * size] for k in range(count)]
 
-        print("\n *** Summary of simulation: ")
-        print(line + " -> " + output + " written into output file. \n")
-        outputFile.write(" -> " + output + " (good)\n")
-        outputFile.write("detected:\n")
 
-        #after the output is written run the faults
-        print("\n *** Now running fault tests *** \n")
+# -------------------------------------------------------------------------------------------------------------------- #
+# Parallel-fault simulation
+# The same two-rail packing is used with one fault per lane instead of one vector per lane: every lane sees the same
+# input line, and lane k has fault k of the group injected, so FAULT_WIDTH faults are simulated in a single pass.
+FAULT_WIDTH = 64
 
-        for faultLine in faults:
 
-            #creates a copy of the circuit to be used for fault testing
-            faultCircuit = copy.deepcopy(circuit)
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Builds the injection masks for a group of faults (fault group[k] goes into lane k)
+# Returns [stems, branches]:
+#   stems[site]          = [force1, force0] lanes where the whole line is stuck at 1 / 0
+#   branches[gate][site] = [force1, force0] lanes where only that gate input is stuck at 1 / 0
+def faultMasks(sites, group):
+    stems = {}
+    branches = {}
+    for k in range(len(group)):
+        site, gate, faultVal = sites[group[k]]
+        if gate == -1:
+            masks = stems.setdefault(site, [0, 0])
+        else:
+            masks = branches.setdefault(gate, {}).setdefault(site, [0, 0])
+        if faultVal == '1':
+            masks[0] |= 1 << k
+        else:
+            masks[1] |= 1 << k
+    return [stems, branches]
 
-            for key in faultCircuit:
-                if (key[0:5]=="wire_"):
-                    faultCircuit[key][2] = False
-                    faultCircuit[key][3] = 'U'
-            
-            #sets up the inputs for the fault circuit
-            faultCircuit = inputRead(faultCircuit, line)
 
-            #handles stuck at faults
-            if(faultLine[1][1] == "SA"):
-                for key in faultCircuit:
-                    try:
-                       if(faultLine[1][0] == key[5:]):
-                            #print(faultLine[1][0])
-                            #print(key[5:])
-                            print('A')
-                            faultCircuit[key][2] = True
-                            faultCircuit[key][3] = faultLine[1][2]
-                            #print('B')
-                    except:
-                        pass
-
-            #handles in in stuck at faults by making a new "wire"
-            elif(faultLine[1][1] == "IN"):
-                faultCircuit["faultWire"] = ["FAULT", "NONE", True, faultLine[1][4]]
-                print('C')
-
-                #finds the input that needs to be changed to the fault line
-                for key in faultCircuit:
-                    print('D')
-                    if(faultLine[1][0] == key[5:]):
-                        inputIndex = 0
-                        print('F')
-                        for gateInput in faultCircuit[key][1]:
-                            print('G')
-                            if(faultLine[1][2] == gateInput[5:]):
-                                faultCircuit[key][1][inputIndex] = "faultWire"
-                                print('H')
-                            
-                            inputIndex += 1
-################################FAULT RUNNER###################################################################            
-            #runs Circuit Simulation
-            memory={}
-            faultCircuitIM = basic_sim(faultCircuit, memory)
-            faultCircuit=faultCircuitIM[0]
-            memory=faultCircuitIM[1]
-            # faultCircuit=faultCircuitIM[0]
-            # memory=faultCircuitIM[1]
-            # faultCircuit=faultCircuitIM[0]
-            # memory=faultCircuitIM[1]
-
-            #gets the output
-            faultOutput = ""
-            for y in faultCircuit["OUTPUTS"][1]:
-                if not faultCircuit[y][2]:
-                    faultOutput = "NETLIST ERROR: OUTPUT LINE \"" + y + "\" NOT ACCESSED"
-                    break
-                faultOutput = str(faultCircuit[y][3]) + faultOutput
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: parallelSim with faults injected into their lanes
+# injection is [stems, branches] from faultMasks; memory works the same way as in parallelSim
+def parallelFaultSim(net, ones, zeros, mask, memory, injection):
+    stems = injection[0]
+    branches = injection[1]
+    types = net["TYPES"]
+
+    for node in net["DFFS"]:
+        state = memory.get(node, [0, 0])
+        ones[node] = state[0]
+        zeros[node] = state[1]
+
+    # Stuck input and DFF lines are never evaluated, so force them before the pass
+    for site in stems:
+        if types[site] == INPUT_CODE or types[site] == DFF_CODE:
+            force1, force0 = stems[site]
+            ones[site] = (ones[site] | force1) & ~force0
+            zeros[site] = (zeros[site] | force0) & ~force1
+
+    for node in net["ORDER"]:
+        if node in branches:
+            # Branch faults: force the gate inputs only while this gate is evaluated
+            saved = []
+            for site in branches[node]:
+                force1, force0 = branches[node][site]
+                saved.append([site, ones[site], zeros[site]])
+                ones[site] = (ones[site] | force1) & ~force0
+                zeros[site] = (zeros[site] | force0) & ~force1
+            outVal = gateCalcPacked(net, node, ones, zeros, mask)
+            for site, siteOnes, siteZeros in saved:
+                ones[site] = siteOnes
+                zeros[site] = siteZeros
+        else:
+            outVal = gateCalcPacked(net, node, ones, zeros, mask)
 
-            #checks to see if the fault was detected
-            if(output != faultOutput):
-                faultLine[0] = True
-                
-                #prints out the fault if it is a SA
-                if(faultLine[1][1] == "SA"):
-                    outputFile.write(faultLine[1][0] + "-" + faultLine[1][1] + "-" + faultLine[1][2] + ": ")
-                    outputFile.write(line + " -> " + faultOutput + "\n")
-                
-                #prints out the fault if it is IN-SA
-                elif(faultLine[1][1] == "IN"):
-                    outputFile.write(faultLine[1][0] + "-" + faultLine[1][1] + "-" + faultLine[1][2] + "-" + faultLine[1][3] + "-" + faultLine[1][4] + ": ")
-                    outputFile.write(line + " -> " + faultOutput + "\n")
-
-
-        #adds extra line of space to file for formatiing
-        outputFile.write("\n")
-        # After each input line is finished, reset the circuit
-        print("\n *** Now resetting circuit back to unknowns... \n")
-       
-        for key in circuit:
-            if (key[0:5]=="wire_"):
-                circuit[key][2] = False
-                circuit[key][3] = 'U'
-
-        print("\n circuit after resetting: \n")
-        # Uncomment the following line, for the neater display of the function and then comment out print(circuit)
-        #printCkt(circuit)
-#        print(circuit)
-
-        print("\n*******************\n")
-###########################----------------------------FAULT COVERAGE SECTION-------------------------------------##
-    totalFaults = 0
-    detectedFaults = 0
-    for faultLine in faults:
-        totalFaults += 1
-        if(faultLine[0] == True):
-            detectedFaults += 1
-    
-    undetectedFaults = totalFaults - detectedFaults
-    
-    outputFile.write("total detected faults: " + str(detectedFaults))
-    outputFile.write("\n\nundetected faults: " + str(undetectedFaults) + "\n")
+        if node in stems:
+            force1, force0 = stems[node]
+            ones[node] = (outVal[0] | force1) & ~force0
+            zeros[node] = (outVal[1] | force0) & ~force1
+        else:
+            ones[node] = outVal[0]
+            zeros[node] = outVal[1]
 
-    for faultLine in faults:
-        if(faultLine[0] == False):
-            #prints out the fault if it is a SA
-            if(faultLine[1][1] == "SA"):
-                outputFile.write(faultLine[1][0] + "-" + faultLine[1][1] + "-" + faultLine[1][2] + "\n")
+    # Latching the next state of every DFF, a stuck D input only changes its own lanes
+    fanin = net["FANIN"]
+    faninStart = net["FANIN_START"]
+    for node in net["DFFS"]:
+        dInput = fanin[faninStart[node]]
+        dOnes = ones[dInput]
+        dZeros = zeros[dInput]
+        if node in branches and dInput in branches[node]:
+            force1, force0 = branches[node][dInput]
+            dOnes = (dOnes | force1) & ~force0
+            dZeros = (dZeros | force0) & ~force1
+        memory[node] = [dOnes, dZeros]
 
-            #prints out the fault if it is IN-SA
-            elif(faultLine[1][1] == "IN"):
-                outputFile.write(faultLine[1][0] + "-" + faultLine[1][1] + "-" + faultLine[1][2] + "-" + faultLine[1][3] + "-" + faultLine[1][4] + "\n")
-    
-    if(totalFaults != 0):
-        outputFile.write("\nfault coverage: " + str(detectedFaults) + "/" + str(totalFaults) + " = " + "{:.0%}".format(detectedFaults/totalFaults))
-    else:
-        outputFile.write("\nfault coverage: 0/0 = 0%")
-###########################----------------------------FAULT COVERAGE SECTION-------------------------------------##
+    return [ones, zeros, memory]
 
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Packs the input values of one line (from inputRead) into every lane of mask, returns [ones, zeros]
+def broadcastLine(net, values, mask):
+    ones = [0] * len(values)
+    zeros = [0] * len(values)
+    for node in net["INPUTS"]:
+        if values[node] == '1':
+            ones[node] = mask
+        elif values[node] == '0':
+            zeros[node] = mask
+    return [ones, zeros]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Gets the lanes of a packed simulation whose outputs differ from the good output string of the line
+def outputDiff(net, ones, zeros, output, mask):
+    diff = 0
+    k = len(output) - 1
+    for y in net["OUTPUTS"]:
+        goodOnes = mask if output[k] == '1' else 0
+        goodZeros = mask if output[k] == '0' else 0
+        diff |= (ones[y] ^ goodOnes) | (zeros[y] ^ goodZeros)
+        k -= 1
+    return diff
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Runs every fault in faultIndices against one input line
+# sites comes from faultSite, output is the good output string of the line. engine is "parallel" (FAULT_WIDTH faults
+# per pass), "codegen" (the same passes through compiledSim) or "serial" (one basic_sim per fault).
+# Returns [faultIndex, faultOutput] for every detected fault, in fault list order
+def faultSimVector(net, line, output, faultIndices, sites, engine="parallel"):
+    detected = []
+    values = inputRead(net, line)
+    faultIndices = [faultIndex for faultIndex in faultIndices if sites[faultIndex] is not None]
+
+    if engine == "serial":
+        for faultIndex in faultIndices:
+            #runs Circuit Simulation from the input line values with the fault injected
+            faultValues = list(values)
+            basic_sim(net, faultValues, {}, sites[faultIndex])
+
+            #checks to see if the fault was detected
+            faultOutput = outputString(net, faultValues)
+            if(output != faultOutput):
+                detected.append([faultIndex, faultOutput])
+        return detected
+
+    for start in range(0, len(faultIndices), FAULT_WIDTH):
+        group = faultIndices[start:start + FAULT_WIDTH]
+        mask = (1 << len(group)) - 1
+
+        # Every lane gets the same input line
+        packed = broadcastLine(net, values, mask)
+        if engine == "codegen":
+            result = compiledSim(net, packed[0], packed[1], mask, {}, faultMasks(sites, group))
+        else:
+            result = parallelFaultSim(net, packed[0], packed[1], mask, {}, faultMasks(sites, group))
+
+        # A lane detects its fault if any output rail differs from the good output
+        diff = outputDiff(net, result[0], result[1], output, mask)
+        if diff == 0:
+            continue
+
+        laneOutputs = unpackOutputs(net, result[0], result[1], len(group))
+        for k in range(len(group)):
+            if (diff >> k) & 1:
+                detected.append([group[k], laneOutputs[k]])
+
+    return detected
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# Generated-code (compiled) simulation
+# The netlist is turned into Python source with one straight-line assignment per gate over local variables
+# (o<id> / z<id> are the ones / zeros rails of wire id), so a pass has no gate type dispatch, no netlist lookups and no
+# lists to build. Two functions are generated from every netlist:
+#   goodSim(ones, zeros, mask, memory)                  -> [ones, zeros], same as parallelSim
+#   faultSim(ones, zeros, mask, memory, f1, f0, b1, b0) -> [ones, zeros], same as parallelFaultSim
+# where f1[id] / f0[id] are the lanes where wire id is stuck at 1 / 0 and b1[p] / b0[p] the lanes where fan-in pin p
+# (an index into FANIN) is stuck at 1 / 0. The compiled code objects are kept in CODEGEN_DIR under the netlist hash,
+# so a benchmark is only compiled the first time it is simulated.
+CODEGEN_DIR = os.path.join(os.path.expanduser("~"), ".cache", "p3sim")
+CODEGEN_CACHE = {}
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Builds the source of the packed logic of one gate from the source of its input rails
+# Returns [lines, onesExpr, zerosExpr]; lines are statements that have to run before the two expressions
+# table is the truth table of a LUT gate (see codegenLut)
+def codegenGate(logic, onesTerms, zerosTerms, table=None):
+    if logic == AND_CODE or logic == NAND_CODE:
+        outOnes = "mask & " + " & ".join(onesTerms)
+        outZeros = " | ".join(zerosTerms)
+        if logic == NAND_CODE:
+            return [[], outZeros, outOnes]
+        return [[], outOnes, outZeros]
+
+    if logic == OR_CODE or logic == NOR_CODE:
+        outOnes = " | ".join(onesTerms)
+        outZeros = "mask & " + " & ".join(zerosTerms)
+        if logic == NOR_CODE:
+            return [[], outZeros, outOnes]
+        return [[], outOnes, outZeros]
+
+    if logic == BUFF_CODE:
+        return [[], onesTerms[0], zerosTerms[0]]
+    if logic == NOT_CODE:
+        return [[], zerosTerms[0], onesTerms[0]]
+
+    if logic == XOR_CODE or logic == XNOR_CODE:
+        lines = ["known = mask & " + " & ".join(["(" + onesTerms[i] + " | " + zerosTerms[i] + ")"
+                                                  for i in range(len(onesTerms))]),
+                 "parity = " + " ^ ".join(onesTerms)]
+        if logic == XNOR_CODE:
+            return [lines, "known & ~parity", "parity & known"]
+        return [lines, "parity & known", "known & ~parity"]
+
+    if logic == LUT_CODE:
+        return codegenLut(table, onesTerms, zerosTerms)
+
+    # MUX(A,B,SEL)
+    return [[], "(" + zerosTerms[2] + " & " + onesTerms[0] + ") | (" + onesTerms[2] + " & " + onesTerms[1] + ")",
+            "(" + zerosTerms[2] + " & " + zerosTerms[0] + ") | (" + onesTerms[2] + " & " + zerosTerms[1] + ")"]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Builds the source of a LUT gate, the same Shannon expansion as lutPacked unrolled into temporaries
+# (t<k>o / t<k>z), with the constant sub-tables folded away; returns [lines, onesExpr, zerosExpr] like codegenGate
+def codegenLut(table, onesTerms, zerosTerms):
+    lines = []
+    memo = {}
+
+    # Source of a & b, or None if it is always 0 (the rails never have lanes outside mask)
+    def both(a, b):
+        if a == "0" or b == "0":
+            return None
+        if a == "mask":
+            return b
+        if b == "mask":
+            return a
+        return "(" + a + " & " + b + ")"
+
+    def expand(table, numTerms):
+        if table == 0:
+            return ["0", "mask"]
+        if table == (1 << (1 << numTerms)) - 1:
+            return ["mask", "0"]
+        if (table, numTerms) in memo:
+            return memo[(table, numTerms)]
+        half = 1 << (numTerms - 1)
+        low = table & ((1 << half) - 1)
+        high = table >> half
+        if low == high:
+            out = expand(low, numTerms - 1)
+        else:
+            lowVal = expand(low, numTerms - 1)
+            highVal = expand(high, numTerms - 1)
+            sel = numTerms - 1
+            out = ["t%do" % len(memo), "t%dz" % len(memo)]
+            for rail in range(2):
+                parts = [both(zerosTerms[sel], lowVal[rail]), both(onesTerms[sel], highVal[rail]),
+                         both(lowVal[rail], highVal[rail])]
+                parts = [part for part in parts if part is not None]
+                lines.append(out[rail] + " = " + (" | ".join(parts) if parts else "0"))
+        memo[(table, numTerms)] = out
+        return out
+
+    out = expand(table, len(onesTerms))
+    return [lines, out[0], out[1]]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Generates the source of goodSim and faultSim for a compiled netlist
+def codegenSource(net):
+    types = net["TYPES"]
+    tables = net["TABLES"]
+    fanin = net["FANIN"]
+    faninStart = net["FANIN_START"]
+    numWires = len(net["NAMES"])
+
+    good = ["def goodSim(ones, zeros, mask, memory):"]
+    fault = ["def faultSim(ones, zeros, mask, memory, f1, f0, b1, b0):"]
+
+    # Stuck-at forcing of a rail value, for a wire (f1 / f0) or for a fan-in pin (b1 / b0)
+    def forced(onesExpr, zerosExpr, index, one, zero):
+        return ["(" + onesExpr + " | " + one + "[" + index + "]) & ~" + zero + "[" + index + "]",
+                "(" + zerosExpr + " | " + zero + "[" + index + "]) & ~" + one + "[" + index + "]"]
+
+    for node in net["INPUTS"]:
+        good.append("    o%d = ones[%d]" % (node, node))
+        good.append("    z%d = zeros[%d]" % (node, node))
+        fault.extend(["    o%d = (ones[%d] | f1[%d]) & ~f0[%d]" % (node, node, node, node),
+                      "    z%d = (zeros[%d] | f0[%d]) & ~f1[%d]" % (node, node, node, node)])
+    for node in net["DFFS"]:
+        good.append("    o%d, z%d = memory.get(%d, (0, 0))" % (node, node, node))
+        fault.append("    o%d, z%d = memory.get(%d, (0, 0))" % (node, node, node))
+        fault.extend(["    o%d, z%d = (o%d | f1[%d]) & ~f0[%d], (z%d | f0[%d]) & ~f1[%d]"
+                      % (node, node, node, node, node, node, node, node)])
+
+    for node in net["ORDER"]:
+        pins = range(faninStart[node], faninStart[node + 1])
+        goodGate = codegenGate(types[node], ["o%d" % fanin[p] for p in pins], ["z%d" % fanin[p] for p in pins],
+                               tables.get(node))
+        for line in goodGate[0]:
+            good.append("    " + line)
+        good.append("    o%d = %s" % (node, goodGate[1]))
+        good.append("    z%d = %s" % (node, goodGate[2]))
+
+        pinRails = [forced("o%d" % fanin[p], "z%d" % fanin[p], str(p), "b1", "b0") for p in pins]
+        faultGate = codegenGate(types[node], ["(" + rails[0] + ")" for rails in pinRails],
+                                ["(" + rails[1] + ")" for rails in pinRails], tables.get(node))
+        for line in faultGate[0]:
+            fault.append("    " + line)
+        fault.append("    outOnes = " + faultGate[1])
+        fault.append("    outZeros = " + faultGate[2])
+        stem = forced("outOnes", "outZeros", str(node), "f1", "f0")
+        fault.append("    o%d = %s" % (node, stem[0]))
+        fault.append("    z%d = %s" % (node, stem[1]))
+
+    # Latching the next state of every DFF, a stuck D input only changes its own lanes
+    for node in net["DFFS"]:
+        p = faninStart[node]
+        good.append("    memory[%d] = [o%d, z%d]" % (node, fanin[p], fanin[p]))
+        dRails = forced("o%d" % fanin[p], "z%d" % fanin[p], str(p), "b1", "b0")
+        fault.append("    memory[%d] = [%s, %s]" % (node, dRails[0], dRails[1]))
+
+    returned = ("    return [[" + ", ".join(["o%d" % node for node in range(numWires)]) + "], ["
+                + ", ".join(["z%d" % node for node in range(numWires)]) + "]]")
+    good.append(returned)
+    fault.append(returned)
+    return "\n".join(good) + "\n\n\n" + "\n".join(fault) + "\n"
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Gets the generated [goodSim, faultSim] of a compiled netlist
+# Compiled once per netlist hash: from memory, then from the code object saved in CODEGEN_DIR, and only then from the
+# generated source (saving the code object for the next run).
+def codegenFunctions(net):
+    key = net["HASH"]
+    if key in CODEGEN_CACHE:
+        return CODEGEN_CACHE[key]
+
+    path = os.path.join(CODEGEN_DIR, key + "." + sys.implementation.cache_tag + ".code")
+    code = None
+    try:
+        with open(path, "rb") as codeFile:
+            code = marshal.load(codeFile)
+        logger.debug("loaded the generated simulation code from %s", path)
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        code = None
+
+    if code is None:
+        code = compile(codegenSource(net), "<p3sim codegen " + key + ">", "exec")
+        # Writing to a temporary file first so that parallel runs never read a half written code file
+        try:
+            if not os.path.isdir(CODEGEN_DIR):
+                os.makedirs(CODEGEN_DIR)
+            temp = path + "." + str(os.getpid())
+            with open(temp, "wb") as codeFile:
+                marshal.dump(code, codeFile)
+            os.replace(temp, path)
+            logger.debug("saved the generated simulation code to %s", path)
+        except (IOError, OSError) as error:
+            logger.debug("could not save the generated simulation code: %s", error)
+
+    scope = {}
+    exec(code, scope)
+    CODEGEN_CACHE[key] = [scope["goodSim"], scope["faultSim"]]
+    return CODEGEN_CACHE[key]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: parallelSim / parallelFaultSim through the generated code
+# injection is [stems, branches] from faultMasks, or None for the good circuit. Only the INPUTS of ones / zeros are
+# read; returns [ones, zeros, memory] with new ones / zeros lists.
+def compiledSim(net, ones, zeros, mask, memory, injection=None):
+    functions = codegenFunctions(net)
+    if injection is None:
+        result = functions[0](ones, zeros, mask, memory)
+        return [result[0], result[1], memory]
+
+    numWires = len(net["NAMES"])
+    fanin = net["FANIN"]
+    faninStart = net["FANIN_START"]
+    f1 = [0] * numWires
+    f0 = [0] * numWires
+    b1 = [0] * len(fanin)
+    b0 = [0] * len(fanin)
+    for site in injection[0]:
+        f1[site], f0[site] = injection[0][site]
+    for gate in injection[1]:
+        for p in range(faninStart[gate], faninStart[gate + 1]):
+            if fanin[p] in injection[1][gate]:
+                b1[p], b0[p] = injection[1][gate][fanin[p]]
+    result = functions[1](ones, zeros, mask, memory, f1, f0, b1, b0)
+    return [result[0], result[1], memory]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# Event-driven fault simulation
+# The good circuit is simulated once for a pack of input lines (one line per lane). Each fault then starts from those
+# good values and only re-evaluates the gates whose inputs changed, in level order, so the work stops as soon as the
+# fault effect dies out instead of covering the whole circuit.
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Gets the output string of lane k of a packed simulation (last OUTPUT first, like outputString)
+def laneOutput(net, ones, zeros, k):
+    output = ""
+    for y in net["OUTPUTS"]:
+        if (ones[y] >> k) & 1:
+            output = '1' + output
+        elif (zeros[y] >> k) & 1:
+            output = '0' + output
+        else:
+            output = "U" + output
+    return output
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Propagates one fault from the good values of a pack of input lines
+# ones / zeros hold the good values from parallelSim and are put back before returning; fault is [site, gate, value]
+# from faultSite. For sequential simulation, stateDiff holds the [ones, zeros] of the DFF outputs where the faulty
+# machine's present state differs from the good one.
+# Returns [diff, outputs, nextState]: diff has a bit set for every lane (line) where the fault is detected, outputs[k]
+# is the faulty output string of detected lane k, and nextState is the stateDiff for the next clock cycle (only filled
+# in when a stateDiff was given).
+def eventFaultSim(net, ones, zeros, mask, fault, stateDiff=None):
+    site, gate, faultVal = fault
+    types = net["TYPES"]
+    levels = net["LEVELS"]
+    fanout = net["FANOUT"]
+
+    changed = {}    # good [ones, zeros] of every line that got a faulty value, to undo at the end
+    queue = []      # gates waiting to be evaluated, as (level, node)
+    queued = set()
+
+    # Lines that take a faulty value directly: the DFF outputs of a faulty state, then a stuck line
+    starts = []
+    if stateDiff is not None:
+        for node in stateDiff:
+            starts.append([node, stateDiff[node][0], stateDiff[node][1]])
+    stem = -1
+    if gate == -1:
+        # Stem fault: the whole line takes the stuck value in every lane, and the line itself is never evaluated
+        stem = site
+        starts.append([site, mask if faultVal == '1' else 0, mask if faultVal == '0' else 0])
+    elif types[gate] != DFF_CODE:
+        # Branch fault: only the faulty gate needs to be looked at first
+        queued.add(gate)
+        queue.append((levels[gate], gate))
+
+    for node, faultOnes, faultZeros in starts:
+        if faultOnes == ones[node] and faultZeros == zeros[node]:
+            continue
+        if node not in changed:
+            changed[node] = [ones[node], zeros[node]]
+        ones[node] = faultOnes
+        zeros[node] = faultZeros
+        for nextNode in fanout[node]:
+            if nextNode not in queued and types[nextNode] != DFF_CODE:
+                queued.add(nextNode)
+                heapq.heappush(queue, (levels[nextNode], nextNode))
+
+    while queue:
+        node = heapq.heappop(queue)[1]
+        if node == stem:
+            continue
+
+        if node == gate:
+            # Branch fault: force the gate input only while this gate is evaluated
+            siteOnes = ones[site]
+            siteZeros = zeros[site]
+            ones[site] = mask if faultVal == '1' else 0
+            zeros[site] = mask if faultVal == '0' else 0
+            outVal = gateCalcPacked(net, node, ones, zeros, mask)
+            ones[site] = siteOnes
+            zeros[site] = siteZeros
+        else:
+            outVal = gateCalcPacked(net, node, ones, zeros, mask)
+
+        # The fault effect stops here if the gate output did not change
+        if outVal[0] == ones[node] and outVal[1] == zeros[node]:
+            continue
+        changed[node] = [ones[node], zeros[node]]
+        ones[node] = outVal[0]
+        zeros[node] = outVal[1]
+        for nextNode in fanout[node]:
+            if nextNode not in queued and types[nextNode] != DFF_CODE:
+                queued.add(nextNode)
+                heapq.heappush(queue, (levels[nextNode], nextNode))
+
+    # A lane detects the fault if any output rail changed there
+    outputSet = net["OUTPUT_SET"]
+    outputDiff = 0
+    for node in changed:
+        if node in outputSet:
+            outputDiff |= (ones[node] ^ changed[node][0]) | (zeros[node] ^ changed[node][1])
+
+    outputs = {}
+    k = 0
+    lanes = outputDiff
+    while lanes:
+        if lanes & 1:
+            outputs[k] = laneOutput(net, ones, zeros, k)
+        lanes >>= 1
+        k += 1
+
+    # The next faulty state, kept only for the DFFs where it differs from the good machine
+    nextState = {}
+    if stateDiff is not None:
+        fanin = net["FANIN"]
+        faninStart = net["FANIN_START"]
+        for node in net["DFFS"]:
+            dInput = fanin[faninStart[node]]
+            if node == gate and dInput == site:
+                faulty = [mask if faultVal == '1' else 0, mask if faultVal == '0' else 0]
+            elif dInput in changed:
+                faulty = [ones[dInput], zeros[dInput]]
+            else:
+                continue
+            good = changed[dInput] if dInput in changed else [ones[dInput], zeros[dInput]]
+            if faulty != good:
+                nextState[node] = faulty
+
+    # Putting the good values back for the next fault
+    for node in changed:
+        ones[node] = changed[node][0]
+        zeros[node] = changed[node][1]
+
+    return [outputDiff, outputs, nextState]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Good and fault simulation of a list of input lines
+# engine is "event" (event-driven, PACK_WIDTH lines per good pass), "parallel", "codegen" or "serial" (see
+# faultSimVector); "numpy" simulates the good circuit for every line at once with numpySim and the faults like
+# "parallel".
+# counts[faultIndex] is how many lines have detected each fault so far and is updated in place (it may be carried
+# over between calls). With nDetect > 0 faults are dropped once they have been detected nDetect times, and with a
+# target coverage (0.0 - 1.0) the simulation stops at the first line that reaches it; weights[faultIndex] is how many
+# faults of the list each simulated fault stands for when counting coverage (see collapseFaults).
+# Returns [outputs, detections]: outputs[i] is the good output string of line i (or the inputRead error code) and
+# detections[i] is the [faultIndex, faultOutput] list of the faults line i detects, in fault list order. Both lists
+# are cut short after the line that reached the target coverage.
+# With an initState the lines are one clock cycle each and the DFF state is kept between them (see seqFaultSim and
+# eventSeqFaultSim); state is the sequential state from seqState to carry on from, updated in place for the next call.
+# resultCache is an optional cache from resultCacheNew: combinational lines it already holds the results of are looked
+# up instead of simulated, and the simulated ones are added to it (sequential runs do not use it).
+def faultSimLines(net, lines, faultIndices, sites, engine="event", width=PACK_WIDTH, counts=None, nDetect=0,
+                  target=None, weights=None, initState=None, resultCache=None, state=None):
+    if initState is not None and engine == "event":
+        return eventSeqFaultSim(net, lines, faultIndices, sites, initState, counts, nDetect, target, weights, state)
+    if initState is not None:
+        return seqFaultSim(net, lines, faultIndices, sites, initState, counts, nDetect, target, weights, engine,
+                           state)
+
+    faultIndices = [faultIndex for faultIndex in faultIndices if sites[faultIndex] is not None]
+    if counts is None:
+        counts = [0] * len(sites)
+    if weights is None:
+        weights = [1] * len(sites)
+    outputs = []
+    detections = []
+    if engine == "numpy" and resultCache is None:
+        goodOutputs = simVectors(net, lines, width, engine)
+
+    # The target coverage is counted against the whole fault list, the same way the result file reports it
+    numDetected = sum([weights[faultIndex] for faultIndex in range(len(sites)) if counts[faultIndex] > 0])
+    if target is not None and len(sites) != 0 and numDetected >= target * len(sites):
+        return [outputs, detections]
+
+    for start in range(0, len(lines), width):
+        chunk = lines[start:start + width]
+
+        # Dropping the faults that have been detected enough times already
+        if nDetect > 0:
+            faultIndices = [faultIndex for faultIndex in faultIndices if counts[faultIndex] < nDetect]
+
+        if resultCache is not None:
+            chunkResults = cachedSimChunk(net, chunk, faultIndices, sites, engine, width, resultCache)
+        elif engine == "numpy":
+            chunkResults = simChunk(net, chunk, faultIndices, sites, engine, width, goodOutputs[start:start + width])
+        else:
+            chunkResults = simChunk(net, chunk, faultIndices, sites, engine, width)
+
+        # Going through the lines in order to count the detections, so dropping and the target coverage give the same
+        # results no matter how many lines were simulated together
+        for k in range(len(chunk)):
+            lineDetections = []
+            for faultIndex, faultOutput in chunkResults[1][k]:
+                if nDetect > 0 and counts[faultIndex] >= nDetect:
+                    continue
+                if counts[faultIndex] == 0:
+                    numDetected += weights[faultIndex]
+                counts[faultIndex] += 1
+                lineDetections.append([faultIndex, faultOutput])
+            outputs.append(chunkResults[0][k])
+            detections.append(lineDetections)
+
+            if target is not None and numDetected >= target * len(sites):
+                return [outputs, detections]
+
+    return [outputs, detections]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Good and fault simulation of one chunk of input lines with any engine, returns [outputs, detections] for
+# the lines of the chunk, like faultSimLines; goodOutputs are the good outputs when they are already known
+def simChunk(net, chunk, faultIndices, sites, engine, width=PACK_WIDTH, goodOutputs=None):
+    if engine == "event":
+        return eventSimChunk(net, chunk, faultIndices, sites)
+    if goodOutputs is None:
+        goodOutputs = simVectors(net, chunk, width, engine)
+    detections = []
+    for k in range(len(chunk)):
+        output = goodOutputs[k]
+        if output == -1 or output == -2:
+            detections.append([])
+        else:
+            detections.append(faultSimVector(net, chunk[k], output, faultIndices, sites, engine))
+    return [goodOutputs, detections]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Event-driven good and fault simulation of one pack of input lines (one line per lane)
+# Returns [outputs, detections] for the lines of the pack, like faultSimLines
+def eventSimChunk(net, chunk, faultIndices, sites):
+    packed = packInputs(net, chunk)
+
+    # Bad lines are left out of the mask so they never count as detecting anything
+    mask = 0
+    for k in range(len(chunk)):
+        if packed[2][k] == 0:
+            mask |= 1 << k
+    good = parallelSim(net, packed[0], packed[1], mask, {})
+    laneOutputs = unpackOutputs(net, good[0], good[1], len(chunk))
+
+    detections = [[] for x in chunk]
+    for faultIndex in faultIndices:
+        result = eventFaultSim(net, good[0], good[1], mask, sites[faultIndex])
+        for k in result[1]:
+            detections[k].append([faultIndex, result[1][k]])
+
+    outputs = []
+    for k in range(len(chunk)):
+        if packed[2][k] != 0:
+            outputs.append(packed[2][k])
+        else:
+            outputs.append(laneOutputs[k])
+    return [outputs, detections]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# Result cache
+# Vector files repeat lines, and the same vector sets are graded again and again, so faultSimLines can keep the results
+# of combinational lines in a least recently used cache keyed by (netlist HASH, input line). An entry is [output,
+# sites, detected]: the good output string (or the inputRead error code), the set of fault sites the line was
+# simulated against (None for a bad line, which never detects anything) and {site: faulty output} for the sites it
+# detects. A line is looked up as long as its entry covers every fault still being simulated; otherwise it is simulated
+# (once per chunk, however often it repeats there) and its entry replaced. Only output strings are kept, not every
+# wire value, so entries stay small, and lines simulated against the same faults share one set of sites. The cache can
+# be saved to a file to carry it over to later runs.
+RESULT_CACHE_SIZE = 1 << 16
+RESULT_CACHE_VERSION = 1
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Makes a result cache of at most size lines, with the entries of the cache file path if there is one
+def resultCacheNew(size=RESULT_CACHE_SIZE, path=None):
+    resultCache = {"ENTRIES": collections.OrderedDict(), "SIZE": size, "PATH": path, "SITES": None, "HITS": 0,
+                   "MISSES": 0}
+    if path is None or not os.path.isfile(path):
+        return resultCache
+    try:
+        with open(path, "rb") as cacheFile:
+            saved = pickle.load(cacheFile)
+    except Exception as error:
+        logger.warning("could not read the result cache %s: %s", path, error)
+        return resultCache
+    if not isinstance(saved, dict) or saved.get("VERSION") != RESULT_CACHE_VERSION:
+        logger.info("ignoring the result cache %s, it was written by another version", path)
+        return resultCache
+    # Least recently used first, so the newest entries are the ones kept
+    for key, entry in saved["ENTRIES"][-size:] if size > 0 else []:
+        resultCache["ENTRIES"][key] = entry
+    logger.info("Loaded %d cached lines from %s", len(resultCache["ENTRIES"]), path)
+    return resultCache
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Writes a result cache to its file; a cache without a file, or that cannot be written, is just skipped
+def resultCacheSave(resultCache):
+    path = resultCache["PATH"]
+    if path is None:
+        return
+    saved = {"VERSION": RESULT_CACHE_VERSION, "ENTRIES": list(resultCache["ENTRIES"].items())}
+    try:
+        temp = path + "." + str(os.getpid())
+        with open(temp, "wb") as cacheFile:
+            pickle.dump(saved, cacheFile, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, path)
+    except (IOError, OSError) as error:
+        logger.warning("could not save the result cache: %s", error)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: simChunk through a result cache: only the lines without a usable entry are simulated
+def cachedSimChunk(net, chunk, faultIndices, sites, engine, width, resultCache):
+    entries = resultCache["ENTRIES"]
+    netHash = net["HASH"]
+
+    # The fault sites being simulated, as one set shared by every entry made with them
+    siteIndex = {}
+    for faultIndex in faultIndices:
+        siteIndex.setdefault(tuple(sites[faultIndex]), []).append(faultIndex)
+    needed = frozenset(siteIndex)
+    if resultCache["SITES"] is not None and resultCache["SITES"] == needed:
+        needed = resultCache["SITES"]
+    resultCache["SITES"] = needed
+
+    # Looking up every line; the entries of the chunk are kept aside, so a small cache cannot evict them halfway
+    found = {}
+    missing = []
+    for line in chunk:
+        if line in found:
+            continue
+        entry = entries.get((netHash, line))
+        if entry is not None and (entry[1] is None or entry[1] is needed or needed <= entry[1]):
+            entries.move_to_end((netHash, line))
+            found[line] = entry
+        else:
+            found[line] = None
+            missing.append(line)
+    resultCache["MISSES"] += len(missing)
+    resultCache["HITS"] += len(chunk) - len(missing)
+
+    if missing:
+        results = simChunk(net, missing, faultIndices, sites, engine, width)
+        for k in range(len(missing)):
+            output = results[0][k]
+            if output == -1 or output == -2:
+                entry = [output, None, {}]
+            else:
+                entry = [output, needed, dict((tuple(sites[faultIndex]), faultOutput)
+                                              for faultIndex, faultOutput in results[1][k])]
+            found[missing[k]] = entry
+            entries[(netHash, missing[k])] = entry
+            entries.move_to_end((netHash, missing[k]))
+        while len(entries) > resultCache["SIZE"]:
+            entries.popitem(last=False)
+
+    outputs = []
+    detections = []
+    for line in chunk:
+        entry = found[line]
+        outputs.append(entry[0])
+        detections.append(sorted([[faultIndex, faultOutput] for site, faultOutput in entry[2].items()
+                                  for faultIndex in siteIndex.get(site, [])]))
+    return [outputs, detections]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# Sequential simulation
+# The DFFs cut the netlist into a combinational core: a DFF output is a pseudo-input holding the present state and its
+# D input is a pseudo-output that becomes the next state at the clock. Every input line is one clock cycle, so the
+# core is evaluated once per line in topological order (basic_sim / parallelFaultSim) and the DFFs latch at the end
+# of it. A line reading RESET puts every DFF back into the initial state, so one file can hold several sequences.
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Checks if an input line is a RESET line between two vector sequences
+def isReset(line):
+    return line.upper() == "RESET"
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Builds the initial DFF state from initState: one character ('0', '1' or 'U') for every DFF, or one
+# character per DFF in the order the DFFs are defined in the benchmark file.
+# Returns the memory dictionary for basic_sim, or an error message string
+def initialState(net, initState="U"):
+    dffs = net["DFFS"]
+    if len(initState) == 1:
+        initState = initState * len(dffs)
+    if len(initState) != len(dffs) or initState.strip("01Uu") != "":
+        msg = "STATE ERROR: INITIAL STATE \"" + initState + "\" NEEDS ONE OF 0, 1 OR U FOR EACH OF THE " + \
+              str(len(dffs)) + " DFFS"
+        logger.error(msg)
+        return msg
+    return dict((dffs[i], initState[i].upper()) for i in range(len(dffs)))
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Builds the state a sequential simulation carries from one batch of lines to the next, starting from
+# initState: the INIT state RESET lines go back to, the GOOD machine state (both like initialState) and the FAULTS
+# state of the faulty machines, {faultIndex: {dff: [one, zero]}} for the DFFs where one differs from the good machine.
+# Returns the state dictionary, or an error message string
+def seqState(net, initState="U"):
+    state = initialState(net, initState)
+    if isinstance(state, str):
+        return state
+    return {"INIT": state, "GOOD": dict(state), "FAULTS": {}}
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Simulates the good circuit over a sequence of input lines, one clock cycle per line
+# state is a sequential state from seqState to start from (otherwise the circuit starts from initState); its GOOD
+# machine state is updated in place, so the next lines can carry on from it.
+# Returns the output string of every line, the inputRead error code (-1 / -2) for bad lines (which do not clock the
+# circuit), or None for RESET lines
+def seqSim(net, lines, initState="U", state=None):
+    if state is None:
+        state = seqState(net, initState)
+    memory = state["GOOD"]
+    outputs = []
+    for line in lines:
+        if isReset(line):
+            memory = dict(state["INIT"])
+            outputs.append(None)
+            continue
+        values = inputRead(net, line)
+        if values == -1 or values == -2:
+            outputs.append(values)
+            continue
+        basic_sim(net, values, memory)
+        outputs.append(outputString(net, values))
+    state["GOOD"] = memory
+    return outputs
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Packs a DFF state ('0', '1' or 'U' per DFF, like initialState) into every lane of mask, returns the
+# {dff: [ones, zeros]} memory of parallelFaultSim
+def packState(state, mask):
+    return dict((node, [mask if state[node] == '1' else 0, mask if state[node] == '0' else 0]) for node in state)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Packs faulty machines FAULT_WIDTH lanes at a time for seqFaultSim
+# good is the DFF state of the good machine and diffs[faultIndex] the {dff: [one, zero]} bits where a faulty machine's
+# state differs from it. Returns the groups, each a dictionary with the FAULTS of its lanes, their MASK, the
+# INJECTION masks from faultMasks and the packed MEMORY
+def packGroups(net, faultIndices, sites, good, diffs):
+    groups = []
+    for start in range(0, len(faultIndices), FAULT_WIDTH):
+        group = faultIndices[start:start + FAULT_WIDTH]
+        mask = (1 << len(group)) - 1
+        memory = packState(good, mask)
+        for k in range(len(group)):
+            for node, value in diffs.get(group[k], {}).items():
+                lane = 1 << k
+                memory[node] = [(memory[node][0] & ~lane) | (value[0] << k),
+                                (memory[node][1] & ~lane) | (value[1] << k)]
+        groups.append({"FAULTS": group, "MASK": mask, "INJECTION": faultMasks(sites, group), "MEMORY": memory})
+    return groups
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: The other way around from packGroups: returns the state differences of the faulty machines of the groups
+# from the good state, leaving out the faults that are not in keep (a set) if there is one
+def unpackGroups(groups, good, keep=None):
+    diffs = {}
+    for group in groups:
+        goodState = packState(good, group["MASK"])
+        memory = group["MEMORY"]
+        for node in goodState:
+            state = memory[node]
+            lanes = ((state[0] ^ goodState[node][0]) | (state[1] ^ goodState[node][1])) & group["MASK"]
+            k = 0
+            while lanes:
+                if lanes & 1 and (keep is None or group["FAULTS"][k] in keep):
+                    diffs.setdefault(group["FAULTS"][k], {})[node] = [(state[0] >> k) & 1, (state[1] >> k) & 1]
+                lanes >>= 1
+                k += 1
+    return diffs
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Sequential fault simulation: every faulty machine keeps its own DFF state from line to line
+# FAULT_WIDTH faults are simulated together, each lane with its own state in the packed memory of parallelFaultSim,
+# and the good machine is simulated along with them one line at a time. Takes the same counts / nDetect / target /
+# weights as faultSimLines and returns the same [outputs, detections], with None outputs for RESET lines. A fault is
+# dropped as soon as it has been detected nDetect times, and the remaining faults are packed into fewer groups once
+# that frees one; the simulation stops at the line that reaches the target coverage. state is a sequential state from
+# seqState to start from (otherwise every machine starts from initState), updated in place with the good and faulty
+# machine states after the last line simulated.
+# engine "codegen" runs the passes through compiledSim; the other engines have no sequential version here, so
+# "serial" and "numpy" run as "parallel" (with a warning).
+def seqFaultSim(net, lines, faultIndices, sites, initState="U", counts=None, nDetect=0, target=None, weights=None,
+                engine="parallel", state=None):
+    if engine != "parallel" and engine != "codegen":
+        logger.warning("The %s engine has no sequential fault simulation, using the parallel engine instead", engine)
+        engine = "parallel"
+    faultIndices = [faultIndex for faultIndex in faultIndices if sites[faultIndex] is not None]
+    if counts is None:
+        counts = [0] * len(sites)
+    if weights is None:
+        weights = [1] * len(sites)
+    if nDetect > 0:
+        faultIndices = [faultIndex for faultIndex in faultIndices if counts[faultIndex] < nDetect]
+
+    # Every lane starts from the state of its faulty machine
+    if state is None:
+        state = seqState(net, initState)
+    memory = state["GOOD"]
+    groups = packGroups(net, faultIndices, sites, memory, state["FAULTS"])
+    numFaults = len(faultIndices)
+
+    numDetected = sum([weights[faultIndex] for faultIndex in range(len(sites)) if counts[faultIndex] > 0])
+    outputs = []
+    detections = []
+    for line in lines:
+        if isReset(line):
+            memory = dict(state["INIT"])
+            for group in groups:
+                group["MEMORY"] = packState(state["INIT"], group["MASK"])
+            outputs.append(None)
+            detections.append([])
+            continue
+        values = inputRead(net, line)
+        if values == -1 or values == -2:
+            outputs.append(values)
+            detections.append([])
+            continue
+        basic_sim(net, values, memory)
+        output = outputString(net, values)
+
+        # Counting the detections group by group, which is fault list order
+        lineDetections = []
+        for group in groups:
+            mask = group["MASK"]
+            packed = broadcastLine(net, values, mask)
+            if engine == "codegen":
+                result = compiledSim(net, packed[0], packed[1], mask, group["MEMORY"], group["INJECTION"])
+            else:
+                result = parallelFaultSim(net, packed[0], packed[1], mask, group["MEMORY"], group["INJECTION"])
+
+            diff = outputDiff(net, result[0], result[1], output, mask)
+            k = 0
+            while diff:
+                faultIndex = group["FAULTS"][k]
+                if diff & 1 and (nDetect == 0 or counts[faultIndex] < nDetect):
+                    if counts[faultIndex] == 0:
+                        numDetected += weights[faultIndex]
+                    counts[faultIndex] += 1
+                    lineDetections.append([faultIndex, laneOutput(net, result[0], result[1], k)])
+                    if nDetect > 0 and counts[faultIndex] >= nDetect:
+                        numFaults -= 1
+                diff >>= 1
+                k += 1
+        outputs.append(output)
+        detections.append(lineDetections)
+        if target is not None and numDetected >= target * len(sites):
+            break
+
+        # Dropped faults stay in their lanes until the faults left fit into fewer groups, then they are packed again
+        if (numFaults + FAULT_WIDTH - 1) // FAULT_WIDTH < len(groups):
+            active = [faultIndex for group in groups for faultIndex in group["FAULTS"] if counts[faultIndex] < nDetect]
+            groups = packGroups(net, active, sites, memory, unpackGroups(groups, memory, set(active)))
+
+    # Keeping the states of the faults that are still simulated for the next lines
+    active = set([faultIndex for group in groups for faultIndex in group["FAULTS"]
+                  if nDetect == 0 or counts[faultIndex] < nDetect])
+    for faultIndex in faultIndices:
+        state["FAULTS"].pop(faultIndex, None)
+    state["FAULTS"].update(unpackGroups(groups, memory, active))
+    state["GOOD"] = memory
+    return [outputs, detections]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Event-driven sequential fault simulation
+# The good machine is simulated one clock cycle per line, and every fault is propagated from the good values with
+# eventFaultSim. A faulty machine only stores the DFFs where its state differs from the good machine; once its state
+# has converged back to the good one nothing is stored for it at all, and it costs no more than a combinational fault.
+# Faults are dropped (state included) as soon as they have been detected nDetect times.
+# Takes the same arguments (state included) and returns the same [outputs, detections] as seqFaultSim.
+def eventSeqFaultSim(net, lines, faultIndices, sites, initState="U", counts=None, nDetect=0, target=None,
+                     weights=None, state=None):
+    active = [faultIndex for faultIndex in faultIndices if sites[faultIndex] is not None]
+    if counts is None:
+        counts = [0] * len(sites)
+    if weights is None:
+        weights = [1] * len(sites)
+    if nDetect > 0:
+        active = [faultIndex for faultIndex in active if counts[faultIndex] < nDetect]
+
+    # The good machine is packed one line wide, so the faulty states are single-lane [ones, zeros] too
+    if state is None:
+        state = seqState(net, initState)
+    memory = packState(state["GOOD"], 1)
+    # state differences from the good machine, only for faulty machines that have any
+    faultStates = dict((faultIndex, state["FAULTS"][faultIndex]) for faultIndex in active
+                       if faultIndex in state["FAULTS"])
+    mostStates = len(faultStates)
+
+    numDetected = sum([weights[faultIndex] for faultIndex in range(len(sites)) if counts[faultIndex] > 0])
+    outputs = []
+    detections = []
+    for line in lines:
+        if isReset(line):
+            # Every machine goes back to the same initial state
+            memory = packState(state["INIT"], 1)
+            faultStates = {}
+            outputs.append(None)
+            detections.append([])
+            continue
+        packed = packInputs(net, [line])
+        if packed[2][0] != 0:
+            outputs.append(packed[2][0])
+            detections.append([])
+            continue
+
+        good = parallelSim(net, packed[0], packed[1], 1, memory)
+        lineDetections = []
+        stillActive = []
+        for faultIndex in active:
+            result = eventFaultSim(net, good[0], good[1], 1, sites[faultIndex], faultStates.get(faultIndex, {}))
+            if result[2]:
+                faultStates[faultIndex] = result[2]
+            elif faultIndex in faultStates:
+                del faultStates[faultIndex]
+
+            if result[0]:
+                if counts[faultIndex] == 0:
+                    numDetected += weights[faultIndex]
+                counts[faultIndex] += 1
+                lineDetections.append([faultIndex, result[1][0]])
+
+            # Dropping the fault together with its faulty state
+            if nDetect > 0 and counts[faultIndex] >= nDetect:
+                faultStates.pop(faultIndex, None)
+                continue
+            stillActive.append(faultIndex)
+        active = stillActive
+        mostStates = max(mostStates, len(faultStates))
+
+        outputs.append(laneOutput(net, good[0], good[1], 0))
+        detections.append(lineDetections)
+        if target is not None and numDetected >= target * len(sites):
+            break
+
+    logger.debug("at most %d faulty machines had a state different from the good machine", mostStates)
+    for faultIndex in faultIndices:
+        state["FAULTS"].pop(faultIndex, None)
+    state["FAULTS"].update(faultStates)
+    state["GOOD"] = dict((node, '1' if memory[node][0] else '0' if memory[node][1] else 'U') for node in memory)
+    return [outputs, detections]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# Multiprocessing fault simulation
+# The fault list is split into shards that are simulated by a pool of worker processes. One pool (jobsPool) is kept
+# for a whole run: the netlist, the fault sites and the options are sent to each worker once when it starts
+# (workerInit), so a task is only a batch of input lines with a shard of fault indices and their detection counts (and
+# the sequential state of their faulty machines), and the results are merged back in fault list order so the output
+# does not depend on the number of jobs.
+WORKER_DATA = {}
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Stores what every task of a worker process needs
+def workerInit(net, sites, engine, width, nDetect, initState):
+    WORKER_DATA["net"] = net
+    WORKER_DATA["sites"] = sites
+    WORKER_DATA["engine"] = engine
+    WORKER_DATA["width"] = width
+    WORKER_DATA["nDetect"] = nDetect
+    WORKER_DATA["initState"] = initState
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Simulates one shard of the fault list in a worker process
+# task is [lines, shard, shardCounts, shardState]: shardCounts are the detection counts of the faults of the shard and
+# shardState the sequential state (see seqState) with only their faulty machines, or None for combinational runs.
+# Returns [detections, faultStates]: the detections of every line and the FAULTS of shardState after the lines
+def workerRun(task):
+    lines, shard, shardCounts, shardState = task
+    counts = [0] * len(WORKER_DATA["sites"])
+    for k in range(len(shard)):
+        counts[shard[k]] = shardCounts[k]
+    results = faultSimLines(WORKER_DATA["net"], lines, shard, WORKER_DATA["sites"], WORKER_DATA["engine"],
+                            WORKER_DATA["width"], counts, WORKER_DATA["nDetect"], initState=WORKER_DATA["initState"],
+                            state=shardState)
+    return [results[1], shardState["FAULTS"] if shardState is not None else None]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Starts a pool of jobs worker processes for faultSimJobs, set up for one netlist, fault list and options
+def jobsPool(net, sites, engine="event", width=PACK_WIDTH, nDetect=0, initState=None, jobs=1):
+    return concurrent.futures.ProcessPoolExecutor(jobs, initializer=workerInit,
+                                                  initargs=(net, sites, engine, width, nDetect, initState))
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: faultSimLines with the fault list sharded across jobs worker processes
+# Takes the same arguments and returns the same [outputs, detections] as faultSimLines. pool is a pool from jobsPool
+# started with the same net, sites and options, to reuse between calls; without one a pool is started just for this
+# call. Dropping is done per fault inside the workers; the target coverage is applied once the shards are merged, so
+# the workers always run every line (and a sequential state is left at the last line even if the outputs are cut).
+def faultSimJobs(net, lines, faultIndices, sites, engine="event", width=PACK_WIDTH, counts=None, nDetect=0,
+                 target=None, weights=None, initState=None, jobs=1, pool=None, state=None):
+    if pool is None:
+        with jobsPool(net, sites, engine, width, nDetect, initState, jobs) as pool:
+            return faultSimJobs(net, lines, faultIndices, sites, engine, width, counts, nDetect, target, weights,
+                                initState, jobs, pool, state)
+
+    faultIndices = [faultIndex for faultIndex in faultIndices if sites[faultIndex] is not None]
+    if counts is None:
+        counts = [0] * len(sites)
+    if weights is None:
+        weights = [1] * len(sites)
+    if nDetect > 0:
+        faultIndices = [faultIndex for faultIndex in faultIndices if counts[faultIndex] < nDetect]
+
+    # A few shards per job so that a slow shard does not hold up the whole pool
+    numShards = min(len(faultIndices), jobs * 4)
+    shards = [faultIndices[(i * len(faultIndices)) // numShards:((i + 1) * len(faultIndices)) // numShards]
+              for i in range(numShards)]
+    if initState is not None and state is None:
+        state = seqState(net, initState)
+    tasks = []
+    for shard in shards:
+        shardState = None
+        if initState is not None:
+            shardState = {"INIT": state["INIT"], "GOOD": dict(state["GOOD"]),
+                          "FAULTS": dict((faultIndex, state["FAULTS"][faultIndex]) for faultIndex in shard
+                                         if faultIndex in state["FAULTS"])}
+        tasks.append([lines, shard, [counts[faultIndex] for faultIndex in shard], shardState])
+
+    if initState is not None:
+        outputs = seqSim(net, lines, initState, state)
+    else:
+        outputs = simVectors(net, lines, width, engine)
+    detections = [[] for line in lines]
+    if initState is not None:
+        for faultIndex in faultIndices:
+            state["FAULTS"].pop(faultIndex, None)
+    for shardDetections, faultStates in pool.map(workerRun, tasks):
+        for i in range(len(lines)):
+            detections[i].extend(shardDetections[i])
+        if faultStates is not None:
+            state["FAULTS"].update(faultStates)
+
+    # Counting the detections line by line, the same way faultSimLines does
+    numDetected = sum([weights[faultIndex] for faultIndex in range(len(sites)) if counts[faultIndex] > 0])
+    for i in range(len(lines)):
+        detections[i].sort()
+        for faultIndex, faultOutput in detections[i]:
+            if counts[faultIndex] == 0:
+                numDetected += weights[faultIndex]
+            counts[faultIndex] += 1
+        if target is not None and numDetected >= target * len(sites):
+            return [outputs[:i + 1], detections[:i + 1]]
+
+    return [outputs, detections]
+
+
+def userIn():
+    while True:
+        print("Choose what you'd like to do (1, 2, or 3): " + "\n 1: Test Vector Generation" + "\n 2: Fault Coverage Simulation \n")
+        opt=input()
+
+        if opt not in ("1", "2"):
+            print("Input not recognized. \n")
+            continue
+        else:
+            return opt
+            #break  
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# Netlist cache
+# loadCircuit keeps the circuit dictionary and the compiled netlist of a benchmark file in a pickle next to it
+# (<bench>.p3cache). The cache is used as is while the size and modification time of the bench file match; otherwise
+# the file contents are hashed, and the cache is only rebuilt when the hash changed too.
+NETLIST_CACHE = True
+NETLIST_CACHE_VERSION = 3
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Gets [circuit, net] from the cache of a benchmark file, or None if there is no valid cache
+# Returns [cached, digest]: digest is the SHA1 of the bench file when it had to be read (None otherwise)
+def readNetCache(cktFile):
+    stat = os.stat(cktFile)
+    # The garbage collector only slows down unpickling the many small lists of a netlist
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        with open(cktFile + ".p3cache", "rb") as cacheFile:
+            cache = pickle.load(cacheFile)
+    except Exception:
+        cache = None
+    finally:
+        if collecting:
+            gc.enable()
+    if not isinstance(cache, dict) or cache.get("VERSION") != NETLIST_CACHE_VERSION:
+        return [None, None]
+    if cache["SIZE"] == stat.st_size and cache["MTIME"] == stat.st_mtime_ns:
+        return [cache["LOADED"], None]
+
+    # Touched but maybe not changed, the contents decide
+    with open(cktFile, "rb") as benchFile:
+        digest = hashlib.sha1(benchFile.read()).hexdigest()
+    if cache["SHA1"] == digest:
+        writeNetCache(cktFile, cache["LOADED"], digest)
+        return [cache["LOADED"], digest]
+    return [None, digest]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Saves [circuit, net] as the cache of a benchmark file; a cache that cannot be written is just skipped
+def writeNetCache(cktFile, loaded, digest=None):
+    stat = os.stat(cktFile)
+    if digest is None:
+        with open(cktFile, "rb") as benchFile:
+            digest = hashlib.sha1(benchFile.read()).hexdigest()
+    cache = {"VERSION": NETLIST_CACHE_VERSION, "SIZE": stat.st_size, "MTIME": stat.st_mtime_ns, "SHA1": digest,
+             "LOADED": loaded}
+    path = cktFile + ".p3cache"
+    try:
+        temp = path + "." + str(os.getpid())
+        with open(temp, "wb") as cacheFile:
+            pickle.dump(cache, cacheFile, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, path)
+    except (IOError, OSError) as error:
+        logger.debug("could not save the netlist cache: %s", error)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Reads and compiles a benchmark file, returns [circuit, net] or the netlist error message string
+# The result is taken from (and saved to) the netlist cache next to the file unless NETLIST_CACHE is off
+def loadCircuit(cktFile):
+    logger.info("Reading %s ...", cktFile)
+    digest = None
+    if NETLIST_CACHE:
+        cached, digest = readNetCache(cktFile)
+        if cached is not None:
+            logger.info("Loaded the netlist from %s", cktFile + ".p3cache")
+            return cached
+
+    tempNetRead = netReadFast(cktFile)
+    circuit = tempNetRead[0]
+
+    # Every problem is reported, not just the first one
+    problems = validateCircuit(circuit)
+    if problems:
+        for msg in problems:
+            logger.error(msg)
+        return "\n".join(problems)
+
+    # Uncomment the following line, for the neater display of the function and then comment out print(circuit)
+#    printCkt(circuit)
+
+    # compile and levelize the netlist once; validateCircuit already reported loops and undefined lines
+    net = compileNet(circuit)
+    if isinstance(net, str):
+        return net
+    logger.info("Finished processing benchmark file and built netlist: %d inputs, %d outputs, %d gates, depth %d",
+                net["INPUT_WIDTH"], len(net["OUTPUTS"]), len(net["GATES"]), net["DEPTH"])
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("evaluation order: %s", " ".join([net["NAMES"][node] for node in net["ORDER"]]))
+    if NETLIST_CACHE:
+        writeNetCache(cktFile, [circuit, net], digest)
+    return [circuit, net]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# Streaming
+# run_fault_sim reads, simulates and writes the vectors STREAM_BATCH lines at a time, so vector files of any size (or
+# vectors generated on the fly) run in constant memory. The results of a batch are written with one call into a
+# STREAM_BUFFER sized file buffer, and the throughput is logged every STREAM_REPORT seconds.
+STREAM_BATCH = 4096
+STREAM_BUFFER = 1 << 20
+STREAM_REPORT = 10.0
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Reads the input lines from a vector file (or any iterable of lines) one at a time
+# Empty lines and comments are skipped, and the newlines are removed
+def readVectors(inputFile):
+    for line in inputFile:
+        # Removing the the newlines at the end
+        line = line.replace("\n", "")
+
+        # Do nothing else if empty lines, ...
+        if (line == ""):
+            continue
+        # ... or any comments
+        if (line[0] == "#"):
+            continue
+        yield line
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Groups a stream of input lines into lists of size lines
+# A sequential run carries the DFF states from one batch to the next (see seqState), so batches are cut the same way.
+def batchLines(lines, size=STREAM_BATCH):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# Binary result files
+# A compact alternative to the text result file, written by run_fault_sim next to (or instead of) it. All numbers are
+# little endian; a string is a uint32 byte count followed by UTF-8 text.
+#   header   RESULT_HEADER: magic, version, numFaults, numLines, numOutputs, nDetect and the byte offsets of the
+#            names, bitmap, records and trailer sections
+#   names    bench, vector and fault file names, then for every fault its number of fields and the fields (from
+#            getFaults)
+#   bitmap   one row of (numFaults + 7) // 8 bytes per line: bit f of row i is set if line i detected fault f
+#   records  for every line: kind (RESULT_GOOD, RESULT_SHORT, RESULT_INVALID or RESULT_RESET), the line as read and
+#            the good output, then the faulty output of each fault set in its bitmap row, in fault order, packed as
+#            (numOutputs + 7) // 8 bytes of 1 rail and the same of 0 rail (bit k is output character k)
+#   trailer  int32 first detecting line of every fault (-1 if never detected), the bitmap of every detected fault
+#            (after dominance), and uint32 number of faults detected nDetect times
+# The bitmap has a fixed row size, so readResults can memory-map it instead of parsing anything.
+RESULT_MAGIC = b"P3SIMRES"
+RESULT_VERSION = 1
+RESULT_HEADER = struct.Struct("<8sIIIIIQQQQ")
+RESULT_GOOD = 0
+RESULT_SHORT = 1
+RESULT_INVALID = 2
+RESULT_RESET = 3
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Writes a string of a binary result file
+def writeResultString(resultFile, text):
+    data = text.encode("utf-8")
+    resultFile.write(struct.pack("<I", len(data)))
+    resultFile.write(data)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Reads a string of a binary result file at offset, returns [text, next offset]
+def readResultString(data, offset):
+    size = struct.unpack_from("<I", data, offset)[0]
+    return [bytes(data[offset + 4:offset + 4 + size]).decode("utf-8"), offset + 4 + size]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Starts a binary result file; faults is the fault list from getFaults
+# Returns the writer dictionary for writeResultLine / closeResults. The bitmap rows go straight into the file and the
+# line records into a temporary file that closeResults appends, so nothing grows with the number of lines.
+def openResults(resultName, bench, vectorName, faultName, faults, numOutputs, nDetect):
+    resultFile = open(resultName, "wb", buffering=STREAM_BUFFER)
+    resultFile.write(b"\0" * RESULT_HEADER.size)
+    writeResultString(resultFile, bench)
+    writeResultString(resultFile, vectorName)
+    writeResultString(resultFile, faultName)
+    for faultLine in faults:
+        resultFile.write(struct.pack("<I", len(faultLine[1])))
+        for field in faultLine[1]:
+            writeResultString(resultFile, field)
+
+    writer = {}
+    writer["FILE"] = resultFile
+    writer["RECORDS"] = tempfile.TemporaryFile()
+    writer["NUM_FAULTS"] = len(faults)
+    writer["NUM_LINES"] = 0
+    writer["NUM_OUTPUTS"] = numOutputs
+    writer["OUTPUT_BYTES"] = (numOutputs + 7) // 8
+    writer["STRIDE"] = (len(faults) + 7) // 8
+    writer["N_DETECT"] = nDetect
+    writer["BITMAP_OFFSET"] = resultFile.tell()
+    return writer
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Adds one input line to a binary result file
+# detections is the [faultIndex, faultOutput] list of the line in fault order (empty unless kind is RESULT_GOOD)
+def writeResultLine(writer, kind, line, output, detections):
+    row = 0
+    records = writer["RECORDS"]
+    records.write(struct.pack("<B", kind))
+    writeResultString(records, line)
+    writeResultString(records, output)
+    for faultIndex, faultOutput in detections:
+        row |= 1 << faultIndex
+        faultOutput = faultOutput[::-1]
+        records.write(int("0" + faultOutput.translate(ONES_TABLE), 2).to_bytes(writer["OUTPUT_BYTES"], "little"))
+        records.write(int("0" + faultOutput.translate(ZEROS_TABLE), 2).to_bytes(writer["OUTPUT_BYTES"], "little"))
+    writer["FILE"].write(row.to_bytes(writer["STRIDE"], "little"))
+    writer["NUM_LINES"] += 1
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Finishes a binary result file
+# faults has the detected flags set, firstDetect[faultIndex] is the first line detecting each fault (-1 if none)
+def closeResults(writer, faults, firstDetect, nDetected):
+    resultFile = writer["FILE"]
+    records = writer["RECORDS"]
+    recordsOffset = resultFile.tell()
+    records.seek(0)
+    shutil.copyfileobj(records, resultFile)
+    records.close()
+
+    trailerOffset = resultFile.tell()
+    resultFile.write(struct.pack("<" + str(len(firstDetect)) + "i", *firstDetect))
+    detected = 0
+    for faultIndex in range(len(faults)):
+        if faults[faultIndex][0] == True:
+            detected |= 1 << faultIndex
+    resultFile.write(detected.to_bytes(writer["STRIDE"], "little"))
+    resultFile.write(struct.pack("<I", nDetected))
+
+    resultFile.seek(0)
+    resultFile.write(RESULT_HEADER.pack(RESULT_MAGIC, RESULT_VERSION, writer["NUM_FAULTS"], writer["NUM_LINES"],
+                                        writer["NUM_OUTPUTS"], writer["N_DETECT"], RESULT_HEADER.size,
+                                        writer["BITMAP_OFFSET"], recordsOffset, trailerOffset))
+    resultFile.close()
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Opens a binary result file written by run_fault_sim
+# Returns a dictionary with the header values (NUM_FAULTS, NUM_LINES, NUM_OUTPUTS, N_DETECT), the file names (BENCH,
+# VECTORS, FAULT_FILE), FAULTS (the fault list like getFaults, with the detected flags), FIRST_DETECT, N_DETECTED and
+# BITMAP, a memory-mapped view of the detection bitmap (STRIDE bytes per line); or an error message string.
+def readResults(resultName):
+    resultFile = open(resultName, "rb")
+    try:
+        data = mmap.mmap(resultFile.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        data = b""
+    resultFile.close()
+    if len(data) < RESULT_HEADER.size or data[0:len(RESULT_MAGIC)] != RESULT_MAGIC:
+        msg = "RESULT ERROR: \"" + resultName + "\" IS NOT A BINARY RESULT FILE"
+        logger.error(msg)
+        return msg
+    header = RESULT_HEADER.unpack_from(data, 0)
+    if header[1] != RESULT_VERSION:
+        msg = "RESULT ERROR: \"" + resultName + "\" HAS UNSUPPORTED VERSION " + str(header[1])
+        logger.error(msg)
+        return msg
+
+    results = {}
+    results["NUM_FAULTS"], results["NUM_LINES"], results["NUM_OUTPUTS"], results["N_DETECT"] = header[2:6]
+    results["STRIDE"] = (results["NUM_FAULTS"] + 7) // 8
+    results["OUTPUT_BYTES"] = (results["NUM_OUTPUTS"] + 7) // 8
+    results["DATA"] = data
+
+    offset = header[6]
+    results["BENCH"], offset = readResultString(data, offset)
+    results["VECTORS"], offset = readResultString(data, offset)
+    results["FAULT_FILE"], offset = readResultString(data, offset)
+    faults = []
+    for faultIndex in range(results["NUM_FAULTS"]):
+        numFields = struct.unpack_from("<I", data, offset)[0]
+        offset += 4
+        fields = []
+        for x in range(numFields):
+            field, offset = readResultString(data, offset)
+            fields.append(field)
+        faults.append([False, fields])
+
+    view = memoryview(data)
+    results["BITMAP"] = view[header[7]:header[7] + results["NUM_LINES"] * results["STRIDE"]]
+    results["RECORDS_OFFSET"] = header[8]
+
+    offset = header[9]
+    results["FIRST_DETECT"] = list(struct.unpack_from("<" + str(results["NUM_FAULTS"]) + "i", data, offset))
+    offset += 4 * results["NUM_FAULTS"]
+    detected = int.from_bytes(view[offset:offset + results["STRIDE"]], "little")
+    for faultIndex in range(results["NUM_FAULTS"]):
+        faults[faultIndex][0] = bool((detected >> faultIndex) & 1)
+    results["FAULTS"] = faults
+    results["N_DETECTED"] = struct.unpack_from("<I", data, offset + results["STRIDE"])[0]
+    return results
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Checks the detection bitmap of a binary result file: did line lineIndex detect fault faultIndex
+def resultDetected(results, lineIndex, faultIndex):
+    return bool((results["BITMAP"][lineIndex * results["STRIDE"] + faultIndex // 8] >> (faultIndex % 8)) & 1)
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Goes through the lines of a binary result file in order
+# Yields [kind, line, output, detections] for every line, detections being the [faultIndex, faultOutput] list
+def resultLines(results):
+    data = results["DATA"]
+    stride = results["STRIDE"]
+    outputBytes = results["OUTPUT_BYTES"]
+    numOutputs = results["NUM_OUTPUTS"]
+    offset = results["RECORDS_OFFSET"]
+    for lineIndex in range(results["NUM_LINES"]):
+        kind = data[offset]
+        line, offset = readResultString(data, offset + 1)
+        output, offset = readResultString(data, offset)
+
+        row = int.from_bytes(results["BITMAP"][lineIndex * stride:(lineIndex + 1) * stride], "little")
+        detections = []
+        faultIndex = 0
+        while row:
+            if row & 1:
+                ones = int.from_bytes(data[offset:offset + outputBytes], "little")
+                zeros = int.from_bytes(data[offset + outputBytes:offset + 2 * outputBytes], "little")
+                offset += 2 * outputBytes
+                faultOutput = "".join(["1" if (ones >> k) & 1 else ("0" if (zeros >> k) & 1 else "U")
+                                       for k in range(numOutputs)])
+                detections.append([faultIndex, faultOutput])
+            row >>= 1
+            faultIndex += 1
+        yield [kind, line, output, detections]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Converts a binary result file into the text result file run_fault_sim would have written
+# Returns [detectedFaults, totalFaults], or the error message string of readResults
+def resultsToText(resultName, textName):
+    results = readResults(resultName)
+    if isinstance(results, str):
+        return results
+    faults = results["FAULTS"]
+    outputFile = open(textName, "w", buffering=STREAM_BUFFER)
+    outputFile.write("# fault sim result\n")
+    outputFile.write("# input: " + results["BENCH"] + "\n")
+    outputFile.write("# input: " + results["VECTORS"] + "\n")
+    outputFile.write("# input: " + results["FAULT_FILE"] + "\n\n\n")
+
+    testVectorNum = 1
+    for kind, line, output, detections in resultLines(results):
+        if kind == RESULT_RESET:
+            outputFile.write("# reset\n\n")
+            continue
+        outputFile.write("tv" + str(testVectorNum) + " = " + line)
+        testVectorNum += 1
+        if kind == RESULT_SHORT:
+            outputFile.write(" -> INPUT ERROR: INSUFFICIENT BITS" + "\n")
+            continue
+        elif kind == RESULT_INVALID:
+            outputFile.write(" -> INPUT ERROR: INVALID INPUT VALUE/S" + "\n")
+            continue
+
+        line = line.replace(" ", "")
+        text = [" -> " + output + " (good)\n", "detected:\n"]
+        for faultIndex, faultOutput in detections:
+            text.append(faultName(faults[faultIndex]) + ": " + line + " -> " + faultOutput + "\n")
+        text.append("\n")
+        outputFile.write("".join(text))
+
+    coverage = writeCoverage(outputFile, faults, results["N_DETECT"], results["N_DETECTED"])
     outputFile.close()
+    return coverage
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Writes the fault coverage section at the end of a result file
+# faults is the fault list from getFaults with the detected flags set; nDetected is the number of faults detected
+# nDetect times. Returns [detectedFaults, totalFaults]
+def writeCoverage(outputFile, faults, nDetect, nDetected):
+    totalFaults = 0
+    detectedFaults = 0
+    for faultLine in faults:
+        totalFaults += 1
+        if(faultLine[0] == True):
+            detectedFaults += 1
+    
+    undetectedFaults = totalFaults - detectedFaults
+    
+    outputFile.write("total detected faults: " + str(detectedFaults))
+    outputFile.write("\n\nundetected faults: " + str(undetectedFaults) + "\n")
+
+    for faultLine in faults:
+        if(faultLine[0] == False):
+            #prints out the fault if it is a SA
+            if(faultLine[1][1] == "SA"):
+                outputFile.write(faultLine[1][0] + "-" + faultLine[1][1] + "-" + faultLine[1][2] + "\n")
+
+            #prints out the fault if it is IN-SA
+            elif(faultLine[1][1] == "IN"):
+                outputFile.write(faultLine[1][0] + "-" + faultLine[1][1] + "-" + faultLine[1][2] + "-" + faultLine[1][3] + "-" + faultLine[1][4] + "\n")
+    
+    if(totalFaults != 0):
+        outputFile.write("\nfault coverage: " + str(detectedFaults) + "/" + str(totalFaults) + " = " + "{:.0%}".format(detectedFaults/totalFaults))
+    else:
+        outputFile.write("\nfault coverage: 0/0 = 0%")
+
+    # With N-detect dropping, also report how many faults were detected the full N times
+    if(nDetect > 1 and totalFaults != 0):
+        outputFile.write("\n" + str(nDetect) + "-detect coverage: " + str(nDetected) + "/" + str(totalFaults) + " = " + "{:.0%}".format(nDetected/totalFaults))
+
+    return [detectedFaults, totalFaults]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Runs a complete fault simulation and writes the result file, without asking anything
+# bench, faults, vectors and out are the benchmark, input fault list, input vector and result file names; vectors
+# can also be "-" for the standard input or any iterable of input lines (like a generator).
+# fullFaults: also write the full SSA fault list of the circuit to this file first (and use it if faults is None)
+# engine, nDetect, target, collapse, dominance, jobs: see main
+# sequential: every input line is one clock cycle and the DFFs keep their state between lines (RESET lines go back to
+# initState, see initialState); otherwise the DFFs start from U on every line
+# loaded: [circuit, net] from loadCircuit, to skip reading the benchmark file again
+# batchSize: number of input lines read, simulated and written at a time
+# binaryOut: also write the results to this binary result file (see openResults); out can be None to only write that
+# resultCache: result cache from resultCacheNew to look lines up in and add them to (single process, combinational)
+# Returns [detectedFaults, totalFaults], or the netlist error message string
+def run_fault_sim(bench, faults, vectors, out, fullFaults=None, engine="event", nDetect=0, target=None,
+                  collapse=False, dominance=False, jobs=1, sequential=False, initState="U", loaded=None,
+                  batchSize=STREAM_BATCH, binaryOut=None, resultCache=None):
+    if loaded is None:
+        loaded = loadCircuit(bench)
+        if isinstance(loaded, str):
+            return loaded
+    circuit = loaded[0]
+    net = loaded[1]
+
+    if engine == "numpy" and numpy is None:
+        logger.warning("NumPy is not installed, using the parallel engine instead")
+        engine = "parallel"
+
+    if sequential:
+        if isinstance(initialState(net, initState), str):
+            return initialState(net, initState)
+        if engine == "serial" or engine == "numpy":
+            logger.warning("The %s engine has no sequential fault simulation, using the parallel engine instead",
+                           engine)
+            engine = "parallel"
+        # A dominated fault can show up through the DFF state on lines that detect none of the faults dominating it,
+        # and the other way around, so only equivalent faults are collapsed
+        if dominance:
+            logger.warning("Dominance collapsing does not hold with DFF state, only collapsing equivalent faults")
+            dominance = False
+    else:
+        initState = None
+
+    #generates the fault list
+    if fullFaults is not None:
+        genFaultList(circuit, fullFaults, bench)
+        if faults is None:
+            faults = fullFaults
+    faultInputName = faults
+    outputName = out
+
+    #gets the faults that need to be tested, and where each one is injected in the compiled netlist
+    faults = getFaults(faultInputName)
+    sites = [faultSite(net, faultLine) for faultLine in faults]
+
+    # Collapsing the fault list; the coverage is still reported against every fault of the full list
+    simFaults = range(len(faults))
+    classes = dict((faultIndex, [faultIndex]) for faultIndex in range(len(faults)))
+    dominated = {}
+    if collapse:
+        collapsed = collapseFaults(net, faults, sites, dominance)
+        simFaults = collapsed[0]
+        classes = collapsed[1]
+        dominated = collapsed[2]
+        logger.info("Collapsed %d faults to %d faults to simulate", len(faults), len(simFaults))
+    weights = [len(classes.get(faultIndex, [])) for faultIndex in range(len(faults))]
+
+    # The vectors are streamed: a batch of input lines is read, simulated and written out before the next one is read,
+    # so the memory use does not grow with the size of the vector file
+    if isinstance(vectors, str):
+        inputName = vectors
+        inputFile = sys.stdin if vectors == "-" else open(vectors, "r")
+    else:
+        inputName = "<stream>"
+        inputFile = vectors
+    logger.info("Simulating %s and writing the results to %s", inputName,
+                ", ".join([name for name in [outputName, binaryOut] if name is not None]))
+    outputFile = None
+    if outputName is not None:
+        outputFile = open(outputName, "w", buffering=STREAM_BUFFER)
+        outputFile.write("# fault sim result\n")
+        outputFile.write("# input: " + bench + "\n")
+        outputFile.write("# input: " + inputName + "\n")
+        outputFile.write("# input: " + faultInputName + "\n\n\n")
+    binaryFile = None
+    if binaryOut is not None:
+        binaryFile = openResults(binaryOut, bench, inputName, faultInputName, faults, len(net["OUTPUTS"]), nDetect)
+
+    counts = [0] * len(faults)
+    firstDetect = [-1] * len(faults)
+    if resultCache is not None and (jobs > 1 or initState is not None):
+        logger.info("The result cache is only used by single process combinational runs")
+    cacheHits = resultCache["HITS"] if resultCache is not None else 0
+
+    # The DFF states of the good and faulty machines, carried from one batch of lines to the next
+    state = None
+    if initState is not None:
+        state = seqState(net, initState)
+
+    # One pool of worker processes for the whole run, set up with the netlist and fault sites once
+    pool = None
+    if jobs > 1:
+        pool = jobsPool(net, sites, engine, nDetect=nDetect, initState=initState, jobs=jobs)
+
+    # Nothing is formatted for the log inside this loop unless debug messages are on
+    debug = logger.isEnabledFor(logging.DEBUG)
+
+    # Runs the fault simulation for each line of the input file
+##############################################################LOOK FOR N HERE###################################    
+    testVectorNum = 1
+    numLines = 0
+    startTime = time.time()
+    reportTime = startTime
+    for lines in batchLines(readVectors(inputFile), batchSize):
+        # Nothing left to simulate once the target fault coverage has been reached
+        if target is not None and len(faults) != 0:
+            numDetected = sum([weights[faultIndex] for faultIndex in range(len(faults)) if counts[faultIndex] > 0])
+            if numDetected >= target * len(faults):
+                logger.info("Target fault coverage reached after %d lines", numLines)
+                break
+
+        # A class dropped by dominance collapsing can also be detected by lines that detect none of the faults
+        # dominating it, so it is still simulated until it has been detected (nDetect times with nDetect)
+        batchFaults = simFaults
+        if dominated:
+            batchFaults = sorted(list(simFaults) + [faultIndex for faultIndex in dominated
+                                                    if counts[faultIndex] < max(nDetect, 1)])
+
+        # Removing spaces before simulating, then simulating the good circuit and every fault for the whole batch
+        if jobs > 1:
+            results = faultSimJobs(net, [line.replace(" ", "") for line in lines], batchFaults, sites, engine,
+                                   counts=counts, nDetect=nDetect, target=target, weights=weights,
+                                   initState=initState, jobs=jobs, pool=pool, state=state)
+        else:
+            results = faultSimLines(net, [line.replace(" ", "") for line in lines], batchFaults, sites, engine,
+                                    counts=counts, nDetect=nDetect, target=target, weights=weights,
+                                    initState=initState, resultCache=resultCache, state=state)
+        goodOutputs = results[0]
+        detections = results[1]
+        numLines += len(goodOutputs)
+
+        # The results of the batch are put together first and written out at once
+        text = []
+        write = text.append
+        for lineIndex in range(len(goodOutputs)):
+            line = lines[lineIndex]
+
+            # A RESET line of a sequential run is not a test vector
+            if goodOutputs[lineIndex] is None:
+                write("# reset\n\n")
+                if binaryFile is not None:
+                    writeResultLine(binaryFile, RESULT_RESET, line, "", [])
+                continue
+
+            # output the line to the txt file
+            write("tv" + str(testVectorNum) + " = " + line)
+
+            #updates testVectorNum for the next one
+            testVectorNum += 1
+
+            # Removing spaces
+            line = line.replace(" ", "")
+
+            output = goodOutputs[lineIndex]
+            if output == -1:
+                logger.warning("tv%d: INPUT ERROR: INSUFFICIENT BITS, move on to next input", testVectorNum - 1)
+                write(" -> INPUT ERROR: INSUFFICIENT BITS" + "\n")
+                if binaryFile is not None:
+                    writeResultLine(binaryFile, RESULT_SHORT, lines[lineIndex], "", [])
+                continue
+            elif output == -2:
+                logger.warning("tv%d: INPUT ERROR: INVALID INPUT VALUE/S, move on to next input", testVectorNum - 1)
+                write(" -> INPUT ERROR: INVALID INPUT VALUE/S" + "\n")
+                if binaryFile is not None:
+                    writeResultLine(binaryFile, RESULT_INVALID, lines[lineIndex], "", [])
+                continue
+
+            write(" -> " + output + " (good)\n")
+            write("detected:\n")
+
+            # Every fault of a collapsed class has the same faulty output as the one that was simulated; a dominated
+            # class is only listed on the line that first detects it (without nDetect), whatever the batch size
+            lineDetections = sorted([[member, faultOutput] for faultIndex, faultOutput in detections[lineIndex]
+                                     if not (faultIndex in dominated and nDetect == 0 and faults[faultIndex][0])
+                                     for member in classes[faultIndex]])
+            for faultIndex, faultOutput in lineDetections:
+                faults[faultIndex][0] = True
+                write(faultName(faults[faultIndex]) + ": ")
+                write(line + " -> " + faultOutput + "\n")
+                if firstDetect[faultIndex] < 0:
+                    firstDetect[faultIndex] = numLines - len(goodOutputs) + lineIndex
+            if binaryFile is not None:
+                writeResultLine(binaryFile, RESULT_GOOD, lines[lineIndex], output, lineDetections)
+
+            if debug:
+                logger.debug("tv%d = %s -> %s (good), %d faults detected", testVectorNum - 1, line, output,
+                             len(lineDetections))
+                for faultIndex, faultOutput in lineDetections:
+                    logger.debug("    %s: %s -> %s", faultName(faults[faultIndex]), line, faultOutput)
+
+            #adds extra line of space to file for formatiing
+            write("\n")
+        if outputFile is not None:
+            outputFile.write("".join(text))
+
+        if time.time() - reportTime >= STREAM_REPORT:
+            reportTime = time.time()
+            logger.info("%d lines simulated, %.0f lines/s", numLines, numLines / (reportTime - startTime))
+        if len(goodOutputs) < len(lines):
+            logger.info("Target fault coverage reached after %d lines", numLines)
+            break
+    if inputFile is not vectors and inputFile is not sys.stdin:
+        inputFile.close()
+    if pool is not None:
+        pool.shutdown()
+
+    elapsed = time.time() - startTime
+    logger.info("Simulated %d lines in %.2f s (%.0f lines/s)", numLines, elapsed,
+                numLines / elapsed if elapsed > 0 else 0)
+    if resultCache is not None and jobs == 1 and initState is None:
+        logger.info("%d lines were found in the result cache", resultCache["HITS"] - cacheHits)
+###########################----------------------------FAULT COVERAGE SECTION-------------------------------------##
+    nDetected = sum([weights[faultIndex] for faultIndex in range(len(faults))
+                     if nDetect > 0 and counts[faultIndex] >= nDetect])
+    detectedFaults = len([faultLine for faultLine in faults if faultLine[0] == True])
+    totalFaults = len(faults)
+    if outputFile is not None:
+        writeCoverage(outputFile, faults, nDetect, nDetected)
+        outputFile.close()
+    if binaryFile is not None:
+        closeResults(binaryFile, faults, firstDetect, nDetected)
+###########################----------------------------FAULT COVERAGE SECTION-------------------------------------##
+
+    logger.info("fault coverage: %d/%d", detectedFaults, totalFaults)
+    return [detectedFaults, totalFaults]
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Runs every job of a batch manifest in one process, reading each benchmark file only once
+# The manifest is a CSV file with one "bench,faults,vectors,out" job per line ("#" lines are comments). File names are
+# relative to the manifest, and an empty faults column uses the full SSA fault list, written next to the result file.
+# Options are passed on to run_fault_sim. Returns the [detectedFaults, totalFaults] (or error string) of every job
+def run_batch(manifest, **options):
+    manifestDir = os.path.dirname(os.path.abspath(manifest))
+    loadedCircuits = {}
+    results = []
+
+    manifestFile = open(manifest, "r")
+    for row in csv.reader(manifestFile):
+        # Do nothing else if empty lines or comments
+        if len(row) == 0 or row[0].strip() == "" or row[0].strip()[0] == "#":
+            continue
+        row = [os.path.join(manifestDir, x.strip()) if x.strip() != "" else None for x in row]
+        bench, faults, vectors, out = row[0:4]
+
+        if bench not in loadedCircuits:
+            loadedCircuits[bench] = loadCircuit(bench)
+        if isinstance(loadedCircuits[bench], str):
+            results.append(loadedCircuits[bench])
+            continue
+
+        fullFaults = None
+        if faults is None:
+            fullFaults = os.path.splitext(out)[0] + "_f_list.txt"
+        results.append(run_fault_sim(bench, faults, vectors, out, fullFaults, loaded=loadedCircuits[bench], **options))
+    manifestFile.close()
+    return results
+
+
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Main Function
+# engine: fault simulation engine for faultSimLines ("event", "parallel", "codegen", "numpy" or "serial"); a
+# sequential run only has "event", "parallel" and "codegen", and runs "numpy" and "serial" as "parallel"
+# nDetect: drop every fault once it has been detected this many times (0 keeps simulating all faults on all lines)
+# target: stop after the first line that brings the fault coverage to this fraction (None runs every line)
+# collapse: only simulate one fault of each equivalence class (dominance: also stop simulating each dominated class
+# once it has been detected, or detected nDetect times; not for a sequential run)
+# jobs: number of worker processes to shard the fault list across
+# sequential / initState: simulate one clock cycle per input line starting from initState (see run_fault_sim)
+# batchSize: number of input lines simulated at a time (see run_fault_sim)
+# resultCache: result cache of the good and fault simulation results of input lines (see resultCacheNew)
+def main(engine="event", nDetect=0, target=None, collapse=False, dominance=False, jobs=1, sequential=False,
+         initState="U", batchSize=STREAM_BATCH, resultCache=None):
+    # **************************************************************************************************************** #
+    # NOTE: UI code; Does not contain anything about the actual simulation
+
+    # Used for file access
+    script_dir = os.path.dirname(__file__)  # <-- absolute dir the script is in
+
+    print("Circuit Simulator:")
+    opt = userIn()
+##########################################################################################
+    # Select circuit benchmark file, default is circuit.bench
+    
+
+    while True:
+        cktFile = "circuit.bench"   
+        print("\n Read circuit benchmark file: use " + cktFile + "?" + " Enter to accept or type filename: ")
+        userInput = input()
+        if userInput == "":
+            break
+        else:
+            cktFile = os.path.join(script_dir, userInput)
+            if not os.path.isfile(cktFile):
+                print("File does not exist. \n")
+            else:
+                break
+
+    loaded = loadCircuit(cktFile)
+    if isinstance(loaded, str):
+        return
+    # Test generation only handles combinational netlists, there is no use asking for the files of a sequential one
+    if opt == "1" and loaded[1]["DFFS"]:
+        print("\n" + cktFile + " has DFFs, test vectors can only be generated for combinational circuits")
+        return
+
+    #select fault file, default is  full_f_list.txt
+################################################"WRITE FULL FAULT LIST###########################"
+    while True:
+        faultListName = "full_f_list.txt"
+        print("\n Write full fault list file: use " + faultListName + "?" + " Enter to accept or type filename: ")
+        userInput = input()
+        if userInput == "":
+            break
+        else:
+            faultListName = os.path.join(script_dir, userInput)
+            break
+################################################"WRITE FULL FAULT LIST###########################"
+    
+    #generates the fault list
+    genFaultList(loaded[0], faultListName, cktFile) 
+
+    #Select input fault file, default is f_list.txt
+    while True:
+        faultInputName = "full_f_list.txt"
+        print("\n Read input fault file: use " + faultInputName + "?" + " Enter to accept or type filename: ")
+        userInput = input()
+        if userInput == "":
+
+            break
+        else:
+            faultInputName = os.path.join(script_dir, userInput)
+            if not os.path.isfile(faultInputName):
+                print("File does not exist. \n")
+            else:
+                break
+
+    # Test vector generation: the vectors for the fault file are written out, and can be simulated with option 2
+    if opt == "1":
+        while True:
+            vectorName = "input.txt"
+            print("\n Write test vector file: use " + vectorName + "?" + " Enter to accept or type filename: ")
+            userInput = input()
+            if userInput == "":
+                break
+            else:
+                vectorName = os.path.join(script_dir, userInput)
+                break
+        # atpg imports this module, so it is only imported once it is needed
+        import atpg
+        atpg.runAtpg(cktFile, faultInputName, vectorName, loaded=loaded)
+        return
+
+    # Select input file, default is input.txt
+    while True:
+        inputName = "input.txt"
+        print("\n Read input vector file: use " + inputName + "?" + " Enter to accept or type filename: ")
+        userInput = input()
+        if userInput == "":
+
+            break
+        else:
+            inputName = os.path.join(script_dir, userInput)
+            if not os.path.isfile(inputName):
+                print("File does not exist. \n")
+            else:
+                break
+
+    # Select output file, default is output.txt
+    while True:
+        outputName = "fault_sim_result.txt"
+        print("\n Write result file: use " + outputName + "?" + " Enter to accept or type filename: ")
+        userInput = input()
+        if userInput == "":
+            break
+        else:
+            outputName = os.path.join(script_dir, userInput)
+            break
+
+    # Note: UI code;
+    # **************************************************************************************************************** #
+
+    run_fault_sim(cktFile, faultInputName, inputName, outputName, engine=engine, nDetect=nDetect, target=target,
+                  collapse=collapse, dominance=dominance, jobs=jobs, sequential=sequential, initState=initState,
+                  loaded=loaded, batchSize=batchSize, resultCache=resultCache)
     #exit()
 
 
-if __name__ == "__main__":
-    main()
+# -------------------------------------------------------------------------------------------------------------------- #
+# FUNCTION: Command line entry point; without a benchmark file or batch manifest it falls back to the prompts of main
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Circuit fault simulator")
+    parser.add_argument("-b", "--bench", help="circuit benchmark file")
+    parser.add_argument("-f", "--faults", help="input fault list (default: the full SSA fault list from --full-faults)")
+    parser.add_argument("-v", "--vectors", help="input vector file (- for the standard input)")
+    parser.add_argument("-o", "--out", default="fault_sim_result.txt", help="result file")
+    parser.add_argument("--full-faults", help="write the full SSA fault list of the circuit to this file")
+    parser.add_argument("--binary-out", metavar="FILE", help="also write the results to this compact binary file")
+    parser.add_argument("--no-text", action="store_true", help="do not write the text result file (with --binary-out)")
+    parser.add_argument("--to-text", metavar="FILE", help="convert a binary result file into the text result file -o")
+    parser.add_argument("--check", action="store_true", help="only read and validate the benchmark file")
+    parser.add_argument("--atpg", metavar="FILE",
+                        help="generate test vectors for the fault list (PODEM), write them to FILE and simulate them")
+    parser.add_argument("--backtracks", type=int, metavar="N", help="flips per fault before ATPG gives up on it")
+    parser.add_argument("--batch", metavar="MANIFEST", help="run every bench,faults,vectors,out job of a CSV manifest")
+    parser.add_argument("--engine", choices=["event", "parallel", "codegen", "numpy", "serial"], default="event",
+                        help="fault simulation engine (a --sequential run with serial or numpy uses parallel)")
+    parser.add_argument("--ndetect", type=int, default=0, metavar="N",
+                        help="drop faults once they have been detected N times")
+    parser.add_argument("--target", type=float, metavar="PERCENT", help="stop once the fault coverage reaches this")
+    parser.add_argument("--collapse", action="store_true", help="only simulate one fault of each equivalence class")
+    parser.add_argument("--dominance", action="store_true",
+                        help="also stop simulating dominated faults once they are detected (not with --sequential)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--sequential", action="store_true",
+                        help="simulate one clock cycle per input line, keeping the DFF state between lines")
+    parser.add_argument("--init-state", default="U", metavar="STATE",
+                        help="initial DFF state: 0, 1 or U for every DFF, or one character per DFF (default U)")
+    parser.add_argument("--batch-size", type=int, default=STREAM_BATCH, metavar="LINES",
+                        help="number of input lines simulated at a time (default %d)" % STREAM_BATCH)
+    parser.add_argument("--no-cache", action="store_true", help="do not use or write the <bench>.p3cache netlist cache")
+    parser.add_argument("--result-cache", metavar="FILE",
+                        help="look simulated lines up in this result cache file and save the new ones to it")
+    parser.add_argument("--result-cache-size", type=int, default=RESULT_CACHE_SIZE, metavar="LINES",
+                        help="most lines kept in the result cache (default %d)" % RESULT_CACHE_SIZE)
+    parser.add_argument("-q", "--quiet", action="store_true", help="only log warnings and errors")
+    parser.add_argument("--debug", action="store_true", help="log every input line and detected fault")
+    args = parser.parse_args(argv)
+
+    logLevel = logging.INFO
+    if args.quiet:
+        logLevel = logging.WARNING
+    if args.debug:
+        logLevel = logging.DEBUG
+    logging.basicConfig(format="%(message)s", level=logLevel)
+
+    global NETLIST_CACHE
+    if args.no_cache:
+        NETLIST_CACHE = False
+
+    resultCache = None
+    if args.result_cache is not None:
+        resultCache = resultCacheNew(args.result_cache_size, args.result_cache)
+    options = dict(engine=args.engine, nDetect=args.ndetect, collapse=args.collapse or args.dominance,
+                   dominance=args.dominance, jobs=args.jobs, sequential=args.sequential, initState=args.init_state,
+                   batchSize=args.batch_size, resultCache=resultCache,
+                   target=args.target / 100.0 if args.target is not None else None)
+
+    if args.to_text is not None:
+        result = resultsToText(args.to_text, args.out)
+        return 1 if isinstance(result, str) else 0
+
+    if args.batch is not None:
+        results = run_batch(args.batch, **options)
+        if resultCache is not None:
+            resultCacheSave(resultCache)
+        return 1 if any([isinstance(result, str) for result in results]) else 0
+
+    if args.bench is None:
+        main(**options)
+        if resultCache is not None:
+            resultCacheSave(resultCache)
+        return 0
+
+    if args.check:
+        return 1 if isinstance(loadCircuit(args.bench), str) else 0
+    if args.atpg is not None and args.vectors is not None:
+        parser.error("--atpg writes the vectors, it cannot be used with --vectors")
+    if args.vectors is None and args.atpg is None:
+        parser.error("--vectors is required with --bench")
+    if args.faults is None and args.full_faults is None:
+        parser.error("--faults or --full-faults is required with --bench")
+    if args.no_text and args.binary_out is None:
+        parser.error("--no-text needs --binary-out")
+
+    # Generating the vectors first, then simulating them like any other vector file
+    loaded = None
+    if args.atpg is not None:
+        # atpg imports this module, so it is only imported once it is needed
+        import atpg
+        loaded = loadCircuit(args.bench)
+        if isinstance(loaded, str):
+            return 1
+        faultFile = args.faults
+        if args.full_faults is not None:
+            genFaultList(loaded[0], args.full_faults, args.bench)
+            if faultFile is None:
+                faultFile = args.full_faults
+        atpgOptions = {} if args.backtracks is None else {"backtrackLimit": args.backtracks}
+        if isinstance(atpg.runAtpg(args.bench, faultFile, args.atpg, loaded=loaded, **atpgOptions), str):
+            return 1
+        args.vectors = args.atpg
+        # The full fault list is written already, run_fault_sim only has to read it
+        args.faults = faultFile
+        args.full_faults = None
+
+    result = run_fault_sim(args.bench, args.faults, args.vectors, None if args.no_text else args.out,
+                           args.full_faults, binaryOut=args.binary_out, loaded=loaded, **options)
+    if resultCache is not None and not isinstance(result, str):
+        resultCacheSave(resultCache)
+    return 1 if isinstance(result, str) else 0
+
 
+if __name__ == "__main__":
+    sys.exit(cli())